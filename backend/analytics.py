@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from database import get_collection, get_database
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_COLLECTION = "event_analytics"
+# Counters are merged in memory and written at most this often
+ANALYTICS_FLUSH_SECONDS = float(os.environ.get("ANALYTICS_FLUSH_SECONDS", "5"))
+
+class AnalyticsField:
+    CREATED = "created"
+    JOINS = "joins"
+    LEAVES = "leaves"
+    WAITLISTED = "waitlisted"
+    MESSAGES = "messages"
+
+COUNTER_FIELDS = (AnalyticsField.CREATED, AnalyticsField.JOINS, AnalyticsField.LEAVES,
+                  AnalyticsField.WAITLISTED, AnalyticsField.MESSAGES)
+
+# Timeline granularities and the $dateToString format that labels their buckets
+TIMELINE_FORMATS = {
+    "hour": "%Y-%m-%dT%H:00",
+    "day": "%Y-%m-%d",
+}
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+class EventAnalytics:
+    """Per-event hourly activity counters, one document per event and hour"""
+
+    def __init__(self):
+        self.pending: Dict[str, dict] = {}
+
+    def record(self, event: dict, field: Optional[str] = None, amount: int = 1):
+        """Count activity on an event, without a field only its title and capacity are refreshed"""
+        hour = hour_bucket(datetime.utcnow())
+        key = f"{event['id']}:{hour:%Y%m%d%H}"
+        entry = self.pending.get(key)
+        if entry is None:
+            entry = self.pending[key] = {
+                "event_id": event["id"], "organizer_id": event["organizer_id"], "hour": hour, "counts": {}
+            }
+        # The newest title and capacity win, summaries read them from the latest bucket
+        entry["title"] = event["title"]
+        entry["capacity"] = event["max_participants"]
+        if field:
+            entry["counts"][field] = entry["counts"].get(field, 0) + amount
+
+    def _restore(self, entries: Dict[str, dict]):
+        """Put counters from a failed flush back, under anything recorded since"""
+        for key, entry in entries.items():
+            current = self.pending.get(key)
+            if current is None:
+                self.pending[key] = entry
+                continue
+            # The newer title and capacity win
+            for field, amount in entry["counts"].items():
+                current["counts"][field] = current["counts"].get(field, 0) + amount
+
+    async def flush(self, database) -> int:
+        """Merge pending counters into their hourly bucket documents"""
+        pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+        operations = []
+        for key, entry in pending.items():
+            update = {
+                "$set": {"title": entry["title"], "capacity": entry["capacity"]},
+                "$setOnInsert": {"event_id": entry["event_id"], "organizer_id": entry["organizer_id"], "hour": entry["hour"]},
+            }
+            if entry["counts"]:
+                update["$inc"] = entry["counts"]
+            operations.append(UpdateOne({"_id": key}, update, upsert=True))
+        try:
+            await database[ANALYTICS_COLLECTION].bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Unordered, so every operation not listed as failed was applied
+            keys = list(pending)
+            self._restore({keys[error["index"]]: pending[keys[error["index"]]] for error in e.details.get("writeErrors", [])})
+            raise
+        except Exception:
+            self._restore(pending)
+            raise
+        return len(operations)
+
+event_analytics = EventAnalytics()
+
+async def run_analytics_flusher(interval: float = ANALYTICS_FLUSH_SECONDS):
+    """Periodically persist buffered analytics counters"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await event_analytics.flush(await get_database())
+        except Exception:
+            logger.exception("Analytics flush error")
+
+async def backfill_event_analytics(batch_size: int = 1000) -> dict:
+    """Seed a creation bucket for events that predate analytics, crediting current participants as joins"""
+    events = await get_collection("events")
+    collection = await get_collection(ANALYTICS_COLLECTION)
+    tracked = set(await collection.distinct("event_id", {"created": {"$gt": 0}}))
+    operations = []
+    seeded = 0
+    async for event in events.find({}, {"organizer_id": 1, "title": 1, "max_participants": 1, "participants": 1, "created_at": 1}):
+        event_id = str(event["_id"])
+        if event_id in tracked:
+            continue
+        hour = hour_bucket(event.get("created_at") or datetime.utcnow())
+        operations.append(UpdateOne(
+            {"_id": f"{event_id}:{hour:%Y%m%d%H}"},
+            {
+                "$inc": {AnalyticsField.CREATED: 1, AnalyticsField.JOINS: max(0, len(event.get("participants") or []) - 1)},
+                "$set": {"title": event.get("title", ""), "capacity": event.get("max_participants", 0)},
+                "$setOnInsert": {"event_id": event_id, "organizer_id": event["organizer_id"], "hour": hour},
+            },
+            upsert=True
+        ))
+        if len(operations) >= batch_size:
+            await collection.bulk_write(operations, ordered=False)
+            seeded += len(operations)
+            operations = []
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+        seeded += len(operations)
+    return {"events": seeded}
+
+# ============================================================================
+# SUMMARY PIPELINES
+# ============================================================================
+
+def _sums() -> dict:
+    return {field: {"$sum": f"${field}"} for field in COUNTER_FIELDS}
+
+def event_summary_pipeline(organizer_id: str, event_id: Optional[str] = None) -> List[dict]:
+    """Per-event totals and fill rate from the organizer's buckets"""
+    match = {"organizer_id": organizer_id}
+    if event_id:
+        match["event_id"] = event_id
+    return [
+        {"$match": match},
+        {"$sort": {"hour": 1}},
+        {"$group": {
+            "_id": "$event_id",
+            "title": {"$last": "$title"},
+            "capacity": {"$last": "$capacity"},
+            "first_activity": {"$first": "$hour"},
+            "last_activity": {"$last": "$hour"},
+            **_sums(),
+        }},
+        # The organizer is the first participant, counted by "created"
+        {"$set": {"participants": {"$subtract": [{"$add": ["$created", "$joins"]}, "$leaves"]}}},
+        {"$set": {"fill_rate": {"$cond": [
+            {"$gt": ["$capacity", 0]},
+            {"$divide": ["$participants", "$capacity"]},
+            0
+        ]}}},
+        {"$sort": {"last_activity": -1}},
+    ]
+
+def timeline_pipeline(organizer_id: str, event_id: str, interval: str, since: Optional[datetime] = None) -> List[dict]:
+    """Activity per hour or day for one event"""
+    match = {"organizer_id": organizer_id, "event_id": event_id}
+    if since:
+        match["hour"] = {"$gte": since}
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {"$dateToString": {"format": TIMELINE_FORMATS[interval], "date": "$hour"}},
+            "start": {"$min": "$hour"},
+            **_sums(),
+        }},
+        {"$sort": {"start": 1}},
+    ]
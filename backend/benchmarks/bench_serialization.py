@@ -0,0 +1,93 @@
+"""Microbenchmark: per-row cost of serializing a 100-event page
+
+Compares the original path (Event(**doc) per row, FastAPI re-validation
+against response_model, stdlib JSON rendering) with the fast path
+(project_rows + ORJSONResponse rendering).
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 100] [--repeat 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from models import Event, EventStatus
+from serialization import project_rows
+
+def make_event_docs(count: int) -> List[dict]:
+    """Build event documents shaped like get_documents output"""
+    now = datetime.utcnow()
+    return [
+        {
+            "id": f"{i:024x}",
+            "title": f"Evening football #{i}",
+            "title_da": f"Aftenfodbold #{i}",
+            "sport": "football",
+            "date": (now + timedelta(days=i % 14)).strftime("%Y-%m-%d"),
+            "time": "18:00",
+            "location": "Fælledparken",
+            "address": "Fælledparken, 2100 København Ø",
+            "description": "Casual 7-a-side game, all levels welcome. " * 4,
+            "description_da": "Hyggelig 7-mands kamp, alle niveauer velkomne. " * 4,
+            "max_participants": 14,
+            "skill_level": "all",
+            "price": 0.0,
+            "organizer_id": f"{i + 1:024x}",
+            "organizer_name": "Lars Andersen",
+            "current_participants": 10,
+            "participants": [f"{i + p:024x}" for p in range(10)],
+            "status": EventStatus.ACTIVE.value,
+            "tags": ["free", "outdoor", "football"],
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+async def original_path(field, docs: List[dict]) -> bytes:
+    content = await serialize_response(field=field, response_content=[Event(**doc) for doc in docs])
+    return JSONResponse(content).body
+
+async def fast_path(field, docs: List[dict]) -> bytes:
+    return ORJSONResponse(project_rows(Event, docs)).body
+
+async def measure(fn, field, docs: List[dict], repeat: int) -> float:
+    """Return the best per-row time in microseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(field, docs)
+        best = min(best, time.perf_counter() - start)
+    return best / len(docs) * 1e6
+
+async def main(rows: int, repeat: int):
+    docs = make_event_docs(rows)
+    field = create_response_field(name="Response_get_events", type_=List[Event])
+    
+    # Both paths must produce the same payload
+    assert json.loads(await original_path(field, docs)) == json.loads(await fast_path(field, docs))
+    
+    before = await measure(original_path, field, docs, repeat)
+    after = await measure(fast_path, field, docs, repeat)
+    print(f"{rows}-event page, best of {repeat}")
+    print(f"  original (model + revalidate + json): {before:8.2f} us/row  {before * rows / 1000:7.2f} ms/page")
+    print(f"  fast path (project + orjson):         {after:8.2f} us/row  {after * rows / 1000:7.2f} ms/page")
+    print(f"  speedup: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
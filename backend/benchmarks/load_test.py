@@ -0,0 +1,243 @@
+"""Load test: mixed API workload against the app running in-process
+
+Seeds a dedicated database with seed.py (10k users, 50k events, 1M messages
+at --scale 1), then drives concurrent virtual users through a weighted mix of
+list, search, detail, join/leave, chat, friends, feed and notification
+requests over an in-process ASGI transport. Reports p50/p95/p99 latency and throughput per
+endpoint; --json writes the same numbers for comparing runs.
+
+Point --mongo-url at a local mongod for realistic query plans. --mock runs
+against mongomock-motor instead, which only checks the harness itself: it
+has no indexes and rejects some operators the app uses ($geoWithin,
+$nearSphere), so those endpoints show up as errors.
+
+Usage:
+    python benchmarks/load_test.py --mongo-url mongodb://localhost:27017
+    python benchmarks/load_test.py --scale 0.1 --duration 30 --concurrency 32
+    python benchmarks/load_test.py --skip-seed --json results.json
+    python benchmarks/load_test.py --mock --scale 0.002 --duration 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import orjson
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed import CITIES, EVENTS, MESSAGES, USERS, seed_database
+
+# Request mix, relative weights
+WORKLOAD = {
+    "events.list": 25,
+    "events.search": 10,
+    "events.detail": 15,
+    "events.join": 8,
+    "events.leave": 4,
+    "messages.list": 10,
+    "messages.send": 6,
+    "friends.list": 8,
+    "friends.suggestions": 3,
+    "events.feed": 6,
+    "notifications.inbox": 5,
+}
+
+# ============================================================================
+# WORKLOAD
+# ============================================================================
+
+class VirtualUser:
+    """A seeded user with a token and the events they take part in"""
+
+    def __init__(self, user_id: str, token: str, event_ids: List[str]):
+        self.user_id = user_id
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.event_ids = event_ids
+
+async def load_virtual_users(count: int) -> List[VirtualUser]:
+    from auth import create_access_token
+    from database import get_collection
+    users = await get_collection("users")
+    events = await get_collection("events")
+    sampled = await users.aggregate([{"$sample": {"size": count}}, {"$project": {"_id": 1}}]).to_list(count)
+    virtual_users = []
+    for user in sampled:
+        user_id = str(user["_id"])
+        joined = await events.find({"participants": user_id}, {"_id": 1}).limit(20).to_list(20)
+        virtual_users.append(VirtualUser(user_id, create_access_token({"sub": user_id}), [str(e["_id"]) for e in joined]))
+    return virtual_users
+
+async def load_event_ids(limit: int = 5000) -> List[str]:
+    from database import get_collection
+    events = await get_collection("events")
+    rows = await events.find({"status": "active"}, {"_id": 1}).limit(limit).to_list(limit)
+    return [str(row["_id"]) for row in rows]
+
+def build_request(name: str, user: VirtualUser, event_ids: List[str], sports: List[str]) -> Optional[tuple]:
+    """Pick method, path, params and body for one operation"""
+    event_id = random.choice(event_ids)
+    if name == "events.list":
+        params = {"limit": 20, "view": random.choice(["full", "summary"])}
+        if random.random() < 0.5:
+            params["sport"] = random.choice(sports)
+        return "GET", "/api/events", params, None
+    if name == "events.search":
+        return "GET", "/api/events", {"search": random.choice(CITIES + sports), "limit": 20}, None
+    if name == "events.detail":
+        return "GET", f"/api/events/{event_id}", None, None
+    if name == "events.join":
+        return "POST", f"/api/events/{event_id}/join", None, None
+    if name == "events.leave":
+        return "POST", f"/api/events/{event_id}/leave", None, None
+    if name in ("messages.list", "messages.send"):
+        if not user.event_ids:
+            return None
+        own_event = random.choice(user.event_ids)
+        if name == "messages.list":
+            return "GET", f"/api/events/{own_event}/messages", None, None
+        body = {"event_id": own_event, "message": "On my way", "message_da": "På vej"}
+        return "POST", f"/api/events/{own_event}/messages", None, body
+    if name == "friends.list":
+        return "GET", "/api/friends", None, None
+    if name == "friends.suggestions":
+        return "GET", "/api/friends/suggestions", None, None
+    if name == "events.feed":
+        return "GET", "/api/events/feed", None, None
+    if name == "notifications.inbox":
+        return "GET", "/api/notifications", {"limit": 20}, None
+    raise ValueError(name)
+
+class Results:
+    """Latencies and status counts per operation"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.client_errors: Dict[str, int] = defaultdict(int)
+        self.server_errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float, status_code: int):
+        self.latencies[name].append(seconds * 1000)
+        if status_code >= 500:
+            self.server_errors[name] += 1
+        elif status_code >= 400:
+            self.client_errors[name] += 1
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+async def run_virtual_user(client, user: VirtualUser, event_ids: List[str], sports: List[str],
+                           deadline: float, warmup_until: float, results: Results):
+    names, weights = list(WORKLOAD), list(WORKLOAD.values())
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights=weights)[0]
+        request = build_request(name, user, event_ids, sports)
+        if request is None:
+            continue
+        method, path, params, body = request
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, params=params, json=body, headers=user.headers)
+            status_code = response.status_code
+        except Exception:
+            status_code = 599
+        if started >= warmup_until:
+            results.record(name, time.perf_counter() - started, status_code)
+
+def report(results: Results, elapsed: float) -> dict:
+    summary = {}
+    print(f"\n{'operation':<22}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'4xx':>7}{'5xx':>7}")
+    for name in WORKLOAD:
+        values = sorted(results.latencies.get(name, []))
+        if not values:
+            continue
+        row = {
+            "requests": len(values),
+            "throughput": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "client_errors": results.client_errors[name],
+            "server_errors": results.server_errors[name],
+        }
+        summary[name] = row
+        print(f"{name:<22}{row['requests']:>9}{row['throughput']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+              f"{row['p99_ms']:>9}{row['client_errors']:>7}{row['server_errors']:>7}")
+    total = sum(row["requests"] for row in summary.values())
+    print(f"\n{total} requests in {elapsed:.1f}s, {total / elapsed:.1f} req/s overall")
+    return summary
+
+async def main(args):
+    import httpx
+    from server import app
+    from sports_data import get_all_sports
+
+    async with app.router.lifespan_context(app):
+        if not args.skip_seed:
+            started = time.perf_counter()
+            counts = await seed_database(
+                users=int(USERS * args.scale),
+                events=int(EVENTS * args.scale),
+                messages=int(MESSAGES * args.scale),
+                drop=True
+            )
+            print(f"Seeded {', '.join(f'{v} {k}' for k, v in counts.items())} in {time.perf_counter() - started:.1f}s")
+        virtual_users = await load_virtual_users(args.concurrency)
+        event_ids = await load_event_ids()
+        if not virtual_users or not event_ids:
+            sys.exit("No users or active events to drive, seed first")
+        sports = [sport["id"] for sport in get_all_sports()]
+
+        results = Results()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            started = time.perf_counter()
+            warmup_until = started + args.warmup
+            deadline = warmup_until + args.duration
+            await asyncio.gather(*[
+                run_virtual_user(client, user, event_ids, sports, deadline, warmup_until, results)
+                for user in virtual_users
+            ])
+        summary = report(results, args.duration)
+
+    if args.json:
+        with open(args.json, "wb") as f:
+            f.write(orjson.dumps({"scale": args.scale, "concurrency": args.concurrency,
+                                  "duration": args.duration, "operations": summary}, option=orjson.OPT_INDENT_2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default="sportconnect_bench", help="database to seed, its collections are wiped")
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of a real server")
+    parser.add_argument("--scale", type=float, default=1.0, help="dataset size relative to 10k users / 50k events / 1M messages")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already in --db-name")
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds excluded from the results")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for data and request mix")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db_name
+    # Keep the dataset stable while measuring
+    os.environ.setdefault("LIFECYCLE_WORKER_ENABLED", "false")
+    # Virtual users share one address and hammer a few routes, measure the app rather than the limiter
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    if args.mock:
+        try:
+            import mongomock_motor
+        except ImportError:
+            sys.exit("--mock requires the 'mongomock-motor' package")
+        import database
+        database.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+    asyncio.run(main(args))
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import orjson
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")  # memory | redis
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "1024"))
+EVENTS_CACHE_TTL = int(os.environ.get("EVENTS_CACHE_TTL", "30"))  # seconds
+
+class InMemoryCache:
+    """Per-process LRU cache with TTL expiry and generation counters"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._counters = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+class RedisCache:
+    """Cache shared between workers, backed by any Redis-compatible server"""
+
+    def __init__(self, url: str = CACHE_REDIS_URL):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(key)
+        return orjson.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int):
+        await self.client.set(key, orjson.dumps(value), ex=ttl)
+
+    async def get_counter(self, key: str) -> int:
+        raw = await self.client.get(key)
+        return int(raw) if raw is not None else 0
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+def create_cache_backend():
+    """Create the cache backend selected by CACHE_BACKEND"""
+    if CACHE_BACKEND == "redis":
+        return RedisCache()
+    return InMemoryCache()
+
+cache_backend = create_cache_backend()
+
+def _generation_key(namespace: str) -> str:
+    return f"cache:{namespace}:generation"
+
+def build_cache_key(namespace: str, generation: int, key_parts: tuple) -> str:
+    """Build a cache key from a namespace generation and normalized key parts"""
+    digest = hashlib.sha1(json.dumps(key_parts, default=str).encode("utf-8")).hexdigest()
+    return f"cache:{namespace}:{generation}:{digest}"
+
+async def cache_lookup(namespace: str, key_parts: tuple) -> Tuple[Optional[str], Optional[Any]]:
+    """Look up a cached value, returning (key, value) - key is None if the cache is unavailable"""
+    try:
+        generation = await cache_backend.get_counter(_generation_key(namespace))
+        key = build_cache_key(namespace, generation, key_parts)
+        return key, await cache_backend.get(key)
+    except Exception as e:
+        logger.warning(f"Cache lookup failed: {e}")
+        return None, None
+
+async def cache_store(key: Optional[str], value: Any, ttl: int):
+    """Store a value under a key returned by cache_lookup"""
+    if key is None:
+        return
+    try:
+        await cache_backend.set(key, value, ttl)
+    except Exception as e:
+        logger.warning(f"Cache store failed: {e}")
+
+async def invalidate_namespace(namespace: str):
+    """Invalidate every cached entry in a namespace by bumping its generation"""
+    try:
+        await cache_backend.incr(_generation_key(namespace))
+    except Exception as e:
+        logger.warning(f"Cache invalidation failed: {e}")
@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+import hashlib
+
+def make_etag(*parts, weak: bool = True) -> str:
+    """Build an ETag from cheap version markers (ids, updated_at, counters)"""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:32]
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+def http_date(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP date"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def _strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Check If-None-Match (preferred) or If-Modified-Since against the current version"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison, as required for If-None-Match
+        candidates = {_strip_weak(tag.strip()) for tag in if_none_match.split(",")}
+        return _strip_weak(etag) in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # A "-0000" offset parses to a naive datetime, the date is still UTC
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have one second precision
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
+
+def set_validators(
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = "private, no-cache"
+):
+    """Attach ETag, Last-Modified and Cache-Control headers to a response"""
+    response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Cache-Control"] = cache_control
+    if cache_control.startswith("private"):
+        response.headers["Vary"] = "Authorization"
+
+def not_modified_response(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = "private, no-cache"
+) -> Response:
+    """Build an empty 304 response carrying the current validators"""
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified, cache_control)
+    return response
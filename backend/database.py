@@ -1,7 +1,13 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import IndexModel
+from pymongo import IndexModel, GEOSPHERE
+from pymongo.errors import OperationFailure
+from datetime import datetime
+import asyncio
 import os
-from typing import Optional
+import time
+from typing import List, Optional
+from metrics import command_listener, METRICS_ENABLED
+from profiler import query_profiler
 
 class Database:
     client: Optional[AsyncIOMotorClient] = None
@@ -15,11 +21,14 @@ async def get_database():
 
 async def connect_to_mongo():
     """Create database connection"""
-    db_instance.client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    # Command monitoring feeds per-request DB counts and timings to /metrics
+    listeners = [command_listener] if METRICS_ENABLED else []
+    db_instance.client = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=listeners)
     db_instance.database = db_instance.client[os.environ['DB_NAME']]
     
-    # Create indexes for better performance
-    await create_indexes()
+    # Create indexes for better performance (skipped when migrations run out of band)
+    if os.environ.get('SKIP_INDEX_BUILD', '').lower() not in ('1', 'true', 'yes'):
+        await create_indexes()
     print("Connected to MongoDB")
 
 async def close_mongo_connection():
@@ -28,33 +37,119 @@ async def close_mongo_connection():
         db_instance.client.close()
         print("Disconnected from MongoDB")
 
-async def create_indexes():
-    """Create database indexes for better performance"""
+# Bump INDEX_VERSION whenever INDEX_MANIFEST changes so workers rebuild on next boot
+INDEX_VERSION = 11
+MIGRATIONS_COLLECTION = "schema_migrations"
+
+INDEX_MANIFEST = {
+    "users": [
+        IndexModel("email", unique=True),
+        IndexModel("sports"),
+        IndexModel("location"),
+        IndexModel([("geo", GEOSPHERE)]),
+    ],
+    "events": [
+        IndexModel("organizer_id"),
+        IndexModel("sport"),
+        IndexModel("location"),
+        IndexModel("skill_level"),
+        IndexModel("status"),
+        # Completed and cancelled events drop out, keeping the hot listing index small
+        IndexModel(
+            [("starts_at", 1)],
+            name="starts_at_active",
+            partialFilterExpression={"status": "active"}
+        ),
+        IndexModel([("geo", GEOSPHERE), ("status", 1)]),
+        IndexModel("participants"),
+    ],
+    "messages": [
+        IndexModel("event_id"),
+        IndexModel([("event_id", 1), ("created_at", -1)]),
+    ],
+    "friendships": [
+        IndexModel([("user_id", 1), ("friend_id", 1)], unique=True),
+        IndexModel("user_id"),
+        IndexModel("friend_id"),
+        IndexModel("status"),
+    ],
+    "sports": [
+        IndexModel("sport_id", unique=True),
+    ],
+    "notifications": [
+        # The inbox pages on updated_at, grouped entries move up when they change
+        IndexModel([("user_id", 1), ("updated_at", -1), ("_id", -1)]),
+        # Unread counts and grouped upserts only touch unread entries
+        IndexModel(
+            [("user_id", 1), ("group", 1)],
+            name="user_id_group_unread",
+            partialFilterExpression={"read": False}
+        ),
+    ],
+    "leaderboards": [
+        # Top-k reads walk one bucket in score order
+        IndexModel([("board", 1), ("key", 1), ("score", -1)]),
+        # Stale bucket cleanup after the nightly rebuild
+        IndexModel("updated_at"),
+    ],
+    "event_analytics": [
+        # Organizer summaries and per-event timelines both filter by organizer first
+        IndexModel([("organizer_id", 1), ("event_id", 1), ("hour", 1)]),
+    ],
+}
+
+# Indexes removed from the manifest, dropped on the next build
+DROPPED_INDEXES = {
+    # Time filters and sorting moved to starts_at
+    "events": ["status_1_starts_at_1", "date_1", "date_1_time_1"],
+    # Inbox paging moved to updated_at
+    "notifications": ["user_id_1_created_at_-1__id_-1"],
+}
+
+# Another worker booting after the same version bump may drop an index first
+INDEX_NOT_FOUND = 27
+
+async def get_index_version() -> Optional[int]:
+    """Get the index manifest version recorded in the database"""
+    db = db_instance.database
+    record = await db[MIGRATIONS_COLLECTION].find_one({"_id": "indexes"})
+    return record["version"] if record else None
+
+async def create_indexes(force: bool = False) -> bool:
+    """Create database indexes for better performance
+    
+    Skips the build when the stored manifest version matches INDEX_VERSION.
+    Otherwise each collection's indexes are created in a single createIndexes
+    command and all collections are built concurrently. Returns True when a
+    build ran.
+    """
     db = db_instance.database
     
-    # Users collection indexes
-    await db.users.create_index("email", unique=True)
-    await db.users.create_index("sports")
-    await db.users.create_index("location")
-    
-    # Events collection indexes
-    await db.events.create_index("organizer_id")
-    await db.events.create_index("sport")
-    await db.events.create_index("date")
-    await db.events.create_index("location")
-    await db.events.create_index("skill_level")
-    await db.events.create_index("status")
-    await db.events.create_index([("date", 1), ("time", 1)])
-    
-    # Messages collection indexes
-    await db.messages.create_index("event_id")
-    await db.messages.create_index([("event_id", 1), ("created_at", -1)])
-    
-    # Friendships collection indexes
-    await db.friendships.create_index([("user_id", 1), ("friend_id", 1)], unique=True)
-    await db.friendships.create_index("user_id")
-    await db.friendships.create_index("friend_id")
-    await db.friendships.create_index("status")
+    if not force and await get_index_version() == INDEX_VERSION:
+        return False
+    
+    await asyncio.gather(*[
+        db[collection_name].create_indexes(indexes)
+        for collection_name, indexes in INDEX_MANIFEST.items()
+    ])
+    
+    for collection_name, index_names in DROPPED_INDEXES.items():
+        existing = await db[collection_name].index_information()
+        for index_name in index_names:
+            if index_name not in existing:
+                continue
+            try:
+                await db[collection_name].drop_index(index_name)
+            except OperationFailure as e:
+                if e.code != INDEX_NOT_FOUND:
+                    raise
+    
+    await db[MIGRATIONS_COLLECTION].update_one(
+        {"_id": "indexes"},
+        {"$set": {"version": INDEX_VERSION, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return True
 
 # Database utility functions
 async def get_collection(collection_name: str):
@@ -68,6 +163,12 @@ async def create_document(collection_name: str, document: dict):
     result = await collection.insert_one(document)
     return str(result.inserted_id)
 
+async def create_documents(collection_name: str, documents: list):
+    """Create several documents in a collection with one insert_many"""
+    collection = await get_collection(collection_name)
+    result = await collection.insert_many(documents)
+    return [str(inserted_id) for inserted_id in result.inserted_ids]
+
 async def get_document(collection_name: str, query: dict):
     """Get a single document from a collection"""
     collection = await get_collection(collection_name)
@@ -83,13 +184,15 @@ async def get_document(collection_name: str, query: dict):
             # If conversion fails, also try the original id field
             pass
     
+    started = time.perf_counter()
     document = await collection.find_one(query)
+    query_profiler.record("find_one", collection, started, 1 if document else 0, query=query)
     if document:
         document['id'] = str(document['_id'])
         del document['_id']
     return document
 
-async def get_documents(collection_name: str, query: dict = None, limit: int = None, skip: int = None, sort: list = None):
+async def get_documents(collection_name: str, query: dict = None, limit: int = None, skip: int = None, sort: list = None, projection: dict = None):
     """Get multiple documents from a collection"""
     collection = await get_collection(collection_name)
     
@@ -140,7 +243,7 @@ async def get_documents(collection_name: str, query: dict = None, limit: int = N
             except:
                 pass
     
-    cursor = collection.find(query or {})
+    cursor = collection.find(query or {}, projection)
     
     if sort:
         cursor = cursor.sort(sort)
@@ -149,15 +252,17 @@ async def get_documents(collection_name: str, query: dict = None, limit: int = N
     if limit:
         cursor = cursor.limit(limit)
     
+    started = time.perf_counter()
     documents = await cursor.to_list(length=limit)
+    query_profiler.record("find", collection, started, len(documents), query=query, sort=sort)
     for doc in documents:
         doc['id'] = str(doc['_id'])
         del doc['_id']
     
     return documents
 
-async def update_document(collection_name: str, query: dict, update: dict):
-    """Update a document in a collection"""
+async def update_document(collection_name: str, query: dict, update: dict, unset: Optional[List[str]] = None):
+    """Update a document in a collection, removing the `unset` fields"""
     collection = await get_collection(collection_name)
     
     # If querying by id, convert to MongoDB ObjectId if needed
@@ -171,7 +276,12 @@ async def update_document(collection_name: str, query: dict, update: dict):
             # If conversion fails, also try the original id field
             pass
     
-    result = await collection.update_one(query, {"$set": update})
+    operation = {"$set": update}
+    if unset:
+        operation["$unset"] = {field: "" for field in unset}
+    started = time.perf_counter()
+    result = await collection.update_one(query, operation)
+    query_profiler.record("update", collection, started, result.modified_count, query=query, update=operation)
     return result.modified_count > 0
 
 async def delete_document(collection_name: str, query: dict):
@@ -195,13 +305,18 @@ async def delete_document(collection_name: str, query: dict):
 async def count_documents(collection_name: str, query: dict = None):
     """Count documents in a collection"""
     collection = await get_collection(collection_name)
-    return await collection.count_documents(query or {})
+    started = time.perf_counter()
+    count = await collection.count_documents(query or {})
+    query_profiler.record("count", collection, started, count, query=query)
+    return count
 
 async def aggregate_documents(collection_name: str, pipeline: list):
     """Perform aggregation on a collection"""
     collection = await get_collection(collection_name)
+    started = time.perf_counter()
     cursor = collection.aggregate(pipeline)
     documents = await cursor.to_list(length=None)
+    query_profiler.record("aggregate", collection, started, len(documents), pipeline=pipeline)
     for doc in documents:
         if '_id' in doc:
             doc['id'] = str(doc['_id'])
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import AsyncIterator, Iterable, List, Optional, Set, Tuple
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# "local" publishes from the request handlers of this worker, "changestream" tails
+# the events collection so every worker sees writes from all workers (needs a replica set)
+EVENT_STREAM_SOURCE = os.environ.get("EVENT_STREAM_SOURCE", "local")
+EVENT_STREAM_MAX_PENDING = int(os.environ.get("EVENT_STREAM_MAX_PENDING", "256"))
+EVENT_STREAM_COALESCE_SECONDS = float(os.environ.get("EVENT_STREAM_COALESCE_SECONDS", "0.25"))
+EVENT_STREAM_HEARTBEAT_SECONDS = float(os.environ.get("EVENT_STREAM_HEARTBEAT_SECONDS", "15"))
+
+DELTA_FIELDS = ("sport", "current_participants", "max_participants", "status")
+
+class StreamSubscriber:
+    """One connected client: a bounded buffer of pending deltas, coalesced per event"""
+
+    def __init__(self, sports: Optional[Set[str]] = None, max_pending: int = EVENT_STREAM_MAX_PENDING):
+        self.sports = sports
+        self.max_pending = max_pending
+        self.pending: "OrderedDict[str, dict]" = OrderedDict()
+        self.overflowed = False
+        self._wakeup = asyncio.Event()
+
+    def offer(self, delta: dict):
+        if self.sports and delta.get("sport") not in self.sports:
+            return
+
+        existing = self.pending.get(delta["id"])
+        if existing:
+            # Newer state wins, but a client that never saw the event must still learn it was created
+            merged_type = "created" if existing["type"] == "created" else delta["type"]
+            existing.update(delta, type=merged_type)
+        else:
+            if len(self.pending) >= self.max_pending:
+                # Slow client, drop the oldest delta and ask it to resync
+                self.pending.popitem(last=False)
+                self.overflowed = True
+            self.pending[delta["id"]] = dict(delta)
+        self._wakeup.set()
+
+    async def drain(self, timeout: float) -> Optional[Tuple[List[dict], bool]]:
+        """Wait for deltas, returning (deltas, overflowed) or None on timeout"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        # Let rapid updates to the same event collapse into one delta
+        await asyncio.sleep(EVENT_STREAM_COALESCE_SECONDS)
+        self._wakeup.clear()
+        deltas = list(self.pending.values())
+        self.pending.clear()
+        overflowed, self.overflowed = self.overflowed, False
+        return deltas, overflowed
+
+class EventBroker:
+    """Fans event deltas out to connected stream subscribers"""
+
+    def __init__(self):
+        self.subscribers: Set[StreamSubscriber] = set()
+
+    def subscribe(self, sports: Optional[Set[str]] = None) -> StreamSubscriber:
+        subscriber = StreamSubscriber(sports)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: StreamSubscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, delta: dict):
+        for subscriber in self.subscribers:
+            subscriber.offer(delta)
+
+event_broker = EventBroker()
+
+def make_delta(change_type: str, event_id: str, event: dict) -> dict:
+    """Build a compact delta from (a subset of) an event document"""
+    delta = {"type": change_type, "id": event_id}
+    for field in DELTA_FIELDS:
+        if field in event:
+            value = event[field]
+            delta[field] = getattr(value, "value", value)
+    return delta
+
+def publish_event_change(change_type: str, event_id: str, event: dict):
+    """Publish an event write made by this worker"""
+    if EVENT_STREAM_SOURCE == "local":
+        event_broker.publish(make_delta(change_type, event_id, event))
+
+def publish_event_changes(change_type: str, events: Iterable[dict]):
+    """Publish several event writes (documents must carry "_id")"""
+    for event in events:
+        publish_event_change(change_type, str(event["_id"]), event)
+
+async def watch_event_changes():
+    """Feed the broker from a MongoDB change stream on the events collection"""
+    from database import get_collection
+
+    pipeline = [
+        {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+        {"$project": {"operationType": 1, "documentKey": 1, **{f"fullDocument.{f}": 1 for f in DELTA_FIELDS}}},
+    ]
+    while True:
+        try:
+            collection = await get_collection("events")
+            async with collection.watch(pipeline, full_document="updateLookup") as stream:
+                async for change in stream:
+                    document = change.get("fullDocument")
+                    if not document:
+                        continue
+                    change_type = "created" if change["operationType"] == "insert" else "updated"
+                    event_broker.publish(make_delta(change_type, str(change["documentKey"]["_id"]), document))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Event change stream error")
+            await asyncio.sleep(5)
+
+def format_sse(event: str, data) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode('utf-8')}\n\n"
+
+async def stream_deltas(subscriber: StreamSubscriber, is_disconnected) -> AsyncIterator[str]:
+    """Yield SSE frames for a subscriber until the client disconnects"""
+    try:
+        yield ": connected\n\n"
+        while not await is_disconnected():
+            batch = await subscriber.drain(EVENT_STREAM_HEARTBEAT_SECONDS)
+            if batch is None:
+                yield ": keepalive\n\n"
+                continue
+            deltas, overflowed = batch
+            if overflowed:
+                yield format_sse("resync", {})
+            for delta in deltas:
+                yield format_sse(delta.pop("type"), delta)
+    finally:
+        event_broker.unsubscribe(subscriber)
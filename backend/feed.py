@@ -0,0 +1,213 @@
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from database import get_document, get_documents
+from geo import distance_km, EARTH_RADIUS_KM
+from models import EventStatus, EventSummary, SkillLevel
+
+logger = logging.getLogger(__name__)
+
+FEED_CACHE_TTL = int(os.environ.get("FEED_CACHE_TTL", "600"))  # seconds
+FEED_CACHE_MAX_USERS = int(os.environ.get("FEED_CACHE_MAX_USERS", "5000"))
+FEED_CANDIDATE_POOL = int(os.environ.get("FEED_CANDIDATE_POOL", "300"))
+FEED_RADIUS_KM = float(os.environ.get("FEED_RADIUS_KM", "30"))
+
+# Ranking weights
+SPORT_WEIGHT = 3.0
+SKILL_WEIGHT = 1.0
+FRIEND_WEIGHT = 1.5  # per friend going, capped at MAX_FRIENDS_COUNTED
+MAX_FRIENDS_COUNTED = 3
+PROXIMITY_WEIGHT = 2.0  # decays linearly to 0 at FEED_RADIUS_KM
+SOON_WEIGHT = 0.5  # decays over SOON_HALF_LIFE_DAYS
+SOON_HALF_LIFE_DAYS = 7
+
+CANDIDATE_FIELDS = list(EventSummary.model_fields) + ["geo", "participants"]
+
+class FeedState:
+    """Cached ranking inputs for one user"""
+
+    def __init__(self, user: dict, friend_ids: Set[str]):
+        self.user_id = user["id"]
+        self.sports = set(user.get("sports") or [])
+        self.skill_level = user.get("skill_level")
+        self.geo = user.get("geo")
+        self.friend_ids = friend_ids
+        self.candidates: Dict[str, dict] = {}
+        self.built_at = time.monotonic()
+
+    def add_candidate(self, event: dict):
+        participants = event.get("participants") or []
+        candidate = {field: event[field] for field in EventSummary.model_fields if field in event}
+        candidate["geo"] = event.get("geo")
+        candidate["participating"] = self.user_id in participants
+        candidate["friends_going"] = len(self.friend_ids.intersection(participants))
+        self.candidates[candidate["id"]] = candidate
+
+    def matches(self, event: dict) -> bool:
+        """Whether a new event belongs in the pool, by the same branches build_feed_state queries"""
+        if event.get("status") != EventStatus.ACTIVE.value:
+            return False
+        starts_at = event.get("starts_at")
+        if starts_at and starts_at.replace(tzinfo=None) < datetime.utcnow():
+            return False
+        if not (self.sports or self.friend_ids or self.geo):
+            return True
+        if event.get("sport") in self.sports or self.friend_ids.intersection(event.get("participants") or []):
+            return True
+        return bool(self.geo and event.get("geo") and distance_km(self.geo, event["geo"]) <= FEED_RADIUS_KM)
+
+    def trim(self, pool_size: int):
+        """Keep the soonest candidates, as the pool query's sort and limit would"""
+        while len(self.candidates) > pool_size:
+            latest = max(self.candidates.values(), key=lambda candidate: (candidate.get("starts_at") or datetime.max).replace(tzinfo=None))
+            del self.candidates[latest["id"]]
+
+    def score(self, candidate: dict, now: datetime) -> Optional[dict]:
+        """Score a candidate, None if it should not be shown"""
+        if candidate["participating"] or candidate.get("status") != EventStatus.ACTIVE.value:
+            return None
+        if candidate["current_participants"] >= candidate["max_participants"]:
+            return None
+        starts_at = candidate.get("starts_at")
+        if starts_at and starts_at.replace(tzinfo=None) < now:
+            return None
+
+        score = 0.0
+        if candidate["sport"] in self.sports:
+            score += SPORT_WEIGHT
+        if candidate["skill_level"] in (SkillLevel.ALL.value, self.skill_level):
+            score += SKILL_WEIGHT
+        score += FRIEND_WEIGHT * min(candidate["friends_going"], MAX_FRIENDS_COUNTED)
+
+        distance = None
+        if self.geo and candidate.get("geo"):
+            distance = distance_km(self.geo, candidate["geo"])
+            score += PROXIMITY_WEIGHT * max(0.0, 1 - distance / FEED_RADIUS_KM)
+        if starts_at:
+            days_away = (starts_at.replace(tzinfo=None) - now).total_seconds() / 86400
+            score += SOON_WEIGHT * math.pow(0.5, days_away / SOON_HALF_LIFE_DAYS)
+
+        row = {field: candidate[field] for field in EventSummary.model_fields if field in candidate}
+        row["score"] = round(score, 3)
+        row["friends_going"] = candidate["friends_going"]
+        row["distance_km"] = round(distance, 1) if distance is not None else None
+        return row
+
+class FeedIndex:
+    """Per-user candidate cache, kept fresh by event writes instead of re-querying"""
+
+    def __init__(self, max_users: int = FEED_CACHE_MAX_USERS, ttl: int = FEED_CACHE_TTL, pool_size: int = FEED_CANDIDATE_POOL):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self.states: "OrderedDict[str, FeedState]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[FeedState]:
+        state = self.states.get(user_id)
+        if state is None:
+            return None
+        if time.monotonic() - state.built_at > self.ttl:
+            del self.states[user_id]
+            return None
+        self.states.move_to_end(user_id)
+        return state
+
+    def put(self, state: FeedState):
+        self.states[state.user_id] = state
+        self.states.move_to_end(state.user_id)
+        while len(self.states) > self.max_users:
+            self.states.popitem(last=False)
+
+    def invalidate(self, *user_ids: str):
+        for user_id in user_ids:
+            self.states.pop(user_id, None)
+
+    def on_event_created(self, event_id: str, event: dict):
+        event = {**event, "id": event_id}
+        for state in self.states.values():
+            if state.matches(event):
+                state.add_candidate(event)
+                state.trim(self.pool_size)
+
+    def on_participation_changed(self, event: dict, user_id: str, joined: bool):
+        """Apply a join/leave, event must carry the updated participants"""
+        for state in self.states.values():
+            candidate = state.candidates.get(event["id"])
+            if candidate is None:
+                # A friend joining pulls the event into the pool
+                if joined and user_id in state.friend_ids:
+                    state.add_candidate(event)
+                    state.trim(self.pool_size)
+                continue
+            candidate["current_participants"] = event["current_participants"]
+            if user_id == state.user_id:
+                candidate["participating"] = joined
+            elif user_id in state.friend_ids:
+                candidate["friends_going"] = max(0, candidate["friends_going"] + (1 if joined else -1))
+
+    def on_event_updated(self, event: dict):
+        for state in self.states.values():
+            if event["id"] in state.candidates:
+                state.add_candidate(event)
+
+    def on_events_closed(self, event_ids: List[str]):
+        for state in self.states.values():
+            for event_id in event_ids:
+                state.candidates.pop(event_id, None)
+
+feed_index = FeedIndex()
+
+async def get_friend_ids(user_id: str) -> Set[str]:
+    """Get the ids of a user's accepted friends"""
+    friendships = await get_documents("friendships", {
+        "$or": [
+            {"user_id": user_id, "status": "accepted"},
+            {"friend_id": user_id, "status": "accepted"}
+        ]
+    }, projection={"user_id": 1, "friend_id": 1})
+    return {f["friend_id"] if f["user_id"] == user_id else f["user_id"] for f in friendships}
+
+async def build_feed_state(user_id: str) -> FeedState:
+    """Load a user's upcoming candidate events in one query"""
+    user = await get_document("users", {"id": user_id})
+    friend_ids = await get_friend_ids(user["id"])
+    state = FeedState(user, friend_ids)
+
+    # Every branch is index backed: sport, participants (multikey) and geo (2dsphere)
+    branches = []
+    if state.sports:
+        branches.append({"sport": {"$in": list(state.sports)}})
+    if friend_ids:
+        branches.append({"participants": {"$in": list(friend_ids)}})
+    if state.geo:
+        branches.append({"geo": {"$geoWithin": {
+            "$centerSphere": [state.geo["coordinates"], FEED_RADIUS_KM / EARTH_RADIUS_KM]
+        }}})
+
+    query = {"status": EventStatus.ACTIVE.value, "starts_at": {"$gte": datetime.utcnow()}}
+    if branches:
+        query["$or"] = branches
+    events = await get_documents(
+        "events",
+        query,
+        limit=feed_index.pool_size,
+        sort=[("starts_at", 1)],
+        projection={field: 1 for field in CANDIDATE_FIELDS if field != "id"}
+    )
+    for event in events:
+        state.add_candidate(event)
+
+    feed_index.put(state)
+    return state
+
+async def get_feed(user_id: str, limit: int) -> List[dict]:
+    """Rank cached candidates for a user, building the cache on a miss"""
+    state = feed_index.get(user_id) or await build_feed_state(user_id)
+    now = datetime.utcnow()
+    rows = [row for row in (state.score(c, now) for c in state.candidates.values()) if row]
+    rows.sort(key=lambda row: row["score"], reverse=True)
+    return rows[:limit]
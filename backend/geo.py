@@ -0,0 +1,156 @@
+import math
+import re
+from typing import Dict, Optional, Tuple
+from pymongo import UpdateOne
+
+# Offline gazetteer of Danish cities and Copenhagen districts: normalized name -> (longitude, latitude)
+DANISH_GAZETTEER: Dict[str, Tuple[float, float]] = {
+    "koebenhavn": (12.5683, 55.6761),
+    "frederiksberg": (12.5340, 55.6786),
+    "noerrebro": (12.5494, 55.6945),
+    "oesterbro": (12.5777, 55.7089),
+    "vesterbro": (12.5454, 55.6681),
+    "amager": (12.6048, 55.6414),
+    "valby": (12.5036, 55.6618),
+    "hellerup": (12.5700, 55.7310),
+    "gentofte": (12.5497, 55.7506),
+    "lyngby": (12.5035, 55.7704),
+    "hvidovre": (12.4752, 55.6572),
+    "ballerup": (12.3634, 55.7317),
+    "taastrup": (12.2987, 55.6517),
+    "aarhus": (10.2039, 56.1629),
+    "odense": (10.4024, 55.4038),
+    "aalborg": (9.9217, 57.0488),
+    "esbjerg": (8.4519, 55.4765),
+    "randers": (10.0364, 56.4607),
+    "kolding": (9.4722, 55.4904),
+    "horsens": (9.8504, 55.8607),
+    "vejle": (9.5357, 55.7093),
+    "roskilde": (12.0803, 55.6415),
+    "herning": (8.9734, 56.1393),
+    "helsingoer": (12.5916, 56.0361),
+    "silkeborg": (9.5452, 56.1697),
+    "naestved": (11.7609, 55.2299),
+    "fredericia": (9.7526, 55.5656),
+    "viborg": (9.4018, 56.4532),
+    "koege": (12.1825, 55.4580),
+    "holstebro": (8.6165, 56.3601),
+    "slagelse": (11.3531, 55.4028),
+    "hilleroed": (12.3172, 55.9267),
+    "soenderborg": (9.7924, 54.9138),
+    "svendborg": (10.6077, 55.0598),
+    "hjoerring": (9.9823, 57.4642),
+    "holbaek": (11.7151, 55.7174),
+    "frederikshavn": (10.5366, 57.4407),
+    "ringsted": (11.7897, 55.4427),
+    "haderslev": (9.4889, 55.2530),
+    "skive": (9.0253, 56.5670),
+    "nyborg": (10.8101, 55.3127),
+    "roenne": (14.7069, 55.1009),
+}
+
+# Alternative spellings mapped to gazetteer names
+GAZETTEER_ALIASES = {
+    "copenhagen": "koebenhavn",
+    "kobenhavn": "koebenhavn",
+    "cph": "koebenhavn",
+    "norrebro": "noerrebro",
+    "osterbro": "oesterbro",
+    "arhus": "aarhus",
+    "elsinore": "helsingoer",
+    "helsingor": "helsingoer",
+    "nastved": "naestved",
+    "koge": "koege",
+    "hillerod": "hilleroed",
+    "sonderborg": "soenderborg",
+    "hjorring": "hjoerring",
+    "holbak": "holbaek",
+    "ronne": "roenne",
+}
+
+MAX_RADIUS_KM = 500
+EARTH_RADIUS_KM = 6371.0
+
+def normalize_place_name(text: str) -> str:
+    """Lowercase and transliterate Danish letters (æ -> ae, ø -> oe, å -> aa)"""
+    text = text.lower()
+    for letter, replacement in (("æ", "ae"), ("ø", "oe"), ("å", "aa"), ("é", "e")):
+        text = text.replace(letter, replacement)
+    return text
+
+def make_point(longitude: float, latitude: float) -> dict:
+    """Build a GeoJSON point"""
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+def geocode(text: Optional[str]) -> Optional[dict]:
+    """Resolve free text to a GeoJSON point using the first known place name in it"""
+    if not text:
+        return None
+    for word in re.findall(r"[a-z]+", normalize_place_name(text)):
+        name = GAZETTEER_ALIASES.get(word, word)
+        if name in DANISH_GAZETTEER:
+            return make_point(*DANISH_GAZETTEER[name])
+    return None
+
+def geocode_event(location: str, address: str) -> Optional[dict]:
+    """Geocode an event, preferring the address over the venue name"""
+    return geocode(address) or geocode(location)
+
+def parse_near(near: str) -> Optional[dict]:
+    """Parse a near filter given as "lat,lng" or a place name"""
+    parts = near.split(",")
+    if len(parts) == 2:
+        try:
+            latitude, longitude = float(parts[0]), float(parts[1])
+        except ValueError:
+            pass
+        else:
+            if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+                return make_point(longitude, latitude)
+            return None
+    return geocode(near)
+
+def near_query(point: dict, radius_km: float) -> dict:
+    """Build a $nearSphere filter, results come back sorted by distance"""
+    return {
+        "$nearSphere": {
+            "$geometry": point,
+            "$maxDistance": radius_km * 1000
+        }
+    }
+
+def distance_km(a: dict, b: dict) -> float:
+    """Great-circle distance between two GeoJSON points"""
+    lon1, lat1 = map(math.radians, a["coordinates"])
+    lon2, lat2 = map(math.radians, b["coordinates"])
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+async def backfill_geo(batch_size: int = 1000) -> dict:
+    """Geocode events and users that were stored before coordinates existed"""
+    from database import get_collection
+
+    updated = {}
+    for collection_name, resolve in (
+        ("events", lambda doc: geocode_event(doc.get("location", ""), doc.get("address", ""))),
+        ("users", lambda doc: geocode(doc.get("location"))),
+    ):
+        collection = await get_collection(collection_name)
+        cursor = collection.find(
+            {"geo": {"$exists": False}},
+            {"location": 1, "address": 1}
+        )
+        operations = []
+        updated[collection_name] = 0
+        async for doc in cursor:
+            point = resolve(doc)
+            if point:
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"geo": point}}))
+            if len(operations) >= batch_size:
+                await collection.bulk_write(operations, ordered=False)
+                updated[collection_name] += len(operations)
+                operations = []
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+            updated[collection_name] += len(operations)
+    return updated
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from database import get_collection
+from models import EventStatus
+from user_stats import user_filter
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_COLLECTION = "leaderboards"
+LEADERBOARD_REBUILD_ENABLED = os.environ.get("LEADERBOARD_REBUILD_ENABLED", "true").lower() in ("1", "true", "yes")
+# UTC hour of the nightly rebuild
+LEADERBOARD_REBUILD_HOUR = int(os.environ.get("LEADERBOARD_REBUILD_HOUR", "3"))
+
+# Boards and the bucket key each one is partitioned by
+BOARDS = ("sport", "location", "week")
+
+def week_key(starts_at: datetime) -> str:
+    """ISO week bucket, same format as $dateToString %G-W%V"""
+    year, week, _ = starts_at.isocalendar()
+    return f"{year}-W{week:02d}"
+
+def current_week() -> str:
+    return week_key(datetime.utcnow())
+
+def bucket_id(board: str, key: str, user_id: str) -> str:
+    return f"{board}:{key}:{user_id}"
+
+def bucket_keys(event: dict, location: Optional[str]) -> List[Tuple[str, str]]:
+    """The (board, key) buckets an event's participants score in"""
+    keys = [("sport", event["sport"])]
+    if location:
+        keys.append(("location", location))
+    if event.get("starts_at"):
+        keys.append(("week", week_key(event["starts_at"])))
+    return keys
+
+async def add_scores(user_id: str, user_name: str, scores: Dict[Tuple[str, str], int]):
+    """Upsert-increment a user's score in each (board, key) bucket"""
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"_id": bucket_id(board, key, user_id)},
+            {
+                "$inc": {"score": score},
+                "$set": {"board": board, "key": key, "user_id": user_id, "user_name": user_name, "updated_at": now}
+            },
+            upsert=True
+        )
+        for (board, key), score in scores.items()
+    ]
+    if operations:
+        collection = await get_collection(LEADERBOARD_COLLECTION)
+        await collection.bulk_write(operations, ordered=False)
+
+async def record_activity(event: dict, user_id: str, delta: int = 1, name: Optional[str] = None,
+                          location: Optional[str] = None):
+    """Adjust a participant's score in every bucket the event falls into"""
+    if name is None:
+        users = await get_collection("users")
+        user = await users.find_one(user_filter(user_id), {"name": 1, "location": 1}) or {}
+        name, location = user.get("name", ""), user.get("location")
+    await add_scores(user_id, name, {bucket: delta for bucket in bucket_keys(event, location)})
+
+async def record_events_activity(events: List[dict], user_id: str, name: str, location: Optional[str]):
+    """Credit an organizer for newly created events, they are listed as the first participant"""
+    scores: Dict[Tuple[str, str], int] = {}
+    for event in events:
+        for bucket in bucket_keys(event, location):
+            scores[bucket] = scores.get(bucket, 0) + 1
+    await add_scores(user_id, name, scores)
+
+async def get_leaderboard(board: str, key: str, limit: int = 10) -> List[dict]:
+    """Top `limit` users of one bucket, served by the (board, key, score) index"""
+    collection = await get_collection(LEADERBOARD_COLLECTION)
+    cursor = collection.find(
+        {"board": board, "key": key, "score": {"$gt": 0}},
+        {"_id": 0, "user_id": 1, "user_name": 1, "score": 1}
+    ).sort("score", -1).limit(limit)
+    return await cursor.to_list(length=limit)
+
+# ============================================================================
+# NIGHTLY REBUILD
+# ============================================================================
+
+def rebuild_pipeline(board: str, rebuilt_at: datetime) -> List[dict]:
+    """Recount one board from the events collection and $merge it over the live buckets"""
+    if board == "sport":
+        key = "$sport"
+    elif board == "week":
+        key = {"$dateToString": {"format": "%G-W%V", "date": "$starts_at"}}
+    else:
+        key = None  # the user's location, known after the lookup
+
+    match = {"status": {"$ne": EventStatus.CANCELLED.value}}
+    if board == "week":
+        match["starts_at"] = {"$type": "date"}
+
+    pipeline = [
+        {"$match": match},
+        {"$project": {"participants": 1, "sport": 1, "starts_at": 1}},
+        {"$unwind": "$participants"},
+        {"$group": {"_id": {"key": key, "user_id": "$participants"}, "score": {"$sum": 1}}},
+        # Participants are user ObjectId strings, a malformed one must not abort the whole $merge
+        {"$set": {"user_oid": {"$convert": {
+            "input": "$_id.user_id", "to": "objectId", "onError": None, "onNull": None
+        }}}},
+        {"$match": {"user_oid": {"$ne": None}}},
+        {"$lookup": {
+            "from": "users",
+            "let": {"user_oid": "$user_oid"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$user_oid"]}}},
+                {"$project": {"name": 1, "location": 1}},
+            ],
+            "as": "user",
+        }},
+        {"$unwind": "$user"},
+    ]
+    if board == "location":
+        pipeline += [
+            {"$match": {"user.location": {"$nin": [None, ""]}}},
+            {"$set": {"_id.key": "$user.location"}},
+        ]
+    pipeline += [
+        {"$project": {
+            "_id": {"$concat": [board, ":", "$_id.key", ":", "$_id.user_id"]},
+            "board": board,
+            "key": "$_id.key",
+            "user_id": "$_id.user_id",
+            "user_name": "$user.name",
+            "score": 1,
+            "updated_at": rebuilt_at,
+        }},
+        {"$merge": {"into": LEADERBOARD_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+    return pipeline
+
+async def rebuild_leaderboards() -> dict:
+    """Recompute every board, correcting drift from edits, cancellations and profile changes"""
+    rebuilt_at = datetime.utcnow()
+    events = await get_collection("events")
+    for board in BOARDS:
+        await events.aggregate(rebuild_pipeline(board, rebuilt_at), allowDiskUse=True).to_list(length=None)
+
+    # Buckets neither rebuilt nor touched since the run started no longer have any activity
+    collection = await get_collection(LEADERBOARD_COLLECTION)
+    result = await collection.delete_many({"updated_at": {"$lt": rebuilt_at}})
+    total = await collection.estimated_document_count()
+    return {"buckets": total, "removed": result.deleted_count}
+
+def seconds_until(hour: int, now: Optional[datetime] = None) -> float:
+    now = now or datetime.utcnow()
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+async def claim_nightly_run(day: str) -> bool:
+    """Let exactly one worker run the rebuild for a given day"""
+    runs = await get_collection("leaderboard_runs")
+    try:
+        await runs.insert_one({"_id": day, "started_at": datetime.utcnow()})
+        return True
+    except DuplicateKeyError:
+        return False
+
+async def run_leaderboard_rebuilder(hour: int = LEADERBOARD_REBUILD_HOUR):
+    """Rebuild the leaderboards once a night until cancelled"""
+    while True:
+        await asyncio.sleep(seconds_until(hour))
+        try:
+            if await claim_nightly_run(datetime.utcnow().strftime("%Y-%m-%d")):
+                counts = await rebuild_leaderboards()
+                logger.info(f"Leaderboards rebuilt: {counts}")
+        except Exception:
+            logger.exception("Leaderboard rebuild error")
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from database import get_collection
+from cache import invalidate_namespace
+from event_stream import publish_event_changes
+from feed import feed_index
+from models import EventStatus
+
+logger = logging.getLogger(__name__)
+
+LIFECYCLE_WORKER_ENABLED = os.environ.get("LIFECYCLE_WORKER_ENABLED", "true").lower() in ("1", "true", "yes")
+LIFECYCLE_INTERVAL_SECONDS = int(os.environ.get("LIFECYCLE_INTERVAL_SECONDS", "300"))
+LIFECYCLE_BATCH_SIZE = int(os.environ.get("LIFECYCLE_BATCH_SIZE", "500"))
+# Events have no end time, treat them as finished this long after they start
+EVENT_COMPLETION_GRACE_HOURS = int(os.environ.get("EVENT_COMPLETION_GRACE_HOURS", "3"))
+
+async def complete_past_events(batch_size: int = LIFECYCLE_BATCH_SIZE) -> int:
+    """Mark active events that have finished as completed, one batch at a time"""
+    collection = await get_collection("events")
+    cutoff = datetime.utcnow() - timedelta(hours=EVENT_COMPLETION_GRACE_HOURS)
+    query = {"status": EventStatus.ACTIVE.value, "starts_at": {"$lt": cutoff}}
+    
+    completed = 0
+    while True:
+        # Served by the partial starts_at index on active events
+        batch = await collection.find(query, {"_id": 1, "sport": 1}).sort("starts_at", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        
+        result = await collection.update_many(
+            {"_id": {"$in": [doc["_id"] for doc in batch]}, "status": EventStatus.ACTIVE.value},
+            {"$set": {"status": EventStatus.COMPLETED.value, "updated_at": datetime.utcnow()}}
+        )
+        completed += result.modified_count
+        publish_event_changes("updated", [{**doc, "status": EventStatus.COMPLETED.value} for doc in batch])
+        feed_index.on_events_closed([str(doc["_id"]) for doc in batch])
+        if len(batch) < batch_size:
+            break
+    
+    if completed:
+        await invalidate_namespace("events")
+        logger.info(f"Lifecycle worker completed {completed} past events")
+    return completed
+
+async def run_lifecycle_worker(interval: int = LIFECYCLE_INTERVAL_SECONDS):
+    """Periodically complete past events until cancelled"""
+    while True:
+        try:
+            await complete_past_events()
+        except Exception:
+            logger.exception("Lifecycle worker error")
+        await asyncio.sleep(interval)
@@ -0,0 +1,150 @@
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+import orjson
+
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")  # text | json
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# Fraction of INFO and DEBUG records kept, warnings and errors are never sampled
+LOG_INFO_SAMPLE_RATE = float(os.environ.get("LOG_INFO_SAMPLE_RATE", "1.0"))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has, anything else was passed via extra= and is emitted as a field
+STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+# Uvicorn installs its own synchronous handlers on these, they are rerouted through the queue
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+def extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in STANDARD_ATTRIBUTES and not key.startswith("_")}
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the request id and drop a share of low-severity records"""
+
+    def __init__(self, sample_rate: float = LOG_INFO_SAMPLE_RATE):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """Hand records to the listener thread, rendering message and traceback in the caller"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Args and exc_info may not survive the thread hop, keep their rendered text instead
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        entry.update(extra_fields(record))
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode("utf-8")
+
+class TextFormatter(logging.Formatter):
+    """TEXT_FORMAT followed by the extra= fields as key=value pairs"""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        fields = extra_fields(record)
+        message = super().formatMessage(record)
+        if not fields:
+            return message
+        return message + " " + " ".join(f"{key}={value}" for key, value in fields.items())
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging():
+    """Route all logging through a queue drained by a background thread"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JSONFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = StructuredQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(LOG_LEVEL)
+    # Access logs are the busiest, they get the same queue, format, request id and sampling
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging():
+    """Flush queued records, called on shutdown"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        # Nothing drains the queue anymore, later records are written directly
+        logging.getLogger().handlers = list(_listener.handlers)
+        _listener = None
+
+class RequestIdMiddleware:
+    """ASGI middleware binding a request id to the logging context and echoing it back"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == REQUEST_ID_HEADER.encode("latin-1"):
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(REQUEST_ID_HEADER.encode("latin-1"), request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,201 @@
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from pymongo import monitoring
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+DB_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Driver chatter that is not part of serving a request
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "buildinfo", "buildInfo", "endSessions",
+                    "saslStart", "saslContinue", "getnonce", "authenticate"}
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, safe to observe from driver threads"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            base = format_labels(self.labelnames, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{format_labels(self.labelnames + ("le",), labels + (repr(float(bound)),))} {cumulative}')
+            lines.append(f'{self.name}_bucket{format_labels(self.labelnames + ("le",), labels + ("+Inf",))} {count}')
+            lines.append(f"{self.name}_sum{base} {total}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        lines.extend(f"{self.name}{format_labels(self.labelnames, labels)} {value}" for labels, value in snapshot)
+        return lines
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route", "status"), LATENCY_BUCKETS)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size by route", ("method", "route"), SIZE_BUCKETS)
+HTTP_REQUEST_DB_OPERATIONS = Histogram(
+    "http_request_db_operations", "MongoDB commands issued per request", ("method", "route"), COUNT_BUCKETS)
+HTTP_REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Time spent in MongoDB per request", ("method", "route"), LATENCY_BUCKETS)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ("command", "collection"), DB_LATENCY_BUCKETS)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands", ("command", "collection"))
+
+REGISTRY = (HTTP_REQUEST_DURATION, HTTP_RESPONSE_SIZE, HTTP_REQUEST_DB_OPERATIONS,
+            HTTP_REQUEST_DB_DURATION, MONGO_COMMAND_DURATION, MONGO_COMMAND_FAILURES)
+
+def render_metrics() -> str:
+    """Prometheus text exposition of every registered metric"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# ============================================================================
+# PER-REQUEST DATABASE ACCOUNTING
+# ============================================================================
+
+class RequestDBStats:
+    """Mongo commands issued while serving one request"""
+
+    def __init__(self):
+        self.operations = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self.operations += 1
+            self.seconds += seconds
+
+# Motor copies the context into its executor threads, so listener callbacks see the request's stats
+current_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("current_db_stats", default=None)
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every driver command and charges it to the current request"""
+
+    def __init__(self):
+        self._collections: Dict[Tuple[int, int], str] = {}
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        # getMore names the cursor id in the command field and the collection separately
+        key = "collection" if event.command_name == "getMore" else event.command_name
+        collection = event.command.get(key)
+        self._collections[(event.request_id, event.operation_id)] = collection if isinstance(collection, str) else ""
+
+    def _finish(self, event) -> Optional[Tuple[str, float]]:
+        collection = self._collections.pop((event.request_id, event.operation_id), None)
+        if collection is None:
+            return None
+        seconds = event.duration_micros / 1e6
+        stats = current_db_stats.get()
+        if stats is not None:
+            stats.add(seconds)
+        return collection, seconds
+
+    def succeeded(self, event):
+        finished = self._finish(event)
+        if finished:
+            MONGO_COMMAND_DURATION.observe(finished[1], event.command_name, finished[0])
+
+    def failed(self, event):
+        finished = self._finish(event)
+        if finished:
+            MONGO_COMMAND_DURATION.observe(finished[1], event.command_name, finished[0])
+            MONGO_COMMAND_FAILURES.inc(event.command_name, finished[0])
+
+command_listener = MongoCommandListener()
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, response size and Mongo usage per route"""
+
+    def __init__(self, app, excluded_paths: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.excluded_paths = excluded_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDBStats()
+        token = current_db_stats.set(stats)
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_db_stats.reset(token)
+            # Label by route template to keep cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.observe(elapsed, method, route_path, str(status_code))
+            HTTP_RESPONSE_SIZE.observe(size, method, route_path)
+            HTTP_REQUEST_DB_OPERATIONS.observe(stats.operations, method, route_path)
+            HTTP_REQUEST_DB_DURATION.observe(stats.seconds, method, route_path)
@@ -0,0 +1,100 @@
+"""Run database migrations out of band
+
+Usage:
+    python migrate.py                       # build indexes if the manifest version changed
+    python migrate.py --force               # rebuild indexes regardless of stored version
+    python migrate.py --status              # print stored and expected index versions
+    python migrate.py --backfill geo        # run a data backfill (repeatable, see BACKFILLS)
+"""
+import argparse
+import asyncio
+import sys
+import os
+from pathlib import Path
+from typing import List
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# Connect without the implicit startup build, this script owns the migration
+os.environ['SKIP_INDEX_BUILD'] = '1'
+
+import database
+from database import connect_to_mongo, close_mongo_connection, create_indexes, get_index_version, get_collection
+from geo import backfill_geo
+from user_stats import backfill_user_stats
+from leaderboards import rebuild_leaderboards
+from analytics import backfill_event_analytics
+from notifications import backfill_updated_at
+from utils import format_datetime_for_db
+
+async def backfill_starts_at(batch_size: int = 1000) -> dict:
+    """Derive starts_at for events stored before it existed"""
+    collection = await get_collection("events")
+    cursor = collection.find({"starts_at": {"$exists": False}}, {"date": 1, "time": 1})
+    operations = []
+    updated = 0
+    skipped = 0
+    async for doc in cursor:
+        try:
+            starts_at = format_datetime_for_db(doc["date"], doc["time"])
+        except (KeyError, TypeError, ValueError):
+            skipped += 1
+            continue
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"starts_at": starts_at}}))
+        if len(operations) >= batch_size:
+            await collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    return {"events": updated, "skipped": skipped}
+
+# Data backfills by name, each returns a dict of counts
+BACKFILLS = {
+    "geo": backfill_geo,
+    "starts_at": backfill_starts_at,
+    "user_stats": backfill_user_stats,
+    "leaderboards": rebuild_leaderboards,
+    "analytics": backfill_event_analytics,
+    "notifications": backfill_updated_at,
+}
+
+async def run(force: bool, status_only: bool, backfills: List[str] = ()) -> int:
+    """Run the requested migration command"""
+    await connect_to_mongo()
+    try:
+        stored = await get_index_version()
+        if status_only:
+            print(f"Index version: stored={stored} expected={database.INDEX_VERSION}")
+            return 0 if stored == database.INDEX_VERSION else 1
+        
+        built = await create_indexes(force=force)
+        if built:
+            print(f"Built indexes for {', '.join(database.INDEX_MANIFEST)} (version {database.INDEX_VERSION})")
+        else:
+            print(f"Indexes already at version {stored}, nothing to do")
+        
+        for name in backfills:
+            counts = await BACKFILLS[name]()
+            print(f"Backfill {name}: " + ", ".join(f"{key}={value}" for key, value in counts.items()))
+        return 0
+    finally:
+        await close_mongo_connection()
+
+def main():
+    parser = argparse.ArgumentParser(description="SportConnect database migrations")
+    parser.add_argument("--force", action="store_true", help="rebuild indexes even if the version is unchanged")
+    parser.add_argument("--status", action="store_true", help="only report the stored index version")
+    parser.add_argument("--backfill", action="append", choices=sorted(BACKFILLS), default=[],
+                        help="run a data backfill after the index build (repeatable)")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.force, args.status, args.backfill)))
+
+if __name__ == "__main__":
+    main()
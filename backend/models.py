@@ -15,11 +15,20 @@ class EventStatus(str, Enum):
     CANCELLED = "cancelled"
     COMPLETED = "completed"
 
+class RecurrenceRule(str, Enum):
+    WEEKLY = "weekly"
+    BIWEEKLY = "biweekly"
+
 class FriendshipStatus(str, Enum):
     PENDING = "pending"
     ACCEPTED = "accepted"
     REJECTED = "rejected"
 
+class LeaderboardType(str, Enum):
+    SPORT = "sport"
+    LOCATION = "location"
+    WEEK = "week"
+
 # User Models
 class UserBase(BaseModel):
     name: str
@@ -51,6 +60,8 @@ class User(UserBase):
     id: str
     events_participated: int = 0
     events_created: int = 0
+    friends_count: int = 0
+    messages_sent: int = 0
     badges: List[str] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -76,6 +87,13 @@ class EventBase(BaseModel):
 class EventCreate(EventBase):
     pass
 
+class EventSeriesCreate(EventCreate):
+    recurrence: RecurrenceRule
+    occurrences: int = Field(..., ge=2, le=26)
+
+class EventBulkCreate(BaseModel):
+    events: List[EventCreate] = Field(..., min_length=1, max_length=50)
+
 class EventUpdate(BaseModel):
     title: Optional[str] = None
     title_da: Optional[str] = None
@@ -94,6 +112,8 @@ class Event(EventBase):
     id: str
     organizer_id: str
     organizer_name: str
+    starts_at: Optional[datetime] = None  # UTC, derived from date + time
+    series_id: Optional[str] = None
     current_participants: int = 1
     participants: List[str] = []
     status: EventStatus = EventStatus.ACTIVE
@@ -104,6 +124,32 @@ class Event(EventBase):
     class Config:
         from_attributes = True
 
+class EventSummary(BaseModel):
+    """Compact event representation for list views"""
+    id: str
+    title: str
+    title_da: str
+    sport: str
+    date: str
+    time: str
+    starts_at: Optional[datetime] = None
+    location: str
+    max_participants: int
+    current_participants: int = 1
+    skill_level: SkillLevel
+    price: float
+    status: EventStatus = EventStatus.ACTIVE
+
+class FeedEvent(EventSummary):
+    score: float
+    friends_going: int = 0
+    distance_km: Optional[float] = None
+
+class WaitlistStatus(BaseModel):
+    event_id: str
+    position: Optional[int] = None  # 1-based, None when not waiting
+    length: int = 0
+
 # Message Models
 class MessageBase(BaseModel):
     message: str
@@ -147,6 +193,24 @@ class FriendInfo(BaseModel):
     status: str = "offline"
     mutual_events: int = 0
 
+# Notification Models
+class Notification(BaseModel):
+    id: str
+    type: str
+    data: Dict[str, Any] = {}
+    count: int = 1  # coalesced chat messages
+    read: bool = False
+    created_at: datetime
+    updated_at: Optional[datetime] = None  # latest grouped message, None until backfilled
+
+class NotificationPage(BaseModel):
+    notifications: List[Notification]
+    unread_count: int
+    next_cursor: Optional[str] = None
+
+class NotificationRead(BaseModel):
+    ids: Optional[List[str]] = None  # None marks everything read
+
 # Sports Model
 class Sport(BaseModel):
     id: str
@@ -176,6 +240,51 @@ class UserStats(BaseModel):
     badges_count: int
     friends_count: int
     sports_count: int
+    messages_sent: int = 0
+
+# Leaderboard Models
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    user_name: str
+    score: int
+
+class Leaderboard(BaseModel):
+    board: LeaderboardType
+    key: str
+    entries: List[LeaderboardEntry]
+
+# Analytics Models
+class EventActivityCounts(BaseModel):
+    created: int = 0
+    joins: int = 0
+    leaves: int = 0
+    waitlisted: int = 0
+    messages: int = 0
+
+class EventAnalyticsSummary(EventActivityCounts):
+    event_id: str
+    title: str
+    capacity: int
+    participants: int
+    fill_rate: float
+    first_activity: datetime
+    last_activity: datetime
+
+class OrganizerAnalytics(BaseModel):
+    events_count: int
+    average_fill_rate: float
+    totals: EventActivityCounts
+    events: List[EventAnalyticsSummary]
+
+class AnalyticsTimelinePoint(EventActivityCounts):
+    bucket: str
+    start: datetime
+
+class EventAnalyticsTimeline(BaseModel):
+    event_id: str
+    interval: str
+    points: List[AnalyticsTimelinePoint]
 
 # API Response Models
 class APIResponse(BaseModel):
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import InsertOne, UpdateOne
+from database import get_collection
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_QUEUE_SIZE = int(os.environ.get("NOTIFICATION_QUEUE_SIZE", "10000"))
+NOTIFICATION_BATCH_SIZE = int(os.environ.get("NOTIFICATION_BATCH_SIZE", "500"))
+NOTIFICATION_FLUSH_SECONDS = float(os.environ.get("NOTIFICATION_FLUSH_SECONDS", "0.5"))
+
+# Queued by stop() behind everything already enqueued
+STOP = object()
+
+class NotificationType:
+    EVENT_UPDATED = "event_updated"
+    EVENT_CANCELLED = "event_cancelled"
+    FRIEND_ADDED = "friend_added"
+    EVENT_JOINED = "event_joined"
+    EVENT_MESSAGE = "event_message"
+    WAITLIST_PROMOTED = "waitlist_promoted"
+
+class NotificationQueue:
+    """Buffers notifications in memory and writes them in batches from a background task"""
+
+    def __init__(
+        self,
+        max_size: int = NOTIFICATION_QUEUE_SIZE,
+        batch_size: int = NOTIFICATION_BATCH_SIZE,
+        flush_interval: float = NOTIFICATION_FLUSH_SECONDS
+    ):
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+    def enqueue(
+        self,
+        user_ids: Iterable[str],
+        notification_type: str,
+        data: dict,
+        actor_id: Optional[str] = None,
+        group: Optional[str] = None
+    ) -> int:
+        """Queue one notification per recipient without waiting for the database
+
+        Notifications sharing a group (e.g. chat messages of one event) collapse
+        into a single unread inbox entry with a count.
+        """
+        created_at = datetime.utcnow()
+        queued = 0
+        for user_id in user_ids:
+            if user_id == actor_id:
+                continue
+            notification = {
+                "user_id": user_id,
+                "type": notification_type,
+                "data": data,
+                "read": False,
+                "created_at": created_at,
+                "updated_at": created_at
+            }
+            if group:
+                notification["group"] = group
+            try:
+                self.queue.put_nowait(notification)
+                queued += 1
+            except asyncio.QueueFull:
+                logger.warning(f"Notification queue full, dropping {notification_type} for {user_id}")
+        return queued
+
+    async def _next_batch(self) -> Tuple[List[dict], bool]:
+        """Collect up to batch_size notifications, returns (batch, stop requested)"""
+        batch = []
+        item = await self.queue.get()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while item is not STOP:
+            batch.append(item)
+            timeout = deadline - loop.time()
+            if len(batch) >= self.batch_size or timeout <= 0:
+                return batch, False
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return batch, False
+        return batch, True
+
+    async def _write(self, batch: List[dict]):
+        operations = []
+        for notification in batch:
+            if "group" not in notification:
+                operations.append(InsertOne({**notification, "count": 1}))
+                continue
+            operations.append(UpdateOne(
+                {"user_id": notification["user_id"], "group": notification["group"], "read": False},
+                {
+                    # The entry keeps its first created_at, updated_at moves it back to the top of the inbox
+                    "$set": {"type": notification["type"], "data": notification["data"], "updated_at": notification["updated_at"]},
+                    "$setOnInsert": {"created_at": notification["created_at"]},
+                    "$inc": {"count": 1}
+                },
+                upsert=True
+            ))
+        collection = await get_collection("notifications")
+        await collection.bulk_write(operations, ordered=False)
+
+    async def run(self):
+        """Write queued notifications until stop() is called"""
+        while True:
+            batch, stopping = await self._next_batch()
+            if batch:
+                try:
+                    await self._write(batch)
+                except Exception:
+                    logger.exception("Notification write error", extra={"dropped": len(batch)})
+            if stopping:
+                return
+
+    async def stop(self, worker: asyncio.Task):
+        """Let the worker write everything queued so far, including its in-flight batch, then drain the rest"""
+        await self.queue.put(STOP)
+        await worker
+        await self.drain()
+
+    async def drain(self):
+        """Write whatever is still queued"""
+        batch = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not STOP:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                await self._write(batch)
+                batch = []
+        if batch:
+            await self._write(batch)
+
+notification_queue = NotificationQueue()
+
+def encode_cursor(notification: dict) -> str:
+    """Opaque paging cursor: updated_at in milliseconds plus the id as tie breaker"""
+    # updated_at comes back from Mongo as naive UTC, timestamp() would read it as local time
+    updated_at = notification["updated_at"].replace(tzinfo=timezone.utc)
+    return f"{int(updated_at.timestamp() * 1000)}-{notification['id']}"
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, ObjectId]]:
+    try:
+        millis, object_id = cursor.split("-", 1)
+        return datetime.utcfromtimestamp(int(millis) / 1000), ObjectId(object_id)
+    except (ValueError, InvalidId):
+        return None
+
+def inbox_query(user_id: str, before: Optional[Tuple[datetime, ObjectId]] = None, unread_only: bool = False) -> dict:
+    """Filter served by the (user_id, updated_at, _id) index"""
+    query = {"user_id": user_id}
+    if unread_only:
+        query["read"] = False
+    if before:
+        updated_at, object_id = before
+        query["$or"] = [
+            {"updated_at": {"$lt": updated_at}},
+            {"updated_at": updated_at, "_id": {"$lt": object_id}}
+        ]
+    return query
+
+async def count_unread(user_id: str) -> int:
+    """Unread count, answered from the partial unread index"""
+    collection = await get_collection("notifications")
+    return await collection.count_documents({"user_id": user_id, "read": False})
+
+async def mark_read(user_id: str, ids: Optional[List[str]] = None) -> int:
+    """Mark some or all of a user's notifications read"""
+    query = {"user_id": user_id, "read": False}
+    if ids is not None:
+        query["_id"] = {"$in": [ObjectId(i) for i in ids if ObjectId.is_valid(i)]}
+    collection = await get_collection("notifications")
+    result = await collection.update_many(query, {"$set": {"read": True}})
+    return result.modified_count
+
+async def backfill_updated_at(batch_size: int = 1000) -> dict:
+    """Copy created_at into updated_at for notifications stored before the inbox paged on it"""
+    collection = await get_collection("notifications")
+    cursor = collection.find({"updated_at": {"$exists": False}}, {"created_at": 1})
+    operations = []
+    updated = 0
+    async for doc in cursor:
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"updated_at": doc["created_at"]}}))
+        if len(operations) >= batch_size:
+            await collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    return {"notifications": updated}
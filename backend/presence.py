@@ -0,0 +1,142 @@
+import logging
+import os
+import time
+from typing import Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Presence configuration
+PRESENCE_BACKEND = os.environ.get("PRESENCE_BACKEND", "memory")  # memory | redis
+PRESENCE_REDIS_URL = os.environ.get("PRESENCE_REDIS_URL", os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+PRESENCE_TTL = int(os.environ.get("PRESENCE_TTL", "60"))  # seconds without a heartbeat before a user is offline
+
+ONLINE = "online"
+OFFLINE = "offline"
+
+class InMemoryPresence:
+    """Per-process presence table: heartbeat expiry and open socket count per user"""
+
+    def __init__(self):
+        self._expires: Dict[str, float] = {}
+        self._connections: Dict[str, int] = {}
+        self._next_prune = 0.0
+
+    async def touch(self, user_id: str, ttl: int):
+        now = time.monotonic()
+        self._expires[user_id] = now + ttl
+        # Sweep expired users at most once per TTL so the table stays bounded
+        if now >= self._next_prune:
+            self._prune(now)
+            self._next_prune = now + ttl
+
+    async def connect(self, user_id: str, ttl: int):
+        self._connections[user_id] = self._connections.get(user_id, 0) + 1
+
+    async def refresh(self, user_id: str, ttl: int):
+        # Sockets are counted in this process and always released in disconnect
+        pass
+
+    async def disconnect(self, user_id: str):
+        remaining = self._connections.get(user_id, 0) - 1
+        if remaining > 0:
+            self._connections[user_id] = remaining
+        else:
+            self._connections.pop(user_id, None)
+
+    async def online(self, user_ids: list) -> list:
+        now = time.monotonic()
+        return [self._connections.get(user_id, 0) > 0 or self._expires.get(user_id, 0) > now for user_id in user_ids]
+
+    def _prune(self, now: float):
+        for user_id in [u for u, expires_at in self._expires.items() if expires_at <= now]:
+            del self._expires[user_id]
+
+# Drop the counter with the last socket so it never goes negative
+DISCONNECT_SCRIPT = """
+local remaining = redis.call('DECR', KEYS[1])
+if remaining <= 0 then
+    redis.call('DEL', KEYS[1])
+end
+return remaining
+"""
+
+class RedisPresence:
+    """Presence shared between workers: an expiring heartbeat key and an open socket counter per user"""
+
+    def __init__(self, url: str = PRESENCE_REDIS_URL):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("PRESENCE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.from_url(url)
+        self.disconnect_script = self.client.register_script(DISCONNECT_SCRIPT)
+
+    async def touch(self, user_id: str, ttl: int):
+        await self.client.set(f"presence:{user_id}", 1, ex=ttl)
+
+    async def connect(self, user_id: str, ttl: int):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(f"presence:sockets:{user_id}")
+            pipe.expire(f"presence:sockets:{user_id}", ttl)
+            await pipe.execute()
+
+    async def refresh(self, user_id: str, ttl: int):
+        # Open sockets keep the counter alive, a crashed worker's sockets expire with it
+        await self.client.expire(f"presence:sockets:{user_id}", ttl)
+
+    async def disconnect(self, user_id: str):
+        await self.disconnect_script(keys=[f"presence:sockets:{user_id}"])
+
+    async def online(self, user_ids: list) -> list:
+        # One MGET round trip for heartbeats and socket counters of the whole list
+        keys = [f"presence:{user_id}" for user_id in user_ids] + [f"presence:sockets:{user_id}" for user_id in user_ids]
+        values = await self.client.mget(keys)
+        heartbeats, sockets = values[:len(user_ids)], values[len(user_ids):]
+        return [heartbeat is not None or int(count or 0) > 0 for heartbeat, count in zip(heartbeats, sockets)]
+
+def create_presence_backend():
+    """Create the presence backend selected by PRESENCE_BACKEND"""
+    if PRESENCE_BACKEND == "redis":
+        return RedisPresence()
+    return InMemoryPresence()
+
+presence_backend = create_presence_backend()
+
+async def mark_online(user_id: str, ttl: int = PRESENCE_TTL):
+    """Record a heartbeat, the user stays online for ttl seconds"""
+    try:
+        await presence_backend.touch(user_id, ttl)
+    except Exception as e:
+        logger.warning(f"Presence update failed: {e}")
+
+async def mark_connected(user_id: str, ttl: int = PRESENCE_TTL):
+    """Count an open presence socket, the user is online while any socket or heartbeat is live"""
+    try:
+        await presence_backend.connect(user_id, ttl)
+    except Exception as e:
+        logger.warning(f"Presence update failed: {e}")
+
+async def refresh_connection(user_id: str, ttl: int = PRESENCE_TTL):
+    try:
+        await presence_backend.refresh(user_id, ttl)
+    except Exception as e:
+        logger.warning(f"Presence update failed: {e}")
+
+async def mark_disconnected(user_id: str):
+    """Release a socket, other sockets and heartbeats of the user keep them online"""
+    try:
+        await presence_backend.disconnect(user_id)
+    except Exception as e:
+        logger.warning(f"Presence update failed: {e}")
+
+async def get_statuses(user_ids: Iterable[str]) -> Dict[str, str]:
+    """Resolve the status of many users in one lookup, offline when unavailable"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    try:
+        online = await presence_backend.online(user_ids)
+    except Exception as e:
+        logger.warning(f"Presence lookup failed: {e}")
+        online = [False] * len(user_ids)
+    return {user_id: ONLINE if is_online else OFFLINE for user_id, is_online in zip(user_ids, online)}
@@ -0,0 +1,78 @@
+"""Rank query shapes recorded by the opt-in database profiler
+
+Workers started with DB_PROFILER_ENABLED=true flush per-shape totals to the
+query_profile collection; this report ranks them by total time.
+
+Usage:
+    python profile_report.py                     # top 20 shapes by total time
+    python profile_report.py --limit 50 --collection events
+    python profile_report.py --sort max_ms       # worst single calls first
+    python profile_report.py --reset             # clear the collected profile
+"""
+import argparse
+import asyncio
+import sys
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+os.environ['SKIP_INDEX_BUILD'] = '1'
+
+from database import connect_to_mongo, close_mongo_connection, get_collection
+from profiler import PROFILE_COLLECTION
+
+SORT_FIELDS = ("total_ms", "max_ms", "count", "avg_ms", "slow")
+
+async def run(limit: int, collection_name: str, sort: str, reset: bool) -> int:
+    """Print the report or clear the profile"""
+    await connect_to_mongo()
+    try:
+        profile = await get_collection(PROFILE_COLLECTION)
+        if reset:
+            result = await profile.delete_many({})
+            print(f"Cleared {result.deleted_count} query shapes")
+            return 0
+        
+        pipeline = [{"$match": {"collection": collection_name}}] if collection_name else []
+        pipeline += [
+            {"$addFields": {"avg_ms": {"$divide": ["$total_ms", {"$max": ["$count", 1]}]}}},
+            {"$sort": {sort: -1}},
+            {"$limit": limit},
+        ]
+        shapes = await profile.aggregate(pipeline).to_list(length=limit)
+        if not shapes:
+            print("No profile data, run workers with DB_PROFILER_ENABLED=true")
+            return 1
+        
+        grand_total = sum(shape["total_ms"] for shape in shapes) or 1
+        print(f"{'total ms':>11} {'%':>5} {'calls':>8} {'avg ms':>8} {'max ms':>8} {'slow':>6} {'docs/call':>9}  operation")
+        for shape in shapes:
+            docs_per_call = shape["documents"] / max(shape["count"], 1)
+            print(f"{shape['total_ms']:>11.1f} {shape['total_ms'] / grand_total * 100:>5.1f} {shape['count']:>8} "
+                  f"{shape['avg_ms']:>8.2f} {shape['max_ms']:>8.1f} {shape['slow']:>6} {docs_per_call:>9.1f}  "
+                  f"{shape['operation']} {shape['collection']}")
+            print(f"{'':>60}shape: {shape['shape']}")
+            explain = shape.get("explain")
+            if explain:
+                counters = ", ".join(f"{key}={value}" for key, value in explain.items() if key != "plan")
+                print(f"{'':>60}plan:  {explain.get('plan') or '?'}" + (f" ({counters})" if counters else ""))
+        return 0
+    finally:
+        await close_mongo_connection()
+
+def main():
+    parser = argparse.ArgumentParser(description="SportConnect query profile report")
+    parser.add_argument("--limit", type=int, default=20, help="number of shapes to show")
+    parser.add_argument("--collection", help="only shapes on this collection")
+    parser.add_argument("--sort", choices=SORT_FIELDS, default="total_ms", help="ranking field")
+    parser.add_argument("--reset", action="store_true", help="delete the collected profile")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.limit, args.collection, args.sort, args.reset)))
+
+if __name__ == "__main__":
+    main()
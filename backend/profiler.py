@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+import orjson
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: every profiled helper call costs a shape normalization
+DB_PROFILER_ENABLED = os.environ.get("DB_PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+DB_SLOW_QUERY_MS = float(os.environ.get("DB_SLOW_QUERY_MS", "100"))
+DB_EXPLAIN_SAMPLE_RATE = float(os.environ.get("DB_EXPLAIN_SAMPLE_RATE", "0.01"))
+DB_PROFILE_FLUSH_SECONDS = int(os.environ.get("DB_PROFILE_FLUSH_SECONDS", "30"))
+PROFILE_COLLECTION = "query_profile"
+
+# Operators whose operand is structure rather than a value
+STRUCTURAL_OPERATORS = {"$and", "$or", "$nor", "$not", "$elemMatch", "$expr"}
+
+def normalize_shape(value: Any) -> Any:
+    """Replace literal values with their type so queries differing only in values share a shape"""
+    if isinstance(value, dict):
+        return {key: normalize_shape(item) if isinstance(item, (dict, list)) or key in STRUCTURAL_OPERATORS
+                else f"<{type(item).__name__}>" for key, item in value.items()}
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            return [normalize_shape(item) for item in value]
+        return [f"<{type(value[0]).__name__}>"] if value else []
+    return f"<{type(value).__name__}>"
+
+def query_shape(query: Optional[dict] = None, sort: Optional[list] = None, pipeline: Optional[list] = None) -> str:
+    shape = {}
+    if query:
+        shape["filter"] = normalize_shape(query)
+    if sort:
+        shape["sort"] = [list(key) for key in sort]
+    if pipeline:
+        shape["pipeline"] = [normalize_shape(stage) for stage in pipeline]
+    return orjson.dumps(shape, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+
+def explain_command(operation: str, collection_name: str, query: Optional[dict], sort: Optional[list],
+                    pipeline: Optional[list], update: Optional[dict]) -> dict:
+    if operation == "aggregate":
+        return {"aggregate": collection_name, "pipeline": pipeline, "cursor": {}}
+    if operation == "count":
+        return {"count": collection_name, "query": query or {}}
+    if operation == "update":
+        return {"update": collection_name, "updates": [{"q": query or {}, "u": update or {}}]}
+    command = {"find": collection_name, "filter": query or {}}
+    if sort:
+        command["sort"] = dict(sort)
+    if operation == "find_one":
+        command["limit"] = 1
+    return command
+
+def _find_key(document: Any, key: str) -> Optional[Any]:
+    """Depth-first search for a key, explain output nests differently per command and server version"""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        children = document.values()
+    elif isinstance(document, list):
+        children = document
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+def summarize_explain(explain: dict) -> dict:
+    """Reduce explain output to the plan's stage chain and execution counters"""
+    stages = []
+    plan = _find_key(explain, "winningPlan")
+    plan = plan.get("queryPlan", plan) if isinstance(plan, dict) else None
+    while isinstance(plan, dict):
+        stage = plan.get("stage", "?")
+        stages.append(f"{stage}({plan['indexName']})" if plan.get("indexName") else stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    summary = {"plan": " > ".join(stages)}
+    stats = _find_key(explain, "executionStats")
+    if isinstance(stats, dict):
+        for field in ("nReturned", "totalKeysExamined", "totalDocsExamined", "executionTimeMillis"):
+            if field in stats:
+                summary[field] = stats[field]
+    return summary
+
+class QueryProfiler:
+    """Per-shape timing totals, flushed to the query_profile collection"""
+
+    def __init__(self, enabled: bool = DB_PROFILER_ENABLED, slow_ms: float = DB_SLOW_QUERY_MS,
+                 explain_rate: float = DB_EXPLAIN_SAMPLE_RATE):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.explain_rate = explain_rate
+        self.pending: Dict[str, dict] = {}
+        self._explaining: Dict[str, asyncio.Task] = {}
+
+    def record(
+        self,
+        operation: str,
+        collection,
+        started: float,
+        documents: int,
+        query: Optional[dict] = None,
+        sort: Optional[list] = None,
+        pipeline: Optional[list] = None,
+        update: Optional[dict] = None
+    ):
+        """Record one helper call that began at time.perf_counter() value `started`"""
+        if not self.enabled:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        shape = query_shape(query, sort, pipeline)
+        key = hashlib.sha1(f"{operation} {collection.name} {shape}".encode("utf-8")).hexdigest()
+
+        entry = self.pending.get(key)
+        if entry is None:
+            entry = self.pending[key] = {
+                "operation": operation, "collection": collection.name, "shape": shape,
+                "count": 0, "total_ms": 0.0, "max_ms": 0.0, "documents": 0, "slow": 0
+            }
+        entry["count"] += 1
+        entry["total_ms"] += duration_ms
+        entry["max_ms"] = max(entry["max_ms"], duration_ms)
+        entry["documents"] += documents
+
+        slow = duration_ms >= self.slow_ms
+        if slow:
+            entry["slow"] += 1
+            logger.warning(f"Slow query {duration_ms:.1f}ms {operation} {collection.name} {shape} documents={documents}")
+
+        # Explain a sample, and the first slow call of a shape in each flush window
+        if key not in self._explaining and (random.random() < self.explain_rate or (slow and "explain" not in entry)):
+            command = explain_command(operation, collection.name, query, sort, pipeline, update)
+            self._explaining[key] = asyncio.create_task(self._explain(key, entry, collection, command))
+
+    async def _explain(self, key: str, entry: dict, collection, command: dict):
+        try:
+            explain = await collection.database.command({"explain": command, "verbosity": "executionStats"})
+            entry["explain"] = summarize_explain(explain)
+        except Exception as e:
+            logger.debug(f"Explain failed for {entry['shape']}: {e}")
+        finally:
+            self._explaining.pop(key, None)
+
+    def _restore(self, entries: Dict[str, dict]):
+        """Put totals from a failed flush back, under anything recorded since"""
+        for key, entry in entries.items():
+            current = self.pending.get(key)
+            if current is None:
+                self.pending[key] = entry
+                continue
+            for field in ("count", "total_ms", "documents", "slow"):
+                current[field] += entry[field]
+            current["max_ms"] = max(current["max_ms"], entry["max_ms"])
+            if "explain" in entry:
+                current.setdefault("explain", entry["explain"])
+
+    async def flush(self, database) -> int:
+        """Merge the pending totals into the profile collection"""
+        pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+        now = datetime.utcnow()
+        operations = []
+        for key, entry in pending.items():
+            update = {
+                "$inc": {field: entry[field] for field in ("count", "total_ms", "documents", "slow")},
+                "$max": {"max_ms": entry["max_ms"]},
+                "$set": {"operation": entry["operation"], "collection": entry["collection"],
+                         "shape": entry["shape"], "last_seen": now},
+            }
+            if "explain" in entry:
+                update["$set"]["explain"] = entry["explain"]
+            operations.append(UpdateOne({"_id": key}, update, upsert=True))
+        try:
+            await database[PROFILE_COLLECTION].bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Unordered, so every operation not listed as failed was applied
+            keys = list(pending)
+            self._restore({keys[error["index"]]: pending[keys[error["index"]]] for error in e.details.get("writeErrors", [])})
+            raise
+        except Exception:
+            self._restore(pending)
+            raise
+        return len(operations)
+
+query_profiler = QueryProfiler()
+
+async def run_profile_flusher(interval: int = DB_PROFILE_FLUSH_SECONDS):
+    """Periodically persist profiler totals so the report sees every worker"""
+    from database import get_database
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await query_profiler.flush(await get_database())
+        except Exception:
+            logger.exception("Query profile flush error")
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
+from starlette.requests import HTTPConnection
+from auth import SECRET_KEY, ALGORITHM
+
+logger = logging.getLogger(__name__)
+
+# Rate limit configuration
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")  # memory | redis
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000"))
+# Reverse proxies in front of the app that append to X-Forwarded-For, 0 keys on the peer address.
+# Clients can forge the header when they reach the app directly, so it is only trusted when set.
+# Behind the ingress every peer is the ingress itself, the deployment sets 1.
+RATE_LIMIT_PROXY_HOPS = int(os.environ.get("RATE_LIMIT_PROXY_HOPS", "0"))
+# How long a request may queue for a concurrency slot before it is shed with a 503
+CONCURRENCY_WAIT_SECONDS = float(os.environ.get("CONCURRENCY_WAIT_SECONDS", "0.5"))
+
+class RatePolicy(NamedTuple):
+    name: str
+    rate: float  # tokens refilled per second
+    burst: int  # bucket size
+    key: str  # "user" (falls back to ip for anonymous requests) or "ip"
+    route_class: str  # concurrency pool
+
+DEFAULT_POLICY = RatePolicy("default", rate=20, burst=100, key="user", route_class="default")
+
+# Per-route policies keyed by (method, route template)
+ROUTE_POLICIES: Dict[Tuple[str, str], RatePolicy] = {
+    # bcrypt makes every attempt expensive, and failed logins are what attackers generate
+    ("POST", "/api/auth/login"): RatePolicy("login", rate=5 / 60, burst=10, key="ip", route_class="auth"),
+    ("POST", "/api/auth/register"): RatePolicy("register", rate=3 / 60, burst=5, key="ip", route_class="auth"),
+    # Regex search falls back to collection scans
+    ("GET", "/api/events"): RatePolicy("events_search", rate=5, burst=30, key="user", route_class="search"),
+    ("GET", "/api/friends/suggestions"): RatePolicy("friend_search", rate=1, burst=10, key="user", route_class="search"),
+    ("POST", "/api/events/{event_id}/messages"): RatePolicy("messages", rate=1, burst=10, key="user", route_class="write"),
+    ("POST", "/api/events"): RatePolicy("event_create", rate=10 / 3600, burst=10, key="user", route_class="write"),
+    ("POST", "/api/events/series"): RatePolicy("event_create", rate=10 / 3600, burst=10, key="user", route_class="write"),
+    ("POST", "/api/events/bulk"): RatePolicy("event_create", rate=10 / 3600, burst=10, key="user", route_class="write"),
+    ("POST", "/api/friends/{user_id}"): RatePolicy("friend_add", rate=30 / 3600, burst=30, key="user", route_class="write"),
+}
+
+# Requests served at once per worker and route class
+CONCURRENCY_LIMITS = {
+    "auth": int(os.environ.get("CONCURRENCY_LIMIT_AUTH", "8")),
+    "search": int(os.environ.get("CONCURRENCY_LIMIT_SEARCH", "32")),
+    "write": int(os.environ.get("CONCURRENCY_LIMIT_WRITE", "64")),
+    "default": int(os.environ.get("CONCURRENCY_LIMIT_DEFAULT", "256")),
+}
+
+class InMemoryRateLimitStore:
+    """Per-process token buckets, least recently used buckets are evicted"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token, returning 0 when allowed or the seconds until one is available"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+# Refill and take in one round trip so concurrent workers can't overdraw a bucket
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+class RedisRateLimitStore:
+    """Token buckets shared between workers"""
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        wait = await self.script(keys=[f"ratelimit:{key}"], args=[rate, burst, time.time()])
+        return float(wait)
+
+def create_rate_limit_store():
+    """Create the bucket store selected by RATE_LIMIT_BACKEND"""
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitStore()
+    return InMemoryRateLimitStore()
+
+rate_limit_store = create_rate_limit_store()
+
+class ConcurrencyLimiter:
+    """Caps in-flight requests per route class, briefly queueing before shedding load"""
+
+    def __init__(self, limits: Dict[str, int] = CONCURRENCY_LIMITS, wait: float = CONCURRENCY_WAIT_SECONDS):
+        self.wait = wait
+        self.semaphores: Dict[str, asyncio.Semaphore] = {name: asyncio.Semaphore(limit) for name, limit in limits.items()}
+
+    async def acquire(self, route_class: str) -> Optional[asyncio.Semaphore]:
+        semaphore = self.semaphores.get(route_class)
+        if semaphore is None:
+            return None
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.wait)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"}
+            )
+        return semaphore
+
+concurrency_limiter = ConcurrencyLimiter()
+
+def policy_for(connection: HTTPConnection) -> RatePolicy:
+    route = connection.scope.get("route")
+    method = connection.scope.get("method", "GET")
+    return ROUTE_POLICIES.get((method, getattr(route, "path", "")), DEFAULT_POLICY)
+
+def client_ip(connection: HTTPConnection, proxy_hops: Optional[int] = None) -> str:
+    """Address the outermost trusted proxy saw, clients can only forge entries left of it"""
+    if proxy_hops is None:
+        proxy_hops = RATE_LIMIT_PROXY_HOPS
+    if proxy_hops > 0:
+        forwarded = [address.strip() for address in connection.headers.get("x-forwarded-for", "").split(",") if address.strip()]
+        if len(forwarded) >= proxy_hops:
+            return forwarded[-proxy_hops]
+    return connection.client.host if connection.client else "unknown"
+
+def client_identity(connection: HTTPConnection, policy: RatePolicy) -> str:
+    """Bucket key: the token's subject for user policies, otherwise the client address"""
+    if policy.key == "user":
+        authorization = connection.headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            try:
+                subject = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+                if subject:
+                    return f"user:{subject}"
+            except JWTError:
+                pass
+    return f"ip:{client_ip(connection)}"
+
+async def check_rate_limit(connection: HTTPConnection, policy: RatePolicy):
+    """Raise 429 when the caller's bucket for this policy is empty"""
+    key = f"{policy.name}:{client_identity(connection, policy)}"
+    try:
+        wait = await rate_limit_store.take(key, policy.rate, policy.burst)
+    except Exception as e:
+        # Fail open, an unavailable limiter must not take the API down
+        logger.warning(f"Rate limit check failed: {e}")
+        return
+    if wait > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+
+async def admission_control(connection: HTTPConnection):
+    """Router dependency: per-route token bucket, then a slot in the route class's concurrency pool"""
+    # A socket would hold its slot for as long as it stays open
+    if not RATE_LIMIT_ENABLED or connection.scope["type"] == "websocket":
+        yield
+        return
+    policy = policy_for(connection)
+    await check_rate_limit(connection, policy)
+    semaphore = await concurrency_limiter.acquire(policy.route_class)
+    try:
+        yield
+    finally:
+        if semaphore is not None:
+            semaphore.release()
@@ -0,0 +1,304 @@
+"""Generate a realistic synthetic dataset for scale testing
+
+Bulk-loads users, events with skewed participant counts, friendships and
+chat history with insert_many, several batches in flight at once. Sizes
+default to 10k users, 50k events and 1M messages and are multiplied by
+--scale; the per-collection flags override single sizes.
+
+Every seeded user can log in with the password SEED_PASSWORD.
+
+Usage:
+    python seed.py --scale 0.1                   # 1k users, 5k events, 100k messages
+    python seed.py --drop                        # wipe the app collections first
+    python seed.py --users 50000 --messages 0    # override single sizes
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from database import connect_to_mongo, close_mongo_connection, get_collection
+from geo import geocode, geocode_event
+from leaderboards import bucket_id, bucket_keys
+from utils import format_datetime_for_db, generate_event_tags, get_user_badges
+
+# Full-scale dataset, multiplied by --scale
+USERS = 10_000
+EVENTS = 50_000
+MESSAGES = 1_000_000
+FRIENDS_PER_USER = 12
+BATCH_SIZE = 5_000
+PARALLEL_BATCHES = 4
+SEED_PASSWORD = "Password123!"
+
+SEEDED_COLLECTIONS = ("users", "events", "messages", "friendships", "notifications", "leaderboards")
+
+CITIES = ["København", "Frederiksberg", "Nørrebro", "Østerbro", "Vesterbro", "Amager", "Valby",
+          "Aarhus", "Odense", "Aalborg", "Esbjerg", "Roskilde", "Vejle", "Kolding"]
+# Most users live in Copenhagen, mirroring where events cluster
+CITY_WEIGHTS = [30, 8, 8, 8, 8, 6, 4, 10, 6, 5, 2, 2, 2, 2]
+VENUES = ["Fælledparken", "Sports Center", "Idrætspark", "Gym", "Stadion", "Havnebadet", "Skatepark"]
+FIRST_NAMES = ["Lars", "Maria", "Erik", "Sofie", "Anders", "Emma", "Mikkel", "Ida", "Jonas", "Freja"]
+LAST_NAMES = ["Andersen", "Nielsen", "Jensen", "Hansen", "Pedersen", "Larsen", "Sørensen", "Rasmussen"]
+SKILL_LEVELS = ["beginner", "intermediate", "advanced", "all"]
+CHAT_LINES = [("See you there!", "Vi ses!"), ("Running 5 min late", "Kommer 5 min for sent"),
+              ("Who brings the ball?", "Hvem tager bolden med?"), ("Great game today", "God kamp i dag")]
+
+def batched(documents: Iterable[dict], size: int):
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def generate_users(count: int, sports: List[str], password_hash: str) -> List[dict]:
+    now = datetime.utcnow()
+    # Unique per run so repeated seeds without --drop don't hit the email index
+    run = uuid.uuid4().hex[:6]
+    users = []
+    for i, city in enumerate(random.choices(CITIES, weights=CITY_WEIGHTS, k=count)):
+        users.append({
+            "_id": ObjectId(),
+            "id": str(uuid.uuid4()),
+            "name": f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}",
+            "email": f"seed{i}.{run}@example.dk",
+            "password": password_hash,
+            "age": random.randint(18, 65),
+            "location": city,
+            "geo": geocode(city),
+            "bio": "",
+            "sports": random.sample(sports, random.randint(1, min(3, len(sports)))),
+            "skill_level": random.choice(SKILL_LEVELS[:3]),
+            "photo": None,
+            "events_participated": 0,
+            "events_created": 0,
+            "friends_count": 0,
+            "messages_sent": 0,
+            "badges": [],
+            "created_at": now,
+            "updated_at": now,
+        })
+    return users
+
+def generate_events(count: int, users: List[dict]) -> List[dict]:
+    today = datetime.utcnow().date()
+    # A minority of active organizers create most events
+    organizer_weights = [random.paretovariate(1.5) for _ in users]
+    events = []
+    for organizer in random.choices(users, weights=organizer_weights, k=count):
+        # Most events are upcoming, the rest are recent history
+        day = today + timedelta(days=random.randint(-30, 60))
+        date, event_time = day.strftime("%Y-%m-%d"), f"{random.randint(7, 21):02d}:{random.choice(['00', '30'])}"
+        sport = random.choice(organizer["sports"])
+        max_participants = random.randint(4, 22)
+        # Fill ratios cluster around half full with a tail of full events
+        filled = max(1, min(max_participants, round(max_participants * random.betavariate(2, 1.5))))
+        participant_ids = list(dict.fromkeys(
+            [str(organizer["_id"])] + [str(u["_id"]) for u in random.sample(users, filled - 1)]
+        ))
+        event = {
+            "_id": ObjectId(),
+            "id": str(uuid.uuid4()),
+            "title": f"{sport.title()} in {organizer['location']}",
+            "title_da": f"{sport.title()} i {organizer['location']}",
+            "sport": sport,
+            "date": date,
+            "time": event_time,
+            "starts_at": format_datetime_for_db(date, event_time),
+            "location": f"{random.choice(VENUES)} {organizer['location']}",
+            "address": organizer["location"],
+            "description": f"Weekly {sport} session, all welcome",
+            "description_da": f"Ugentlig {sport}, alle er velkomne",
+            "max_participants": max_participants,
+            "skill_level": random.choice(SKILL_LEVELS),
+            "price": random.choice([0.0, 0.0, 0.0, 25.0, 50.0]),
+            "organizer_id": str(organizer["_id"]),
+            "organizer_name": organizer["name"],
+            "current_participants": len(participant_ids),
+            "participants": participant_ids,
+            "status": "active" if day >= today else "completed",
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        }
+        event["tags"] = generate_event_tags(event)
+        point = geocode_event(event["location"], event["address"])
+        if point:
+            event["geo"] = point
+        events.append(event)
+    return events
+
+def apply_user_counters(users: List[dict], events: List[dict], friendships: List[dict]):
+    """Fill events_created, events_participated, friends_count and badges from the generated data"""
+    created = Counter(event["organizer_id"] for event in events)
+    participated = Counter(user_id for event in events for user_id in event["participants"] if user_id != event["organizer_id"])
+    friends = Counter(user_id for friendship in friendships for user_id in (friendship["user_id"], friendship["friend_id"]))
+    for user in users:
+        user_id = str(user["_id"])
+        user["events_created"] = created[user_id]
+        user["events_participated"] = participated[user_id]
+        user["friends_count"] = friends[user_id]
+        user["badges"] = get_user_badges(participated[user_id], created[user_id])
+
+def generate_leaderboards(users: List[dict], events: List[dict]) -> List[dict]:
+    """Leaderboard buckets as the incremental updates would have left them"""
+    profiles = {str(user["_id"]): user for user in users}
+    scores = Counter(
+        (board, key, user_id)
+        for event in events
+        for user_id in event["participants"]
+        for board, key in bucket_keys(event, profiles[user_id]["location"])
+    )
+    now = datetime.utcnow()
+    return [
+        {"_id": bucket_id(board, key, user_id), "board": board, "key": key, "user_id": user_id,
+         "user_name": profiles[user_id]["name"], "score": score, "updated_at": now}
+        for (board, key, user_id), score in scores.items()
+    ]
+
+def generate_friendships(users: List[dict], per_user: int):
+    seen = set()
+    now = datetime.utcnow()
+    for user in users:
+        # Friend counts vary widely, a few very social users
+        for friend in random.sample(users, min(len(users), int(random.expovariate(1 / per_user)))):
+            pair = tuple(sorted((str(user["_id"]), str(friend["_id"]))))
+            if pair[0] == pair[1] or pair in seen:
+                continue
+            seen.add(pair)
+            yield {"id": str(uuid.uuid4()), "user_id": pair[0], "friend_id": pair[1],
+                   "status": "accepted", "mutual_events": 0, "created_at": now}
+
+def generate_messages(count: int, events: List[dict], names: Dict[str, str], sent: Counter):
+    if not events:
+        return
+    # Chat volume is heavy tailed, a few events carry most of the history
+    weights = [random.paretovariate(1.2) for _ in events]
+    now = datetime.utcnow()
+    for chunk_start in range(0, count, BATCH_SIZE):
+        for event in random.choices(events, weights=weights, k=min(BATCH_SIZE, count - chunk_start)):
+            user_id = random.choice(event["participants"])
+            sent[user_id] += 1
+            message, message_da = random.choice(CHAT_LINES)
+            yield {
+                "id": str(uuid.uuid4()),
+                "event_id": str(event["_id"]),
+                "user_id": user_id,
+                "user_name": names[user_id],
+                "message": message,
+                "message_da": message_da,
+                "created_at": now - timedelta(minutes=random.randint(0, 60 * 24 * 30)),
+            }
+
+async def insert_parallel(collection_name: str, documents: Iterable[dict],
+                          batch_size: int = BATCH_SIZE, parallel: int = PARALLEL_BATCHES) -> int:
+    """insert_many in batches, keeping up to `parallel` batches in flight"""
+    collection = await get_collection(collection_name)
+    pending = set()
+    inserted = 0
+    for batch in batched(documents, batch_size):
+        if len(pending) >= parallel:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            inserted += sum(len(task.result().inserted_ids) for task in done)
+        pending.add(asyncio.ensure_future(collection.insert_many(batch, ordered=False)))
+    if pending:
+        done, _ = await asyncio.wait(pending)
+        inserted += sum(len(task.result().inserted_ids) for task in done)
+    return inserted
+
+async def seed_database(
+    users: int,
+    events: int,
+    messages: int,
+    friends_per_user: int = FRIENDS_PER_USER,
+    drop: bool = False,
+    parallel: int = PARALLEL_BATCHES
+) -> dict:
+    """Generate and insert a dataset, returns inserted counts per collection"""
+    from auth import get_password_hash
+    from sports_data import get_all_sports
+
+    if drop:
+        for name in SEEDED_COLLECTIONS:
+            collection = await get_collection(name)
+            await collection.delete_many({})
+
+    sports = [sport["id"] for sport in get_all_sports()]
+    user_docs = generate_users(max(2, users), sports, get_password_hash(SEED_PASSWORD))
+    event_docs = generate_events(events, user_docs)
+    friendship_docs = list(generate_friendships(user_docs, friends_per_user))
+    apply_user_counters(user_docs, event_docs, friendship_docs)
+    names = {str(user["_id"]): user["name"] for user in user_docs}
+    sent = Counter()
+
+    # Collections don't reference each other by insert order, so load them concurrently
+    counts = await asyncio.gather(
+        insert_parallel("users", user_docs, parallel=parallel),
+        insert_parallel("events", event_docs, parallel=parallel),
+        insert_parallel("friendships", friendship_docs, parallel=parallel),
+        insert_parallel("leaderboards", generate_leaderboards(user_docs, event_docs), parallel=parallel),
+        insert_parallel("messages", generate_messages(messages, event_docs, names, sent), parallel=parallel),
+    )
+    # Messages are streamed rather than held in memory, so their counter is applied once they are in
+    users_collection = await get_collection("users")
+    for batch in batched(sent.items(), BATCH_SIZE):
+        await users_collection.bulk_write(
+            [UpdateOne({"_id": ObjectId(user_id)}, {"$set": {"messages_sent": count}}) for user_id, count in batch],
+            ordered=False
+        )
+    return dict(zip(("users", "events", "friendships", "leaderboards", "messages"), counts))
+
+def scaled(override: Optional[int], full_size: int, scale: float) -> int:
+    return override if override is not None else int(full_size * scale)
+
+async def run(args) -> int:
+    await connect_to_mongo()
+    try:
+        started = time.perf_counter()
+        counts = await seed_database(
+            users=scaled(args.users, USERS, args.scale),
+            events=scaled(args.events, EVENTS, args.scale),
+            messages=scaled(args.messages, MESSAGES, args.scale),
+            friends_per_user=args.friends_per_user,
+            drop=args.drop,
+            parallel=args.parallel
+        )
+        print(f"Seeded {', '.join(f'{count} {name}' for name, count in counts.items())} "
+              f"in {time.perf_counter() - started:.1f}s (password: {SEED_PASSWORD})")
+        return 0
+    finally:
+        await close_mongo_connection()
+
+def main():
+    parser = argparse.ArgumentParser(description="SportConnect synthetic data generator")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for 10k users / 50k events / 1M messages")
+    parser.add_argument("--users", type=int, help="number of users (overrides --scale)")
+    parser.add_argument("--events", type=int, help="number of events (overrides --scale)")
+    parser.add_argument("--messages", type=int, help="number of chat messages (overrides --scale)")
+    parser.add_argument("--friends-per-user", type=int, default=FRIENDS_PER_USER, help="mean friends per user")
+    parser.add_argument("--parallel", type=int, default=PARALLEL_BATCHES, help="insert_many batches in flight per collection")
+    parser.add_argument("--drop", action="store_true", help=f"delete {', '.join(SEEDED_COLLECTIONS)} first")
+    parser.add_argument("--seed", type=int, help="random seed for a reproducible dataset")
+    args = parser.parse_args()
+    random.seed(args.seed)
+    sys.exit(asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from typing import Any, Dict, Iterable, List, Type
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+# Per-model (field name, default factory) pairs, computed once per model
+_field_defaults: Dict[Type[BaseModel], List[tuple]] = {}
+
+def _get_field_defaults(model: Type[BaseModel]) -> List[tuple]:
+    if model not in _field_defaults:
+        _field_defaults[model] = [
+            (name, lambda field=field: field.get_default(call_default_factory=True))
+            for name, field in model.model_fields.items()
+        ]
+    return _field_defaults[model]
+
+def project_rows(model: Type[BaseModel], rows: Iterable[dict]) -> List[dict]:
+    """Shape documents validated on write to a model's fields without re-validating"""
+    # Extra keys are dropped and missing keys get model defaults, like response_model filtering
+    fields = _get_field_defaults(model)
+    return [
+        {name: row[name] if name in row else default() for name, default in fields}
+        for row in rows
+    ]
+
+def fast_json_response(content: Any, status_code: int = 200) -> ORJSONResponse:
+    """Return JSON-ready content directly, bypassing response_model validation"""
+    return ORJSONResponse(content=content, status_code=status_code)
@@ -1,12 +1,15 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.responses import ORJSONResponse, StreamingResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import os
+import re
+import asyncio
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
 
 # Import local modules
@@ -14,34 +17,73 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from models import *
-from database import connect_to_mongo, close_mongo_connection, get_document, get_documents, create_document, update_document, delete_document, count_documents, aggregate_documents
-from auth import authenticate_user, create_access_token, get_current_user, get_current_user_optional, get_password_hash, verify_password
-from sports_data import get_all_sports, get_sport_by_id
-from utils import generate_id, validate_date_format, validate_time_format, is_valid_base64_image, generate_avatar_base64, calculate_mutual_events, generate_event_tags, sanitize_text, get_user_badges
-
 ROOT_DIR = Path(__file__).parent
+# The local modules read their settings from the environment on import
 load_dotenv(ROOT_DIR / '.env')
 
+from models import *
+from database import connect_to_mongo, close_mongo_connection, get_database, get_document, get_documents, create_document, create_documents, update_document, delete_document, aggregate_documents
+from auth import authenticate_user, create_access_token, get_current_user, get_current_user_optional, get_user_from_token, get_password_hash, verify_password
+from sports_data import get_sport_by_id, get_catalog, reload_sports_catalog, refresh_sports_catalog_periodically, SPORTS_CATALOG_SOURCE
+from conditional import make_etag, is_not_modified, set_validators, not_modified_response
+from geo import geocode, geocode_event, parse_near, near_query, MAX_RADIUS_KM
+from event_stream import event_broker, publish_event_change, watch_event_changes, stream_deltas, EVENT_STREAM_SOURCE
+from feed import feed_index, get_feed
+from lifecycle import run_lifecycle_worker, LIFECYCLE_WORKER_ENABLED
+from waitlist import take_spot, add_to_waitlist, leave_waitlist, leave_and_promote, update_and_promote, get_waitlist_position
+from notifications import notification_queue, NotificationType, encode_cursor, decode_cursor, inbox_query, count_unread, mark_read
+from presence import mark_online, mark_connected, refresh_connection, mark_disconnected, get_statuses, PRESENCE_TTL
+from metrics import MetricsMiddleware, render_metrics, METRICS_ENABLED
+from profiler import query_profiler, run_profile_flusher, DB_PROFILER_ENABLED
+from log_config import configure_logging, stop_logging, RequestIdMiddleware
+from ratelimit import admission_control
+from user_stats import increment_user_counters, get_stats_document
+from analytics import event_analytics, run_analytics_flusher, AnalyticsField, event_summary_pipeline, timeline_pipeline
+from leaderboards import record_activity, record_events_activity, get_leaderboard, current_week, run_leaderboard_rebuilder, LEADERBOARD_REBUILD_ENABLED
+from serialization import project_rows, fast_json_response
+from cache import cache_lookup, cache_store, invalidate_namespace, EVENTS_CACHE_TTL
+from utils import generate_id, validate_date_format, validate_time_format, is_valid_base64_image, generate_avatar_base64, calculate_mutual_events, generate_event_tags, sanitize_text, format_datetime_for_db, local_day_start
+
+# Titles and names of test fixtures hidden from listings, a compiled pattern is the form $not accepts on every server version
+TEST_DATA_PATTERN = re.compile("test|temp|cyej2r1l", re.IGNORECASE)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    background_tasks = []
+    if SPORTS_CATALOG_SOURCE == "mongo":
+        await reload_sports_catalog()
+        background_tasks.append(asyncio.create_task(refresh_sports_catalog_periodically()))
+    if LIFECYCLE_WORKER_ENABLED:
+        background_tasks.append(asyncio.create_task(run_lifecycle_worker()))
+    if EVENT_STREAM_SOURCE == "changestream":
+        background_tasks.append(asyncio.create_task(watch_event_changes()))
+    notification_worker = asyncio.create_task(notification_queue.run())
+    background_tasks.append(asyncio.create_task(run_analytics_flusher()))
+    if DB_PROFILER_ENABLED:
+        background_tasks.append(asyncio.create_task(run_profile_flusher()))
+    if LEADERBOARD_REBUILD_ENABLED:
+        background_tasks.append(asyncio.create_task(run_leaderboard_rebuilder()))
     yield
     # Shutdown
+    for task in background_tasks:
+        task.cancel()
+    await notification_queue.stop(notification_worker)
+    await event_analytics.flush(await get_database())
+    if DB_PROFILER_ENABLED:
+        await query_profiler.flush(await get_database())
     await close_mongo_connection()
+    stop_logging()
 
 # Create the main app with lifespan management
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
-# Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+# Create a router with the /api prefix, every route passes rate limiting and admission control
+api_router = APIRouter(prefix="/api", dependencies=[Depends(admission_control)])
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (LOG_FORMAT=json for structured output, written off the event loop)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Add CORS middleware
@@ -53,6 +95,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Outermost, so every log line of a request carries its id
+app.add_middleware(RequestIdMiddleware)
+
 # ============================================================================
 # AUTH ENDPOINTS
 # ============================================================================
@@ -90,11 +138,17 @@ async def register(user_data: UserCreate):
             "photo": user_data.photo if is_valid_base64_image(user_data.photo) else avatar,
             "events_participated": 0,
             "events_created": 0,
+            "friends_count": 0,
+            "messages_sent": 0,
             "badges": [],
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
         
+        point = geocode(user_doc["location"])
+        if point:
+            user_doc["geo"] = point
+        
         await create_document("users", user_doc)
         
         # Remove password from response
@@ -108,8 +162,8 @@ async def register(user_data: UserCreate):
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Registration error: {e}")
+    except Exception:
+        logger.exception("Registration error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Registration failed"
@@ -140,16 +194,25 @@ async def login(user_credentials: UserLogin):
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Login error: {e}")
+    except Exception:
+        logger.exception("Login error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Login failed"
         )
 
 @api_router.get("/auth/me", response_model=User)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
     """Get current user information"""
+    etag = make_etag("user", current_user.id, current_user.updated_at.isoformat())
+    if is_not_modified(request, etag, current_user.updated_at):
+        return not_modified_response(etag, current_user.updated_at)
+    
+    set_validators(response, etag, current_user.updated_at)
     return current_user
 
 # ============================================================================
@@ -164,6 +227,7 @@ async def update_profile(
     """Update user profile"""
     try:
         update_dict = {}
+        unset = []
         
         if update_data.name is not None:
             update_dict["name"] = sanitize_text(update_data.name)
@@ -171,6 +235,12 @@ async def update_profile(
             update_dict["age"] = update_data.age
         if update_data.location is not None:
             update_dict["location"] = sanitize_text(update_data.location)
+            point = geocode(update_dict["location"])
+            if point:
+                update_dict["geo"] = point
+            else:
+                # Near-me and feed distances would keep using the old place
+                unset.append("geo")
         if update_data.bio is not None:
             update_dict["bio"] = sanitize_text(update_data.bio)
         if update_data.sports is not None:
@@ -183,7 +253,8 @@ async def update_profile(
         update_dict["updated_at"] = datetime.utcnow()
         
         # Update user in database
-        success = await update_document("users", {"id": current_user.id}, update_dict)
+        success = await update_document("users", {"id": current_user.id}, update_dict, unset)
+        feed_index.invalidate(current_user.id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -199,35 +270,40 @@ async def update_profile(
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Profile update error: {e}")
+    except Exception:
+        logger.exception("Profile update error", extra={"user_id": current_user.id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Profile update failed"
         )
 
 @api_router.get("/users/stats", response_model=UserStats)
-async def get_user_stats(current_user: User = Depends(get_current_user)):
-    """Get user statistics"""
+async def get_user_stats(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """Get user statistics from the counters maintained on the user document"""
     try:
-        # Count friends
-        friends_count = await count_documents("friendships", {
-            "$or": [
-                {"user_id": current_user.id, "status": "accepted"},
-                {"friend_id": current_user.id, "status": "accepted"}
-            ]
-        })
-        
-        return UserStats(
-            events_participated=current_user.events_participated,
-            events_created=current_user.events_created,
-            badges_count=len(current_user.badges),
-            friends_count=friends_count,
-            sports_count=len(current_user.sports)
+        stats = await get_stats_document(current_user.id) or {}
+        user_stats = UserStats(
+            events_participated=max(0, stats.get("events_participated", 0)),
+            events_created=max(0, stats.get("events_created", 0)),
+            badges_count=len(stats.get("badges") or []),
+            friends_count=max(0, stats.get("friends_count", 0)),
+            sports_count=len(stats.get("sports") or []),
+            messages_sent=max(0, stats.get("messages_sent", 0))
         )
         
-    except Exception as e:
-        logger.error(f"Stats error: {e}")
+        etag = make_etag("stats", current_user.id, *user_stats.model_dump().values())
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        set_validators(response, etag)
+        
+        return user_stats
+        
+    except Exception:
+        logger.exception("Stats error", extra={"user_id": current_user.id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to get user stats"
@@ -237,15 +313,96 @@ async def get_user_stats(current_user: User = Depends(get_current_user)):
 # SPORTS ENDPOINTS
 # ============================================================================
 
+SPORTS_CACHE_CONTROL = "public, max-age=300"
+
 @api_router.get("/sports", response_model=List[Sport])
-async def get_sports():
+async def get_sports(request: Request):
     """Get all available sports"""
-    return [Sport(**sport) for sport in get_all_sports()]
+    # The catalog body is serialized once per reload, serve the bytes as-is
+    catalog = get_catalog()
+    if is_not_modified(request, catalog.etag):
+        return not_modified_response(catalog.etag, cache_control=SPORTS_CACHE_CONTROL)
+    
+    response = Response(content=catalog.body, media_type="application/json")
+    set_validators(response, catalog.etag, cache_control=SPORTS_CACHE_CONTROL)
+    return response
 
 # ============================================================================
 # EVENT ENDPOINTS
 # ============================================================================
 
+def validate_event_data(event_data: EventCreate):
+    """Validate fields pydantic cannot check on its own"""
+    # Validate date and time formats
+    if not validate_date_format(event_data.date):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+    
+    if not validate_time_format(event_data.time):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid time format. Use HH:MM"
+        )
+    
+    # Validate sport exists
+    if not get_sport_by_id(event_data.sport):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sport"
+        )
+
+def build_event_document(event_data: EventCreate, current_user: User) -> dict:
+    """Build a sanitized event document for the current user"""
+    event_doc = {
+        "id": generate_id(),
+        "title": sanitize_text(event_data.title),
+        "title_da": sanitize_text(event_data.title_da),
+        "sport": event_data.sport,
+        "date": event_data.date,
+        "time": event_data.time,
+        "starts_at": format_datetime_for_db(event_data.date, event_data.time),
+        "location": sanitize_text(event_data.location),
+        "address": sanitize_text(event_data.address),
+        "description": sanitize_text(event_data.description),
+        "description_da": sanitize_text(event_data.description_da),
+        "max_participants": event_data.max_participants,
+        "skill_level": event_data.skill_level,
+        "price": event_data.price,
+        "organizer_id": current_user.id,
+        "organizer_name": current_user.name,
+        "current_participants": 1,
+        "participants": [current_user.id],
+        "status": EventStatus.ACTIVE,
+        "tags": generate_event_tags(event_data.model_dump()),
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+    
+    point = geocode_event(event_doc["location"], event_doc["address"])
+    if point:
+        event_doc["geo"] = point
+    return event_doc
+
+def with_inserted_ids(inserted_ids: List[str], event_docs: List[dict]) -> List[dict]:
+    """Expose created events by the same id listings, the stream and the feed use"""
+    return [{**event_doc, "id": inserted_id} for inserted_id, event_doc in zip(inserted_ids, event_docs)]
+
+async def record_events_created(current_user: User, inserted_ids: List[str], event_docs: List[dict]):
+    """Propagate new events to caches, live streams, the feed, analytics, the organizer's counter and leaderboards"""
+    await invalidate_namespace("events")
+    for inserted_id, event_doc in zip(inserted_ids, event_docs):
+        publish_event_change("created", inserted_id, event_doc)
+        feed_index.on_event_created(inserted_id, event_doc)
+        event_analytics.record({**event_doc, "id": inserted_id}, AnalyticsField.CREATED)
+    
+    # Update user's events_created count with a single increment
+    await asyncio.gather(
+        increment_user_counters(current_user.id, events_created=len(event_docs)),
+        record_events_activity(event_docs, current_user.id, current_user.name, current_user.location)
+    )
+
 @api_router.post("/events", response_model=Event)
 async def create_event(
     event_data: EventCreate,
@@ -253,94 +410,142 @@ async def create_event(
 ):
     """Create a new event"""
     try:
-        # Validate date and time formats
-        if not validate_date_format(event_data.date):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid date format. Use YYYY-MM-DD"
-            )
+        validate_event_data(event_data)
+        event_doc = build_event_document(event_data, current_user)
         
-        if not validate_time_format(event_data.time):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid time format. Use HH:MM"
-            )
+        inserted_id = await create_document("events", event_doc)
+        await record_events_created(current_user, [inserted_id], [event_doc])
         
-        # Validate sport exists
-        if not get_sport_by_id(event_data.sport):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid sport"
-            )
+        return Event(**with_inserted_ids([inserted_id], [event_doc])[0])
         
-        # Generate event ID and tags
-        event_id = generate_id()
-        tags = generate_event_tags(event_data.dict())
-        
-        # Create event document
-        event_doc = {
-            "id": event_id,
-            "title": sanitize_text(event_data.title),
-            "title_da": sanitize_text(event_data.title_da),
-            "sport": event_data.sport,
-            "date": event_data.date,
-            "time": event_data.time,
-            "location": sanitize_text(event_data.location),
-            "address": sanitize_text(event_data.address),
-            "description": sanitize_text(event_data.description),
-            "description_da": sanitize_text(event_data.description_da),
-            "max_participants": event_data.max_participants,
-            "skill_level": event_data.skill_level,
-            "price": event_data.price,
-            "organizer_id": current_user.id,
-            "organizer_name": current_user.name,
-            "current_participants": 1,
-            "participants": [current_user.id],
-            "status": EventStatus.ACTIVE,
-            "tags": tags,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
-        
-        await create_document("events", event_doc)
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Event creation error", extra={"user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Event creation failed"
+        )
+
+# Days between occurrences for each recurrence rule
+RECURRENCE_INTERVAL_DAYS = {
+    RecurrenceRule.WEEKLY: 7,
+    RecurrenceRule.BIWEEKLY: 14,
+}
+
+@api_router.post("/events/series", response_model=List[Event])
+async def create_event_series(
+    series_data: EventSeriesCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """Create a recurring event series"""
+    try:
+        # Validate and sanitize the template once, occurrences only differ by date
+        validate_event_data(series_data)
+        template = build_event_document(series_data, current_user)
+        series_id = generate_id()
+        first_date = datetime.strptime(series_data.date, "%Y-%m-%d")
+        interval = RECURRENCE_INTERVAL_DAYS[series_data.recurrence]
+        
+        event_docs = []
+        for occurrence in range(series_data.occurrences):
+            date = (first_date + timedelta(days=interval * occurrence)).strftime("%Y-%m-%d")
+            event_docs.append({
+                **template,
+                "id": generate_id(),
+                "participants": list(template["participants"]),
+                "date": date,
+                "starts_at": format_datetime_for_db(date, series_data.time),
+                "series_id": series_id
+            })
+        
+        inserted_ids = await create_documents("events", event_docs)
+        await record_events_created(current_user, inserted_ids, event_docs)
+        
+        return fast_json_response(project_rows(Event, with_inserted_ids(inserted_ids, event_docs)))
         
-        # Update user's events_created count
-        await update_document(
-            "users", 
-            {"id": current_user.id}, 
-            {
-                "events_created": current_user.events_created + 1,
-                "badges": get_user_badges(current_user.events_participated, current_user.events_created + 1)
-            }
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Event series creation error", extra={"user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Event series creation failed"
         )
+
+@api_router.post("/events/bulk", response_model=List[Event])
+async def create_events_bulk(
+    bulk_data: EventBulkCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """Create several events in one request"""
+    try:
+        # Reject the whole batch before writing anything
+        for event_data in bulk_data.events:
+            validate_event_data(event_data)
+        event_docs = [build_event_document(event_data, current_user) for event_data in bulk_data.events]
         
-        return Event(**event_doc)
+        inserted_ids = await create_documents("events", event_docs)
+        await record_events_created(current_user, inserted_ids, event_docs)
+        
+        return fast_json_response(project_rows(Event, with_inserted_ids(inserted_ids, event_docs)))
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Event creation error: {e}")
+    except Exception:
+        logger.exception("Bulk event creation error", extra={"user_id": current_user.id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Event creation failed"
+            detail="Bulk event creation failed"
         )
 
-@api_router.get("/events", response_model=List[Event])
+def events_cache_key(sport, date_filter, skill_level, search, limit, skip, view, near=None, radius_km=None) -> tuple:
+    """Normalize get_events filters into a cache key tuple"""
+    sport = sport if sport and sport != "all" else None
+    skill_level = skill_level if skill_level and skill_level != "all" else None
+    search = search.strip().lower() if search and search.strip() else None
+    # Relative date filters resolve differently once the local day rolls over
+    day = local_day_start().isoformat() if date_filter else None
+    near = near.strip().lower() if near and near.strip() else None
+    radius_km = radius_km if near else None
+    return (sport, date_filter or None, day, skill_level, search, limit, skip, view, near, radius_km)
+
+# date_filter -> [start, end) in local days from today
+DATE_FILTER_DAYS = {
+    "today": (0, 1),
+    "tomorrow": (1, 2),
+    "thisWeek": (0, 8),
+}
+
+# Only the fields EventSummary needs, "_id" is returned by default and mapped to "id"
+EVENT_SUMMARY_PROJECTION = {field: 1 for field in EventSummary.model_fields if field != "id"}
+
+@api_router.get("/events", response_model=Union[List[Event], List[EventSummary]])
 async def get_events(
     sport: Optional[str] = Query(None),
     date_filter: Optional[str] = Query(None),
     skill_level: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
+    view: str = Query("full", pattern="^(full|summary)$"),
+    near: Optional[str] = Query(None, description='"lat,lng" or a Danish city name'),
+    radius_km: float = Query(25, gt=0, le=MAX_RADIUS_KM),
     limit: int = Query(50, le=100),
     skip: int = Query(0, ge=0)
 ):
     """Get events with filters - excluding test data"""
     try:
+        # Serve repeated listings from the response cache
+        cache_key, cached_events = await cache_lookup("events", events_cache_key(
+            sport, date_filter, skill_level, search, limit, skip, view, near, radius_km
+        ))
+        if cached_events is not None:
+            return fast_json_response(cached_events)
+        
         query = {
             "status": "active",
             # Exclude test events
-            "title": {"$not": {"$regex": "test|temp|cyej2r1l", "$options": "i"}},
-            "title_da": {"$not": {"$regex": "test|temp|cyej2r1l", "$options": "i"}}
+            "title": {"$not": TEST_DATA_PATTERN},
+            "title_da": {"$not": TEST_DATA_PATTERN}
         }
         
         if sport and sport != "all":
@@ -349,17 +554,9 @@ async def get_events(
         if skill_level and skill_level != "all":
             query["skill_level"] = {"$in": [skill_level, "all"]}
         
-        if date_filter:
-            today = datetime.utcnow().strftime("%Y-%m-%d")
-            tomorrow = (datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d")
-            week_end = (datetime.utcnow() + timedelta(days=7)).strftime("%Y-%m-%d")
-            
-            if date_filter == "today":
-                query["date"] = today
-            elif date_filter == "tomorrow":
-                query["date"] = tomorrow
-            elif date_filter == "thisWeek":
-                query["date"] = {"$lte": week_end, "$gte": today}
+        if date_filter in DATE_FILTER_DAYS:
+            start_day, end_day = DATE_FILTER_DAYS[date_filter]
+            query["starts_at"] = {"$gte": local_day_start(start_day), "$lt": local_day_start(end_day)}
         
         if search:
             query["$or"] = [
@@ -370,25 +567,73 @@ async def get_events(
                 {"description_da": {"$regex": search, "$options": "i"}}
             ]
         
+        # Nearby search uses the 2dsphere index and sorts by distance
+        sort = [("starts_at", 1)]
+        if near:
+            point = parse_near(near)
+            if not point:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Unknown location for near filter"
+                )
+            query["geo"] = near_query(point, radius_km)
+            sort = None
+        
+        summary = view == "summary"
         events = await get_documents(
             "events", 
             query, 
             limit=limit, 
             skip=skip,
-            sort=[("date", 1), ("time", 1)]
+            sort=sort,
+            projection=EVENT_SUMMARY_PROJECTION if summary else None
         )
         
-        return [Event(**event) for event in events]
+        # Events were validated on create, skip per-row model construction
+        event_rows = project_rows(EventSummary if summary else Event, events)
+        await cache_store(cache_key, event_rows, EVENTS_CACHE_TTL)
+        return fast_json_response(event_rows)
         
-    except Exception as e:
-        logger.error(f"Events fetch error: {e}")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Events fetch error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch events"
         )
 
+@api_router.get("/events/feed", response_model=List[FeedEvent])
+async def get_event_feed(
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=50)
+):
+    """Get upcoming events ranked for the current user"""
+    try:
+        return fast_json_response(await get_feed(current_user.id, limit))
+    except Exception:
+        logger.exception("Event feed error", extra={"user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to build event feed"
+        )
+
+@api_router.get("/events/stream")
+async def stream_events(
+    request: Request,
+    sport: Optional[str] = Query(None, description="Comma separated sport ids")
+):
+    """Stream participant count and status changes as server-sent events"""
+    sports = {s.strip() for s in sport.split(",") if s.strip() and s.strip() != "all"} if sport else None
+    subscriber = event_broker.subscribe(sports or None)
+    return StreamingResponse(
+        stream_deltas(subscriber, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @api_router.get("/events/{event_id}", response_model=EventWithParticipants)
-async def get_event(event_id: str):
+async def get_event(event_id: str, request: Request, response: Response):
     """Get event by ID with participant details"""
     try:
         # Convert to ObjectId for MongoDB query
@@ -405,6 +650,12 @@ async def get_event(event_id: str):
                 detail="Event not found"
             )
         
+        # Answer revalidation before loading participants
+        etag = make_etag("event", event["id"], event["updated_at"].isoformat())
+        if is_not_modified(request, etag, event["updated_at"]):
+            return not_modified_response(etag, event["updated_at"], cache_control="public, no-cache")
+        set_validators(response, etag, event["updated_at"], cache_control="public, no-cache")
+        
         # Get participant details
         participant_details = []
         if event["participants"]:
@@ -422,19 +673,215 @@ async def get_event(event_id: str):
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Event fetch error: {e}")
+    except Exception:
+        logger.exception("Event fetch error", extra={"event_id": event_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch event"
         )
 
+# Changing any of these can change generate_event_tags output
+EVENT_TAG_FIELDS = {"price", "location", "sport", "skill_level"}
+EVENT_TEXT_FIELDS = {"title", "title_da", "location", "address", "description", "description_da"}
+
+async def get_organized_event(event_id: str, current_user: User) -> dict:
+    """Load an active event the current user organizes"""
+    event = await get_document("events", {"id": event_id})
+    if not event:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+    
+    if event["organizer_id"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the organizer can change this event"
+        )
+    
+    if event["status"] != EventStatus.ACTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only active events can be changed"
+        )
+    return event
+
+@api_router.patch("/events/{event_id}", response_model=Event)
+async def update_event(
+    event_id: str,
+    update_data: EventUpdate,
+    current_user: User = Depends(get_current_user)
+):
+    """Update an event (organizer only)"""
+    try:
+        event = await get_organized_event(event_id, current_user)
+        
+        # Only fields that were sent and actually differ are written
+        changes = update_data.model_dump(mode="json", exclude_unset=True, exclude_none=True)
+        for field in EVENT_TEXT_FIELDS & changes.keys():
+            changes[field] = sanitize_text(changes[field])
+        changes = {field: value for field, value in changes.items() if event.get(field) != value}
+        if not changes:
+            return Event(**event)
+        
+        if "date" in changes and not validate_date_format(changes["date"]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid date format. Use YYYY-MM-DD"
+            )
+        if "time" in changes and not validate_time_format(changes["time"]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid time format. Use HH:MM"
+            )
+        if "sport" in changes and not get_sport_by_id(changes["sport"]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid sport"
+            )
+        if changes.get("max_participants", event["max_participants"]) < event["current_participants"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="max_participants cannot be below the current participant count"
+            )
+        
+        update_dict = dict(changes)
+        unset = []
+        updated_event = {**event, **changes}
+        if changes.keys() & {"date", "time"}:
+            update_dict["starts_at"] = format_datetime_for_db(updated_event["date"], updated_event["time"])
+        if changes.keys() & {"location", "address"}:
+            point = geocode_event(updated_event["location"], updated_event["address"])
+            if point:
+                update_dict["geo"] = point
+            else:
+                # The old point would keep the event in nearby searches for its previous place
+                unset.append("geo")
+                updated_event.pop("geo", None)
+        if changes.keys() & EVENT_TAG_FIELDS:
+            update_dict["tags"] = generate_event_tags(updated_event)
+        update_dict["updated_at"] = datetime.utcnow()
+        updated_event.update(update_dict)
+        
+        if "max_participants" in changes:
+            # Added seats go to the head of the waitlist in the same write
+            promoted = await update_and_promote(event, dict(update_dict), unset)
+            if promoted is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Participants changed during the update, please retry"
+                )
+        else:
+            promoted = []
+            await update_document("events", {"id": event["id"]}, dict(update_dict), unset)
+        if promoted:
+            updated_event["participants"] = event["participants"] + promoted
+            updated_event["waitlist"] = [user_id for user_id in event["waitlist"] if user_id not in promoted]
+            updated_event["current_participants"] = len(updated_event["participants"])
+        
+        await invalidate_namespace("events")
+        publish_event_change("updated", event["id"], updated_event)
+        feed_index.on_event_updated(updated_event)
+        if changes.keys() & {"title", "max_participants"}:
+            event_analytics.record(updated_event)
+        await record_promotions(updated_event, promoted)
+        
+        notification_queue.enqueue(
+            event["participants"],
+            NotificationType.EVENT_UPDATED,
+            {"event_id": event["id"], "title": updated_event["title"], "changed": sorted(changes)},
+            actor_id=current_user.id
+        )
+        
+        return Event(**updated_event)
+        
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Event update error", extra={"event_id": event_id, "user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Event update failed"
+        )
+
+@api_router.post("/events/{event_id}/cancel")
+async def cancel_event(
+    event_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel an event (organizer only)"""
+    try:
+        event = await get_organized_event(event_id, current_user)
+        
+        await update_document("events", {"id": event["id"]}, {
+            "status": EventStatus.CANCELLED,
+            "updated_at": datetime.utcnow()
+        })
+        await invalidate_namespace("events")
+        publish_event_change("updated", event["id"], {**event, "status": EventStatus.CANCELLED})
+        feed_index.on_events_closed([event["id"]])
+        
+        notification_queue.enqueue(
+            event["participants"] + (event.get("waitlist") or []),
+            NotificationType.EVENT_CANCELLED,
+            {"event_id": event["id"], "title": event["title"], "date": event["date"], "time": event["time"]},
+            actor_id=current_user.id
+        )
+        
+        return {"message": "Event cancelled successfully"}
+        
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Event cancel error", extra={"event_id": event_id, "user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to cancel event"
+        )
+
+async def record_participation_change(event: dict, user_id: str, joined: bool, participants: list):
+    """Propagate a join or leave to caches, live streams and the feed"""
+    updated_event = {**event, "participants": participants, "current_participants": len(participants)}
+    await invalidate_namespace("events")
+    publish_event_change("updated", event["id"], updated_event)
+    feed_index.on_participation_changed(updated_event, user_id, joined)
+
+async def record_promotions(event: dict, promoted_ids: List[str]):
+    """Feed, analytics, notifications, counters and leaderboards for users moved off the waitlist"""
+    if not promoted_ids:
+        return
+    promoted_users = await get_documents(
+        "users", {"id": {"$in": promoted_ids}}, projection={"name": 1, "location": 1}
+    )
+    for user in promoted_users:
+        feed_index.on_participation_changed(event, user["id"], True)
+        event_analytics.record(event, AnalyticsField.JOINS)
+        notification_queue.enqueue(
+            [user["id"]],
+            NotificationType.WAITLIST_PROMOTED,
+            {"event_id": event["id"], "title": event["title"], "date": event["date"], "time": event["time"]}
+        )
+        notification_queue.enqueue(
+            [event["organizer_id"]],
+            NotificationType.EVENT_JOINED,
+            {"event_id": event["id"], "title": event["title"], "user_id": user["id"], "user_name": user["name"]},
+            actor_id=user["id"]
+        )
+    await asyncio.gather(*(
+        update
+        for user in promoted_users
+        for update in (
+            increment_user_counters(user["id"], events_participated=1),
+            record_activity(event, user["id"], 1, user["name"], user.get("location"))
+        )
+    ))
+
 @api_router.post("/events/{event_id}/join")
 async def join_event(
     event_id: str,
     current_user: User = Depends(get_current_user)
 ):
-    """Join an event"""
+    """Join an event, or its waitlist when the event is full"""
     try:
         # Get event
         event = await get_document("events", {"id": event_id})
@@ -444,48 +891,56 @@ async def join_event(
                 detail="Event not found"
             )
         
-        # Check if already joined
-        if current_user.id in event["participants"]:
+        if event["status"] != EventStatus.ACTIVE:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Already joined this event"
+                detail="Only active events can be joined"
             )
         
-        # Check if event is full
-        if len(event["participants"]) >= event["max_participants"]:
+        # Check if already joined
+        if current_user.id in event["participants"]:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Event is full"
+                detail="Already joined this event"
             )
         
-        # Add user to participants
-        updated_participants = event["participants"] + [current_user.id]
-        await update_document(
-            "events",
-            {"id": event_id},
-            {
-                "participants": updated_participants,
-                "current_participants": len(updated_participants),
-                "updated_at": datetime.utcnow()
-            }
+        # Check if already waiting
+        position = get_waitlist_position(event, current_user.id)
+        if position:
+            return {"message": "Already on the waitlist", "waitlisted": True, "waitlist_position": position}
+        
+        # Take a spot atomically, fall back to the waitlist if the event is full
+        if not await take_spot(event, current_user.id):
+            position = await add_to_waitlist(event, current_user.id)
+            if position is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Event is full"
+                )
+            event_analytics.record(event, AnalyticsField.WAITLISTED)
+            return {"message": "Event is full, added to waitlist", "waitlisted": True, "waitlist_position": position}
+        
+        await record_participation_change(event, current_user.id, True, event["participants"] + [current_user.id])
+        event_analytics.record(event, AnalyticsField.JOINS)
+        notification_queue.enqueue(
+            [event["organizer_id"]],
+            NotificationType.EVENT_JOINED,
+            {"event_id": event["id"], "title": event["title"], "user_id": current_user.id, "user_name": current_user.name},
+            actor_id=current_user.id
         )
         
-        # Update user's events_participated count
-        await update_document(
-            "users",
-            {"id": current_user.id},
-            {
-                "events_participated": current_user.events_participated + 1,
-                "badges": get_user_badges(current_user.events_participated + 1, current_user.events_created)
-            }
+        # Update user's events_participated count and leaderboard scores
+        await asyncio.gather(
+            increment_user_counters(current_user.id, events_participated=1),
+            record_activity(event, current_user.id, 1, current_user.name, current_user.location)
         )
         
-        return {"message": "Successfully joined event"}
+        return {"message": "Successfully joined event", "waitlisted": False}
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Join event error: {e}")
+    except Exception:
+        logger.exception("Join event error", extra={"event_id": event_id, "user_id": current_user.id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to join event"
@@ -496,7 +951,7 @@ async def leave_event(
     event_id: str,
     current_user: User = Depends(get_current_user)
 ):
-    """Leave an event"""
+    """Leave an event or its waitlist"""
     try:
         # Get event
         event = await get_document("events", {"id": event_id})
@@ -506,6 +961,17 @@ async def leave_event(
                 detail="Event not found"
             )
         
+        # Waiting users just drop out of the queue
+        if get_waitlist_position(event, current_user.id):
+            await leave_waitlist(event, current_user.id)
+            return {"message": "Successfully left waitlist"}
+        
+        if event["status"] != EventStatus.ACTIVE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Only active events can be left"
+            )
+        
         # Check if user is in participants
         if current_user.id not in event["participants"]:
             raise HTTPException(
@@ -520,40 +986,68 @@ async def leave_event(
                 detail="Organizer cannot leave their own event"
             )
         
-        # Remove user from participants
-        updated_participants = [p for p in event["participants"] if p != current_user.id]
-        await update_document(
-            "events",
-            {"id": event_id},
-            {
-                "participants": updated_participants,
-                "current_participants": len(updated_participants),
-                "updated_at": datetime.utcnow()
-            }
-        )
+        # Remove user and promote the next waiting user in one update
+        left, promoted_id, updated_participants = await leave_and_promote(event, current_user.id)
+        if not left:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Not joined in this event"
+            )
+        await record_participation_change(event, current_user.id, False, updated_participants)
+        event_analytics.record(event, AnalyticsField.LEAVES)
         
-        # Update user's events_participated count
-        new_count = max(0, current_user.events_participated - 1)
-        await update_document(
-            "users",
-            {"id": current_user.id},
-            {
-                "events_participated": new_count,
-                "badges": get_user_badges(new_count, current_user.events_created)
-            }
+        # Update user's events_participated count and leaderboard scores
+        await asyncio.gather(
+            increment_user_counters(current_user.id, events_participated=-1),
+            record_activity(event, current_user.id, -1, current_user.name, current_user.location)
         )
         
+        if promoted_id:
+            await record_promotions(
+                {**event, "participants": updated_participants, "current_participants": len(updated_participants)},
+                [promoted_id]
+            )
+        
         return {"message": "Successfully left event"}
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Leave event error: {e}")
+    except Exception:
+        logger.exception("Leave event error", extra={"event_id": event_id, "user_id": current_user.id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to leave event"
         )
 
+@api_router.get("/events/{event_id}/waitlist", response_model=WaitlistStatus)
+async def get_event_waitlist(
+    event_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the current user's waitlist position for an event"""
+    try:
+        event = await get_document("events", {"id": event_id})
+        if not event:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Event not found"
+            )
+        
+        return WaitlistStatus(
+            event_id=event["id"],
+            position=get_waitlist_position(event, current_user.id),
+            length=len(event.get("waitlist") or [])
+        )
+        
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Waitlist fetch error", extra={"event_id": event_id, "user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch waitlist"
+        )
+
 # ============================================================================
 # MESSAGE ENDPOINTS  
 # ============================================================================
@@ -586,12 +1080,12 @@ async def get_event_messages(
             sort=[("created_at", 1)]
         )
         
-        return [Message(**msg) for msg in messages]
+        return fast_json_response(project_rows(Message, messages))
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Messages fetch error: {e}")
+    except Exception:
+        logger.exception("Messages fetch error", extra={"event_id": event_id, "user_id": current_user.id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch messages"
@@ -632,13 +1126,22 @@ async def create_message(
         }
         
         await create_document("messages", message_doc)
+        await increment_user_counters(current_user.id, messages_sent=1)
+        event_analytics.record(event, AnalyticsField.MESSAGES)
+        notification_queue.enqueue(
+            event["participants"],
+            NotificationType.EVENT_MESSAGE,
+            {"event_id": event_id, "title": event["title"], "user_name": current_user.name, "message": message_doc["message"][:140]},
+            actor_id=current_user.id,
+            group=f"messages:{event_id}"
+        )
         
         return Message(**message_doc)
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Message creation error: {e}")
+    except Exception:
+        logger.exception("Message creation error", extra={"event_id": event_id, "user_id": current_user.id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create message"
@@ -671,8 +1174,11 @@ async def get_friends(current_user: User = Depends(get_current_user)):
         if not friend_ids:
             return []
         
-        # Get friend details
-        friends = await get_documents("users", {"id": {"$in": friend_ids}})
+        # Get friend details and their presence in one lookup each
+        friends, statuses = await asyncio.gather(
+            get_documents("users", {"id": {"$in": friend_ids}}),
+            get_statuses(friend_ids)
+        )
         
         # Calculate mutual events for each friend
         friend_infos = []
@@ -685,22 +1191,21 @@ async def get_friends(current_user: User = Depends(get_current_user)):
             friend_event_ids = [e["id"] for e in friend_events]
             mutual_events = calculate_mutual_events(user_event_ids, friend_event_ids)
             
-            friend_info = FriendInfo(
-                id=friend["id"],
-                name=friend["name"],
-                photo=friend.get("photo"),
-                location=friend["location"],
-                sports=friend.get("sports", []),
-                age=friend["age"],
-                status="offline",  # In real app, this would be from online status
-                mutual_events=mutual_events
-            )
-            friend_infos.append(friend_info)
-        
-        return friend_infos
-        
-    except Exception as e:
-        logger.error(f"Friends fetch error: {e}")
+            friend_infos.append({
+                "id": friend["id"],
+                "name": friend["name"],
+                "photo": friend.get("photo"),
+                "location": friend["location"],
+                "sports": friend.get("sports", []),
+                "age": friend["age"],
+                "status": statuses.get(friend["id"], "offline"),
+                "mutual_events": mutual_events
+            })
+        
+        return fast_json_response(friend_infos)
+        
+    except Exception:
+        logger.exception("Friends fetch error", extra={"user_id": current_user.id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch friends"
@@ -736,8 +1241,8 @@ async def get_friend_suggestions(
         base_query = {
             "id": {"$nin": exclude_ids},
             # Exclude test users
-            "name": {"$not": {"$regex": "test|temp|cyej2r1l", "$options": "i"}},
-            "email": {"$not": {"$regex": "test|temp|cyej2r1l", "$options": "i"}}
+            "name": {"$not": TEST_DATA_PATTERN},
+            "email": {"$not": TEST_DATA_PATTERN}
         }
         
         # Add search filter if provided
@@ -761,8 +1266,8 @@ async def get_friend_suggestions(
         if len(suggestions) < limit and not search:
             additional_query = {
                 "id": {"$nin": exclude_ids + [s["id"] for s in suggestions]},
-                "name": {"$not": {"$regex": "test|temp|cyej2r1l", "$options": "i"}},
-                "email": {"$not": {"$regex": "test|temp|cyej2r1l", "$options": "i"}}
+                "name": {"$not": TEST_DATA_PATTERN},
+                "email": {"$not": TEST_DATA_PATTERN}
             }
             additional = await get_documents(
                 "users",
@@ -771,6 +1276,8 @@ async def get_friend_suggestions(
             )
             suggestions.extend(additional)
         
+        statuses = await get_statuses(user["id"] for user in suggestions)
+        
         # Convert to FriendInfo
         friend_suggestions = []
         for user in suggestions:
@@ -781,15 +1288,15 @@ async def get_friend_suggestions(
                 location=user["location"],
                 sports=user.get("sports", []),
                 age=user["age"],
-                status="offline",
+                status=statuses.get(user["id"], "offline"),
                 mutual_events=0
             )
             friend_suggestions.append(friend_info)
         
         return friend_suggestions
         
-    except Exception as e:
-        logger.error(f"Friend suggestions error: {e}")
+    except Exception:
+        logger.exception("Friend suggestions error", extra={"user_id": current_user.id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to get friend suggestions"
@@ -842,13 +1349,23 @@ async def add_friend(
         }
         
         await create_document("friendships", friendship_doc)
+        feed_index.invalidate(current_user.id, target_user["id"])
+        await asyncio.gather(
+            increment_user_counters(current_user.id, friends_count=1),
+            increment_user_counters(target_user["id"], friends_count=1)
+        )
+        notification_queue.enqueue(
+            [target_user["id"]],
+            NotificationType.FRIEND_ADDED,
+            {"user_id": current_user.id, "user_name": current_user.name, "photo": current_user.photo}
+        )
         
         return {"message": "Friend added successfully"}
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Add friend error: {e}")
+    except Exception:
+        logger.exception("Add friend error", extra={"user_id": current_user.id, "friend_id": user_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to add friend"
@@ -874,18 +1391,243 @@ async def remove_friend(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Friendship not found"
             )
+        feed_index.invalidate(current_user.id, user_id)
+        await asyncio.gather(
+            increment_user_counters(current_user.id, friends_count=-1),
+            increment_user_counters(user_id, friends_count=-1)
+        )
         
         return {"message": "Friend removed successfully"}
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Remove friend error: {e}")
+    except Exception:
+        logger.exception("Remove friend error", extra={"user_id": current_user.id, "friend_id": user_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to remove friend"
         )
 
+# ============================================================================
+# PRESENCE ENDPOINTS
+# ============================================================================
+
+@api_router.post("/presence/heartbeat")
+async def presence_heartbeat(current_user: User = Depends(get_current_user)):
+    """Keep the current user online for another PRESENCE_TTL seconds"""
+    await mark_online(current_user.id)
+    return {"status": "online", "expires_in": PRESENCE_TTL}
+
+@api_router.websocket("/presence/ws")
+async def presence_socket(websocket: WebSocket, token: str = Query(...)):
+    """Keep the user online while the socket is open"""
+    user = await get_user_from_token(token)
+    if user is None:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    await mark_connected(user.id)
+    try:
+        while True:
+            # Any client message or a quiet half-TTL keeps the connection counted
+            try:
+                await asyncio.wait_for(websocket.receive_text(), PRESENCE_TTL / 2)
+            except asyncio.TimeoutError:
+                pass
+            await refresh_connection(user.id)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Only this socket goes away, other tabs and heartbeats keep the user online
+        await mark_disconnected(user.id)
+
+# ============================================================================
+# LEADERBOARD ENDPOINTS
+# ============================================================================
+
+@api_router.get("/leaderboards/{board}", response_model=Leaderboard)
+async def get_leaderboard_entries(
+    board: LeaderboardType,
+    current_user: User = Depends(get_current_user),
+    key: Optional[str] = Query(None, description="Sport id, location or ISO week (e.g. 2026-W42)"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Most active users for a sport, a location (default: yours) or a week (default: this week)"""
+    try:
+        if key is None:
+            if board == LeaderboardType.SPORT:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="A sport id is required"
+                )
+            key = current_user.location if board == LeaderboardType.LOCATION else current_week()
+        
+        rows = await get_leaderboard(board.value, key, limit)
+        return Leaderboard(
+            board=board,
+            key=key,
+            entries=[LeaderboardEntry(rank=rank, **row) for rank, row in enumerate(rows, start=1)]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Leaderboard fetch error", extra={"user_id": current_user.id, "board": board.value})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch leaderboard"
+        )
+
+# ============================================================================
+# ORGANIZER ANALYTICS ENDPOINTS
+# ============================================================================
+
+def build_event_summary(row: dict) -> EventAnalyticsSummary:
+    return EventAnalyticsSummary(event_id=row.pop("id"), fill_rate=round(row.pop("fill_rate"), 3), **row)
+
+@api_router.get("/analytics/organizer", response_model=OrganizerAnalytics)
+async def get_organizer_analytics(current_user: User = Depends(get_current_user)):
+    """Activity and fill rate of every event the current user organizes"""
+    try:
+        rows = await aggregate_documents("event_analytics", event_summary_pipeline(current_user.id))
+        summaries = [build_event_summary(row) for row in rows]
+        
+        totals = EventActivityCounts(**{
+            field: sum(getattr(summary, field) for summary in summaries)
+            for field in EventActivityCounts.model_fields
+        })
+        average_fill_rate = sum(summary.fill_rate for summary in summaries) / len(summaries) if summaries else 0.0
+        
+        return OrganizerAnalytics(
+            events_count=len(summaries),
+            average_fill_rate=round(average_fill_rate, 3),
+            totals=totals,
+            events=summaries
+        )
+        
+    except Exception:
+        logger.exception("Organizer analytics error", extra={"user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch analytics"
+        )
+
+@api_router.get("/analytics/events/{event_id}", response_model=EventAnalyticsSummary)
+async def get_event_analytics(
+    event_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Activity and fill rate of one of the current user's events"""
+    try:
+        rows = await aggregate_documents("event_analytics", event_summary_pipeline(current_user.id, event_id))
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No analytics for this event"
+            )
+        return build_event_summary(rows[0])
+        
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Event analytics error", extra={"event_id": event_id, "user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch analytics"
+        )
+
+@api_router.get("/analytics/events/{event_id}/timeline", response_model=EventAnalyticsTimeline)
+async def get_event_analytics_timeline(
+    event_id: str,
+    current_user: User = Depends(get_current_user),
+    interval: str = Query("day", pattern="^(hour|day)$"),
+    days: int = Query(30, ge=1, le=365)
+):
+    """Joins, leaves, waitlist entries and messages per hour or day for one of the current user's events"""
+    try:
+        since = datetime.utcnow() - timedelta(days=days)
+        rows = await aggregate_documents("event_analytics", timeline_pipeline(current_user.id, event_id, interval, since))
+        return EventAnalyticsTimeline(
+            event_id=event_id,
+            interval=interval,
+            points=[AnalyticsTimelinePoint(bucket=row.pop("id"), **row) for row in rows]
+        )
+        
+    except Exception:
+        logger.exception("Event analytics timeline error", extra={"event_id": event_id, "user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch analytics timeline"
+        )
+
+# ============================================================================
+# NOTIFICATION ENDPOINTS
+# ============================================================================
+
+@api_router.get("/notifications", response_model=NotificationPage)
+async def get_notifications(
+    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    unread_only: bool = False
+):
+    """Get the current user's inbox, newest first, with the unread count"""
+    try:
+        before = None
+        if cursor:
+            before = decode_cursor(cursor)
+            if before is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+        
+        notifications, unread_count = await asyncio.gather(
+            get_documents(
+                "notifications",
+                inbox_query(current_user.id, before, unread_only),
+                limit=limit + 1,
+                sort=[("updated_at", -1), ("_id", -1)],
+                projection={"user_id": 0, "group": 0}
+            ),
+            count_unread(current_user.id)
+        )
+        
+        # The extra row only tells whether another page exists
+        next_cursor = encode_cursor(notifications[limit - 1]) if len(notifications) > limit else None
+        return fast_json_response({
+            "notifications": project_rows(Notification, notifications[:limit]),
+            "unread_count": unread_count,
+            "next_cursor": next_cursor
+        })
+        
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Notifications fetch error", extra={"user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch notifications"
+        )
+
+@api_router.post("/notifications/read")
+async def read_notifications(
+    read_data: NotificationRead,
+    current_user: User = Depends(get_current_user)
+):
+    """Mark notifications read, all of them when no ids are given"""
+    try:
+        updated = await mark_read(current_user.id, read_data.ids)
+        return {"message": "Notifications marked as read", "updated": updated}
+        
+    except Exception:
+        logger.exception("Notifications read error", extra={"user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to mark notifications read"
+        )
+
 # Utility endpoint to clean ALL test data more thoroughly
 @api_router.delete("/admin/cleanup-test-data")
 async def cleanup_test_data(current_user: User = Depends(get_current_user)):
@@ -928,6 +1670,22 @@ async def cleanup_test_data(current_user: User = Depends(get_current_user)):
         # Delete all friendships
         friendships_result = await db.friendships.delete_many({})
         
+        # Delete all notifications
+        notifications_result = await db.notifications.delete_many({})
+        
+        # Counters on the remaining users described the deleted data
+        await db.users.update_many({}, {"$set": {
+            "events_participated": 0,
+            "events_created": 0,
+            "friends_count": 0,
+            "messages_sent": 0,
+            "badges": []
+        }})
+        
+        # Leaderboards and analytics only hold data from the deleted events
+        leaderboards_result = await db.leaderboards.delete_many({})
+        analytics_result = await db.event_analytics.delete_many({})
+        
         client.close()
         
         return {
@@ -936,15 +1694,18 @@ async def cleanup_test_data(current_user: User = Depends(get_current_user)):
                 "test_users": users_result.deleted_count,
                 "events": events_result.deleted_count,
                 "messages": messages_result.deleted_count,
-                "friendships": friendships_result.deleted_count
+                "friendships": friendships_result.deleted_count,
+                "notifications": notifications_result.deleted_count,
+                "leaderboards": leaderboards_result.deleted_count,
+                "event_analytics": analytics_result.deleted_count
             },
             "remaining_real_users": real_user_emails
         }
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Cleanup error: {e}")
+    except Exception:
+        logger.exception("Cleanup error", extra={"user_id": current_user.id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to cleanup test data: {str(e)}"
@@ -961,5 +1722,12 @@ async def delete_documents(collection_name: str, query: dict):
 async def root():
     return {"message": "SportConnect API is running!"}
 
+# Prometheus scrape endpoint, outside /api so it stays off the public router
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Include the router in the main app
 app.include_router(api_router)
\ No newline at end of file
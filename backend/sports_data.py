@@ -1,3 +1,18 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Set SPORTS_CATALOG_SOURCE=mongo to merge sports from the "sports" collection
+SPORTS_CATALOG_SOURCE = os.environ.get("SPORTS_CATALOG_SOURCE", "static")
+SPORTS_CATALOG_REFRESH_SECONDS = int(os.environ.get("SPORTS_CATALOG_REFRESH_SECONDS", "300"))
+SPORT_FIELDS = ("id", "name", "name_da", "icon", "color")
+
 # Sports data that will be used in the application
 SPORTS_DATA = [
     {
@@ -51,10 +66,62 @@ SPORTS_DATA = [
     }
 ]
 
-def get_sport_by_id(sport_id: str):
+class SportsCatalog:
+    """Immutable snapshot of the sports catalog, indexed by id and pre-serialized"""
+    __slots__ = ("sports", "by_id", "body", "etag")
+
+    def __init__(self, sports: Iterable[dict]):
+        sports = [{field: sport[field] for field in SPORT_FIELDS} for sport in sports]
+        self.sports = tuple(MappingProxyType(sport) for sport in sports)
+        self.by_id = MappingProxyType({sport["id"]: sport for sport in self.sports})
+        self.body = json.dumps(sports, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()[:32]}"'
+
+# Replaced wholesale on reload, readers never see a partially built catalog
+_catalog = SportsCatalog(SPORTS_DATA)
+
+def get_catalog() -> SportsCatalog:
+    """Get the current sports catalog snapshot"""
+    return _catalog
+
+def get_sport_by_id(sport_id: str) -> Optional[Mapping]:
     """Get sport information by ID"""
-    return next((sport for sport in SPORTS_DATA if sport["id"] == sport_id), None)
+    return _catalog.by_id.get(sport_id)
 
 def get_all_sports():
     """Get all sports data"""
-    return SPORTS_DATA
\ No newline at end of file
+    return list(_catalog.sports)
+
+async def reload_sports_catalog() -> SportsCatalog:
+    """Rebuild the catalog from SPORTS_DATA merged with the sports collection"""
+    global _catalog
+    from database import get_documents
+    
+    merged = {sport["id"]: sport for sport in SPORTS_DATA}
+    # Documents carry their slug in "sport_id", "id" is the Mongo document id
+    for doc in await get_documents("sports", {}):
+        sport_id = doc.get("sport_id")
+        if not sport_id:
+            continue
+        if doc.get("enabled") is False:
+            merged.pop(sport_id, None)
+            continue
+        if not all(doc.get(field) for field in SPORT_FIELDS[1:]):
+            logger.warning(f"Skipping incomplete sport document: {sport_id}")
+            continue
+        merged[sport_id] = {**doc, "id": sport_id}
+    
+    catalog = SportsCatalog(merged.values())
+    if catalog.etag != _catalog.etag:
+        logger.info(f"Sports catalog reloaded with {len(catalog.sports)} sports")
+    _catalog = catalog
+    return catalog
+
+async def refresh_sports_catalog_periodically(interval: int = SPORTS_CATALOG_REFRESH_SECONDS):
+    """Keep the catalog in sync with the sports collection"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await reload_sports_catalog()
+        except Exception:
+            logger.exception("Sports catalog reload error")
@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne
+from database import get_collection
+from utils import get_user_badges
+
+# Counters maintained on the user document, kept current by every write that affects them
+STATS_FIELDS = ("events_participated", "events_created", "friends_count", "messages_sent", "badges", "sports")
+
+def user_filter(user_id: str) -> dict:
+    """Filter for a user id as exposed by get_document (the ObjectId string)"""
+    try:
+        return {"_id": ObjectId(user_id)}
+    except (InvalidId, TypeError):
+        return {"id": user_id}
+
+async def increment_user_counters(user_id: str, **increments: int) -> Optional[dict]:
+    """Atomically adjust a user's counters, refreshing badges when they cross a threshold"""
+    users = await get_collection("users")
+    updated = await users.find_one_and_update(
+        user_filter(user_id),
+        {"$inc": increments, "$set": {"updated_at": datetime.utcnow()}},
+        projection={field: 1 for field in STATS_FIELDS},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        return None
+
+    badges = get_user_badges(max(0, updated.get("events_participated", 0)), max(0, updated.get("events_created", 0)))
+    if badges != updated.get("badges"):
+        await users.update_one({"_id": updated["_id"]}, {"$set": {"badges": badges}})
+        updated["badges"] = badges
+    return updated
+
+async def get_stats_document(user_id: str) -> Optional[dict]:
+    """Point read of the maintained counters"""
+    users = await get_collection("users")
+    return await users.find_one(user_filter(user_id), {field: 1 for field in STATS_FIELDS})
+
+async def _counts_by_user(collection_name: str, pipeline: list) -> dict:
+    collection = await get_collection(collection_name)
+    return {row["_id"]: row["count"] async for row in collection.aggregate(pipeline)}
+
+async def backfill_user_stats(batch_size: int = 1000) -> dict:
+    """Recompute every user's counters from friendships, events and messages"""
+    friends = await _counts_by_user("friendships", [
+        {"$match": {"status": "accepted"}},
+        {"$project": {"users": ["$user_id", "$friend_id"]}},
+        {"$unwind": "$users"},
+        {"$group": {"_id": "$users", "count": {"$sum": 1}}},
+    ])
+    # Organizers are listed as participants but joining is what counts towards events_participated
+    participated = await _counts_by_user("events", [
+        {"$unwind": "$participants"},
+        {"$match": {"$expr": {"$ne": ["$participants", "$organizer_id"]}}},
+        {"$group": {"_id": "$participants", "count": {"$sum": 1}}},
+    ])
+    created = await _counts_by_user("events", [{"$group": {"_id": "$organizer_id", "count": {"$sum": 1}}}])
+    messages = await _counts_by_user("messages", [{"$group": {"_id": "$user_id", "count": {"$sum": 1}}}])
+
+    users = await get_collection("users")
+    operations = []
+    updated = 0
+    async for user in users.find({}, {"_id": 1}):
+        user_id = str(user["_id"])
+        counters = {
+            "friends_count": friends.get(user_id, 0),
+            "events_participated": participated.get(user_id, 0),
+            "events_created": created.get(user_id, 0),
+            "messages_sent": messages.get(user_id, 0),
+        }
+        counters["badges"] = get_user_badges(counters["events_participated"], counters["events_created"])
+        operations.append(UpdateOne({"_id": user["_id"]}, {"$set": counters}))
+        if len(operations) >= batch_size:
+            await users.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await users.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    return {"users": updated}
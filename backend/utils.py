@@ -1,9 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any
+from zoneinfo import ZoneInfo
 import uuid
+import os
 import base64
 import re
 
+# Event dates and times are entered in local (Danish) time
+EVENT_TIMEZONE = ZoneInfo(os.environ.get("EVENT_TIMEZONE", "Europe/Copenhagen"))
+
 def generate_id() -> str:
     """Generate a unique ID"""
     return str(uuid.uuid4())
@@ -96,9 +101,15 @@ def sanitize_text(text: str) -> str:
     return text.strip()
 
 def format_datetime_for_db(date_str: str, time_str: str) -> datetime:
-    """Combine date and time strings into datetime object"""
+    """Combine local date and time strings into a timezone-aware UTC datetime"""
     datetime_str = f"{date_str} {time_str}"
-    return datetime.strptime(datetime_str, "%Y-%m-%d %H:%M")
+    local = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M").replace(tzinfo=EVENT_TIMEZONE)
+    return local.astimezone(timezone.utc)
+
+def local_day_start(days_from_today: int = 0) -> datetime:
+    """Get the UTC instant at which a local calendar day starts"""
+    day = datetime.now(EVENT_TIMEZONE).date() + timedelta(days=days_from_today)
+    return datetime.combine(day, datetime.min.time(), tzinfo=EVENT_TIMEZONE).astimezone(timezone.utc)
 
 def get_user_badges(events_participated: int, events_created: int) -> List[str]:
     """Generate user badges based on activity"""
@@ -0,0 +1,126 @@
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ReturnDocument
+from database import get_collection
+from models import EventStatus
+
+WAITLIST_MAX = int(os.environ.get("WAITLIST_MAX", "100"))
+
+def event_filter(event: dict) -> dict:
+    """Filter matching a document returned by get_document"""
+    return {"_id": ObjectId(event["id"])}
+
+def active_event_filter(event: dict) -> dict:
+    """Filter matching the event only while it is still open for joins and leaves"""
+    return {**event_filter(event), "status": EventStatus.ACTIVE.value}
+
+async def take_spot(event: dict, user_id: str) -> bool:
+    """Atomically add a participant if the event still has room and nobody is queued ahead"""
+    events = await get_collection("events")
+    result = await events.update_one(
+        {
+            **active_event_filter(event),
+            "participants": {"$ne": user_id},
+            # Open seats belong to the queue first
+            "waitlist.0": {"$exists": False},
+            "$expr": {"$lt": [{"$size": "$participants"}, "$max_participants"]}
+        },
+        {
+            "$push": {"participants": user_id},
+            "$inc": {"current_participants": 1},
+            "$set": {"updated_at": datetime.utcnow()}
+        }
+    )
+    return result.modified_count > 0
+
+async def add_to_waitlist(event: dict, user_id: str) -> Optional[int]:
+    """Append a user to the waitlist, returning their 1-based position or None when it is full"""
+    events = await get_collection("events")
+    updated = await events.find_one_and_update(
+        {
+            **active_event_filter(event),
+            "participants": {"$ne": user_id},
+            "waitlist": {"$ne": user_id},
+            f"waitlist.{WAITLIST_MAX - 1}": {"$exists": False}
+        },
+        {"$push": {"waitlist": user_id}},
+        projection={"waitlist": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        return None
+    return updated["waitlist"].index(user_id) + 1
+
+async def leave_waitlist(event: dict, user_id: str) -> bool:
+    """Remove a user from the waitlist"""
+    events = await get_collection("events")
+    result = await events.update_one(
+        {**event_filter(event), "waitlist": user_id},
+        {"$pull": {"waitlist": user_id}}
+    )
+    return result.modified_count > 0
+
+async def leave_and_promote(event: dict, user_id: str) -> Tuple[bool, Optional[str], list]:
+    """Remove a participant and promote the head of the waitlist in the same update
+
+    Returns (left, promoted_user_id, participants_after).
+    """
+    events = await get_collection("events")
+    waitlist = {"$ifNull": ["$waitlist", []]}
+    before = await events.find_one_and_update(
+        {**active_event_filter(event), "participants": user_id},
+        [
+            {"$set": {
+                "participants": {"$filter": {"input": "$participants", "cond": {"$ne": ["$$this", user_id]}}},
+                "waitlist": waitlist
+            }},
+            {"$set": {
+                "participants": {"$concatArrays": ["$participants", {"$slice": ["$waitlist", 1]}]},
+                "waitlist": {"$slice": ["$waitlist", 1, WAITLIST_MAX]},
+            }},
+            {"$set": {
+                "current_participants": {"$size": "$participants"},
+                "updated_at": "$$NOW"
+            }}
+        ],
+        projection={"participants": 1, "waitlist": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        return False, None, []
+
+    promoted = before["waitlist"][0] if before.get("waitlist") else None
+    participants = [p for p in before["participants"] if p != user_id]
+    if promoted:
+        participants.append(promoted)
+    return True, promoted, participants
+
+async def update_and_promote(event: dict, update: dict, unset: Optional[List[str]] = None) -> Optional[List[str]]:
+    """Apply an event update that may raise capacity, moving the head of the waitlist into new seats in the same write
+
+    Returns the promoted user ids, or None when participants or the queue changed since `event` was read.
+    """
+    events = await get_collection("events")
+    participants = event["participants"]
+    seats = update.get("max_participants", event["max_participants"]) - len(participants)
+    promoted = (event.get("waitlist") or [])[:max(0, seats)]
+
+    # Only write if the seats and queue head are still what the promotion was computed from
+    query = {**active_event_filter(event), "participants": {"$size": len(participants)}}
+    query.update({f"waitlist.{position}": user_id for position, user_id in enumerate(promoted)})
+    operation = {"$set": update}
+    if unset:
+        operation["$unset"] = {field: "" for field in unset}
+    if promoted:
+        operation["$push"] = {"participants": {"$each": promoted}}
+        operation["$pull"] = {"waitlist": {"$in": promoted}}
+        operation["$inc"] = {"current_participants": len(promoted)}
+    result = await events.update_one(query, operation)
+    return promoted if result.matched_count else None
+
+def get_waitlist_position(event: dict, user_id: str) -> Optional[int]:
+    """1-based waitlist position of a user, None if not waiting"""
+    waitlist = event.get("waitlist") or []
+    return waitlist.index(user_id) + 1 if user_id in waitlist else None
@@ -0,0 +1,132 @@
+"""Shared fixtures: the FastAPI app running against an in-memory mongomock-motor database"""
+import asyncio
+import os
+import sys
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "sportconnect_test")
+os.environ.setdefault("SKIP_INDEX_BUILD", "1")
+os.environ.setdefault("LIFECYCLE_WORKER_ENABLED", "false")
+os.environ.setdefault("LEADERBOARD_REBUILD_ENABLED", "false")
+os.environ.setdefault("METRICS_ENABLED", "false")
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+from fastapi.testclient import TestClient
+
+import analytics
+import cache
+import database
+import feed
+import notifications
+import presence
+import ratelimit
+import server
+
+PASSWORD = "secret123"
+
+@pytest.fixture
+def app_state(monkeypatch):
+    """Fresh database and per-process singletons for every test"""
+    # Each mock client owns its own data, so every lifespan starts empty
+    monkeypatch.setattr(database, "AsyncIOMotorClient", AsyncMongoMockClient)
+    monkeypatch.setattr(cache, "cache_backend", cache.InMemoryCache())
+    monkeypatch.setattr(presence, "presence_backend", presence.InMemoryPresence())
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(ratelimit, "rate_limit_store", ratelimit.InMemoryRateLimitStore())
+    monkeypatch.setattr(ratelimit, "concurrency_limiter", ratelimit.ConcurrencyLimiter())
+    # The queue binds to the event loop of the first client that uses it
+    queue = notifications.NotificationQueue(flush_interval=0.01)
+    monkeypatch.setattr(notifications, "notification_queue", queue)
+    monkeypatch.setattr(server, "notification_queue", queue)
+    # Shared by the server and the workers, so emptied in place
+    monkeypatch.setattr(feed.feed_index, "states", OrderedDict())
+    monkeypatch.setattr(analytics.event_analytics, "pending", {})
+
+@pytest.fixture
+def client(app_state):
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    """An empty database for module-level tests that don't start the app"""
+    test_database = AsyncMongoMockClient()[os.environ["DB_NAME"]]
+    monkeypatch.setattr(database.db_instance, "database", test_database)
+    return test_database
+
+def auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+def register(client: TestClient, name: str, email: str, **overrides) -> str:
+    """Register a user and return their access token"""
+    body = {
+        "name": name,
+        "email": email,
+        "password": PASSWORD,
+        "age": 30,
+        "location": "Copenhagen",
+        "sports": ["football"],
+        "skill_level": "intermediate",
+    }
+    body.update(overrides)
+    response = client.post("/api/auth/register", json=body)
+    assert response.status_code == 200, response.text
+    return response.json()["access_token"]
+
+def user_id(client: TestClient, token: str) -> str:
+    """The id the API uses for a user in participant lists"""
+    return client.get("/api/auth/me", headers=auth(token)).json()["id"]
+
+def event_body(**overrides) -> dict:
+    body = {
+        "title": "Sunday football",
+        "title_da": "Søndagsfodbold",
+        "sport": "football",
+        "date": (datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d"),
+        "time": "18:00",
+        "location": "Fælledparken",
+        "address": "Fælledparken, Copenhagen",
+        "description": "Casual game",
+        "description_da": "Hyggekamp",
+        "max_participants": 2,
+        "skill_level": "all",
+        "price": 0,
+    }
+    body.update(overrides)
+    return body
+
+def create_event(client: TestClient, token: str, **overrides) -> str:
+    """Create an event and return its id"""
+    response = client.post("/api/events", json=event_body(**overrides), headers=auth(token))
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+def find_document(client: TestClient, collection: str, document_id: str) -> dict:
+    """Read a stored document as-is, including fields the API hides"""
+    async def find():
+        return await database.db_instance.database[collection].find_one({"_id": ObjectId(document_id)})
+    return client.portal.call(find)
+
+def flush_notifications(client: TestClient):
+    """Give the background notification worker time to write its batch"""
+    client.portal.call(asyncio.sleep, 0.1)
+
+class FailingDatabase:
+    """Stands in for the database when every bulk write fails"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def __getitem__(self, name):
+        return self
+
+    async def bulk_write(self, operations, ordered=True):
+        raise self.error
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+import database
+from analytics import ANALYTICS_COLLECTION, AnalyticsField, EventAnalytics, event_analytics
+
+from .conftest import FailingDatabase, auth, create_event, register
+
+EVENT = {"id": "e1", "organizer_id": "o1", "title": "Sunday football", "max_participants": 10}
+
+def test_flush_merges_counters_into_hourly_buckets(mock_db):
+    tracker = EventAnalytics()
+    tracker.record(EVENT, AnalyticsField.CREATED)
+    tracker.record(EVENT, AnalyticsField.JOINS)
+    tracker.record(EVENT, AnalyticsField.JOINS)
+    # A refresh without a field only updates title and capacity
+    tracker.record({**EVENT, "title": "Evening football"})
+
+    assert asyncio.run(tracker.flush(mock_db)) == 1
+    tracker.record(EVENT, AnalyticsField.LEAVES)
+    asyncio.run(tracker.flush(mock_db))
+
+    assert tracker.pending == {}
+    bucket = asyncio.run(mock_db[ANALYTICS_COLLECTION].find_one({"event_id": "e1"}))
+    assert (bucket["created"], bucket["joins"], bucket["leaves"]) == (1, 2, 1)
+    assert bucket["title"] == "Sunday football" and bucket["organizer_id"] == "o1"
+    assert asyncio.run(tracker.flush(mock_db)) == 0
+
+def test_failed_flush_keeps_counters_for_the_next_one(mock_db):
+    tracker = EventAnalytics()
+    tracker.record(EVENT, AnalyticsField.JOINS)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(tracker.flush(FailingDatabase(ConnectionError("down"))))
+
+    # Activity recorded while the write was failing is added on top
+    tracker.record({**EVENT, "max_participants": 12}, AnalyticsField.JOINS)
+    asyncio.run(tracker.flush(mock_db))
+
+    bucket = asyncio.run(mock_db[ANALYTICS_COLLECTION].find_one({"event_id": "e1"}))
+    assert bucket["joins"] == 2 and bucket["capacity"] == 12
+
+def test_partial_flush_failure_keeps_only_the_failed_buckets():
+    tracker = EventAnalytics()
+    tracker.record(EVENT, AnalyticsField.JOINS)
+    tracker.record({**EVENT, "id": "e2"}, AnalyticsField.JOINS)
+    error = BulkWriteError({"writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate"}]})
+
+    with pytest.raises(BulkWriteError):
+        asyncio.run(tracker.flush(FailingDatabase(error)))
+
+    assert [entry["event_id"] for entry in tracker.pending.values()] == ["e2"]
+
+def test_organizer_analytics_endpoints(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    player = register(client, "Player", "player@example.dk")
+    event_id = create_event(client, organizer, max_participants=4)
+    client.post(f"/api/events/{event_id}/join", headers=auth(player))
+    client.portal.call(event_analytics.flush, database.db_instance.database)
+
+    summary = client.get(f"/api/analytics/events/{event_id}", headers=auth(organizer)).json()
+    assert (summary["created"], summary["joins"], summary["participants"]) == (1, 1, 2)
+    assert summary["fill_rate"] == 0.5
+
+    organizer_view = client.get("/api/analytics/organizer", headers=auth(organizer)).json()
+    assert organizer_view["events_count"] == 1
+    assert organizer_view["totals"]["joins"] == 1
+
+    timeline = client.get(f"/api/analytics/events/{event_id}/timeline", params={"interval": "hour"},
+                          headers=auth(organizer)).json()
+    assert [point["joins"] for point in timeline["points"]] == [1]
+
+    # Only the organizer sees an event's analytics
+    assert client.get(f"/api/analytics/events/{event_id}", headers=auth(player)).status_code == 404
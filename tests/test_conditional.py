@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+from starlette.requests import Request
+
+from conditional import http_date, is_not_modified, make_etag
+
+from .conftest import auth, create_event, register
+
+LAST_MODIFIED = datetime(2026, 10, 1, 12, 30, 15, 250000)
+
+def conditional_request(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "headers": raw})
+
+def test_if_none_match_uses_weak_comparison():
+    etag = make_etag("event", "1", LAST_MODIFIED.isoformat())
+
+    assert is_not_modified(conditional_request(if_none_match=etag), etag)
+    assert is_not_modified(conditional_request(if_none_match=f'"other", {etag[2:]}'), etag)
+    assert is_not_modified(conditional_request(if_none_match="*"), etag)
+    assert not is_not_modified(conditional_request(if_none_match='W/"other"'), etag)
+
+def test_if_none_match_wins_over_if_modified_since():
+    etag = make_etag("event", "1")
+    request = conditional_request(if_none_match='W/"other"', if_modified_since=http_date(LAST_MODIFIED))
+
+    assert not is_not_modified(request, etag, LAST_MODIFIED)
+
+def test_if_modified_since_compares_at_second_precision():
+    etag = make_etag("event", "1")
+
+    assert is_not_modified(conditional_request(if_modified_since=http_date(LAST_MODIFIED)), etag, LAST_MODIFIED)
+    earlier = http_date(LAST_MODIFIED - timedelta(seconds=1))
+    assert not is_not_modified(conditional_request(if_modified_since=earlier), etag, LAST_MODIFIED)
+
+def test_if_modified_since_accepts_offsets_and_unknown_zone():
+    etag = make_etag("event", "1")
+    aware = LAST_MODIFIED.replace(tzinfo=timezone.utc)
+
+    # "-0000" parses to a naive datetime, it must still compare as UTC
+    for value in ("Thu, 01 Oct 2026 12:30:15 -0000", "Thu, 01 Oct 2026 14:30:15 +0200"):
+        assert is_not_modified(conditional_request(if_modified_since=value), etag, LAST_MODIFIED)
+        assert is_not_modified(conditional_request(if_modified_since=value), etag, aware)
+
+    assert not is_not_modified(conditional_request(if_modified_since="Thu, 01 Oct 2026 12:30:14 -0000"), etag, LAST_MODIFIED)
+    assert not is_not_modified(conditional_request(if_modified_since="yesterday"), etag, LAST_MODIFIED)
+
+def test_event_revalidation(client):
+    token = register(client, "Organizer", "organizer@example.dk")
+    event_id = create_event(client, token)
+
+    response = client.get(f"/api/events/{event_id}")
+    assert response.status_code == 200
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+
+    assert client.get(f"/api/events/{event_id}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/api/events/{event_id}", headers={"If-Modified-Since": last_modified}).status_code == 304
+    unknown_zone = last_modified.replace("GMT", "-0000")
+    assert client.get(f"/api/events/{event_id}", headers={"If-Modified-Since": unknown_zone}).status_code == 304
+
+    client.patch(f"/api/events/{event_id}", json={"description": "Bring water"}, headers=auth(token))
+    changed = client.get(f"/api/events/{event_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+def test_profile_revalidation(client):
+    token = register(client, "Profile Owner", "owner@example.dk")
+
+    response = client.get("/api/auth/me", headers=auth(token))
+    assert response.headers["Vary"] == "Authorization"
+    revalidated = client.get("/api/auth/me", headers={**auth(token), "If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+    unknown_zone = http_date(datetime.utcnow() + timedelta(minutes=1)).replace("GMT", "-0000")
+    assert client.get("/api/auth/me", headers={**auth(token), "If-Modified-Since": unknown_zone}).status_code == 304
+
+def test_sports_catalog_revalidation(client):
+    response = client.get("/api/sports")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=300"
+
+    assert client.get("/api/sports", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from .conftest import auth, event_body, register
+
+def listed_ids(client):
+    return {event["id"] for event in client.get("/api/events").json()}
+
+def events_created(client, token):
+    return client.get("/api/users/stats", headers=auth(token)).json()["events_created"]
+
+def test_single_create_returns_the_id_other_endpoints_use(client):
+    token = register(client, "Organizer", "organizer@example.dk")
+    player = register(client, "Player", "player@example.dk")
+
+    created = client.post("/api/events", json=event_body(), headers=auth(token)).json()
+
+    assert listed_ids(client) == {created["id"]}
+    assert client.get(f"/api/events/{created['id']}").status_code == 200
+    assert client.post(f"/api/events/{created['id']}/join", headers=auth(player)).status_code == 200
+    assert events_created(client, token) == 1
+
+def test_series_spaces_occurrences_and_shares_a_series_id(client):
+    token = register(client, "Organizer", "organizer@example.dk")
+    first = datetime.utcnow().date() + timedelta(days=1)
+    body = {**event_body(date=first.isoformat()), "recurrence": "biweekly", "occurrences": 3}
+
+    response = client.post("/api/events/series", json=body, headers=auth(token))
+
+    assert response.status_code == 200
+    events = response.json()
+    assert [event["date"] for event in events] == [(first + timedelta(days=14 * n)).isoformat() for n in range(3)]
+    assert len({event["series_id"] for event in events}) == 1
+    assert {event["id"] for event in events} == listed_ids(client)
+    assert events_created(client, token) == 3
+
+def test_bulk_create_returns_stored_ids_in_order(client):
+    token = register(client, "Organizer", "organizer@example.dk")
+    bodies = [event_body(title=f"Game {n}") for n in range(3)]
+
+    events = client.post("/api/events/bulk", json={"events": bodies}, headers=auth(token)).json()
+
+    assert [event["title"] for event in events] == ["Game 0", "Game 1", "Game 2"]
+    for event in events:
+        assert client.get(f"/api/events/{event['id']}").json()["title"] == event["title"]
+
+def test_bulk_create_rejects_the_whole_batch(client):
+    token = register(client, "Organizer", "organizer@example.dk")
+    bodies = [event_body(), event_body(sport="quidditch")]
+
+    response = client.post("/api/events/bulk", json={"events": bodies}, headers=auth(token))
+
+    assert response.status_code == 400
+    assert listed_ids(client) == set()
+    assert events_created(client, token) == 0
@@ -0,0 +1,86 @@
+import asyncio
+
+import orjson
+import pytest
+
+import event_stream
+from event_stream import EventBroker, StreamSubscriber, make_delta, stream_deltas
+from models import EventStatus
+
+from .conftest import auth, create_event, register
+
+@pytest.fixture(autouse=True)
+def no_coalesce_delay(monkeypatch):
+    monkeypatch.setattr(event_stream, "EVENT_STREAM_COALESCE_SECONDS", 0)
+
+def test_delta_keeps_only_stream_fields():
+    delta = make_delta("updated", "e1", {"sport": "football", "status": EventStatus.CANCELLED, "title": "Hidden"})
+
+    assert delta == {"type": "updated", "id": "e1", "sport": "football", "status": "cancelled"}
+
+def test_updates_to_one_event_coalesce():
+    subscriber = StreamSubscriber()
+    subscriber.offer({"type": "created", "id": "e1", "current_participants": 1})
+    subscriber.offer({"type": "updated", "id": "e1", "current_participants": 2})
+
+    deltas, overflowed = asyncio.run(subscriber.drain(1))
+    # The client never saw the creation, so the merged delta stays "created"
+    assert deltas == [{"type": "created", "id": "e1", "current_participants": 2}]
+    assert not overflowed
+
+def test_subscribers_only_receive_their_sports():
+    broker = EventBroker()
+    padel = broker.subscribe({"padel"})
+    everything = broker.subscribe()
+    broker.publish({"type": "created", "id": "e1", "sport": "football"})
+
+    assert padel.pending == {} and list(everything.pending) == ["e1"]
+    broker.unsubscribe(padel)
+    assert broker.subscribers == {everything}
+
+def test_slow_subscriber_is_asked_to_resync():
+    subscriber = StreamSubscriber(max_pending=2)
+    for n in range(3):
+        subscriber.offer({"type": "updated", "id": f"e{n}"})
+
+    deltas, overflowed = asyncio.run(subscriber.drain(1))
+    assert [delta["id"] for delta in deltas] == ["e1", "e2"] and overflowed
+
+def test_stream_frames_until_disconnect(monkeypatch):
+    monkeypatch.setattr(event_stream, "EVENT_STREAM_HEARTBEAT_SECONDS", 0.01)
+    broker = EventBroker()
+    monkeypatch.setattr(event_stream, "event_broker", broker)
+    subscriber = broker.subscribe()
+    checks = []
+
+    async def is_disconnected():
+        checks.append(True)
+        if len(checks) == 2:
+            subscriber.offer({"type": "updated", "id": "e1", "current_participants": 3})
+        return len(checks) > 2
+
+    async def collect():
+        return [frame async for frame in stream_deltas(subscriber, is_disconnected)]
+
+    frames = asyncio.run(collect())
+    assert frames[0] == ": connected\n\n"
+    assert frames[1] == ": keepalive\n\n"
+    event, data = frames[2].strip().split("\n")
+    assert event == "event: updated"
+    assert orjson.loads(data[len("data: "):]) == {"id": "e1", "current_participants": 3}
+    assert broker.subscribers == set()
+
+def test_writes_publish_deltas(client, monkeypatch):
+    broker = EventBroker()
+    monkeypatch.setattr(event_stream, "event_broker", broker)
+    subscriber = broker.subscribe({"football"})
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    player = register(client, "Player", "player@example.dk")
+
+    event_id = create_event(client, organizer, max_participants=5)
+    client.post(f"/api/events/{event_id}/join", headers=auth(player))
+
+    assert list(subscriber.pending.values()) == [
+        {"type": "created", "id": event_id, "sport": "football", "current_participants": 2,
+         "max_participants": 5, "status": "active"}
+    ]
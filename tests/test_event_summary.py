@@ -0,0 +1,21 @@
+from models import EventSummary
+from server import EVENT_SUMMARY_PROJECTION
+
+from .conftest import auth, create_event, register
+
+def test_summary_projection_reads_only_summary_fields():
+    assert set(EVENT_SUMMARY_PROJECTION) == set(EventSummary.model_fields) - {"id"}
+    assert "participants" not in EVENT_SUMMARY_PROJECTION and "description" not in EVENT_SUMMARY_PROJECTION
+
+def test_summary_view_lists_compact_rows(client):
+    token = register(client, "Organizer", "organizer@example.dk")
+    event_id = create_event(client, token, max_participants=6, price=40)
+
+    rows = client.get("/api/events", params={"view": "summary"}, headers=auth(token)).json()
+
+    assert set(rows[0]) == set(EventSummary.model_fields)
+    assert (rows[0]["id"], rows[0]["max_participants"], rows[0]["price"]) == (event_id, 6, 40)
+    assert rows[0]["starts_at"] is not None
+
+def test_unknown_view_is_rejected(client):
+    assert client.get("/api/events", params={"view": "compact"}).status_code == 422
@@ -0,0 +1,82 @@
+from .conftest import auth, create_event, find_document, flush_notifications, register, user_id
+
+def patch_event(client, event_id, token, **changes):
+    return client.patch(f"/api/events/{event_id}", json=changes, headers=auth(token))
+
+def inbox_types(client, token):
+    return [row["type"] for row in client.get("/api/notifications", headers=auth(token)).json()["notifications"]]
+
+def test_only_the_organizer_can_edit(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    other = register(client, "Other", "other@example.dk")
+    event_id = create_event(client, organizer)
+
+    assert patch_event(client, event_id, other, title="Mine now").status_code == 403
+    assert client.post(f"/api/events/{event_id}/cancel", headers=auth(other)).status_code == 403
+
+def test_edit_rederives_start_time_and_notifies_participants(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    player = register(client, "Player", "player@example.dk")
+    event_id = create_event(client, organizer, max_participants=5)
+    client.post(f"/api/events/{event_id}/join", headers=auth(player))
+
+    response = patch_event(client, event_id, organizer, date="2030-06-01", time="19:30")
+
+    assert response.status_code == 200
+    # 19:30 Copenhagen summer time
+    assert response.json()["starts_at"].startswith("2030-06-01T17:30:00")
+    flush_notifications(client)
+    assert inbox_types(client, player) == ["event_updated"]
+    assert "event_updated" not in inbox_types(client, organizer)
+
+def test_capacity_below_participant_count_is_rejected(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    player = register(client, "Player", "player@example.dk")
+    event_id = create_event(client, organizer, max_participants=3)
+    client.post(f"/api/events/{event_id}/join", headers=auth(player))
+    client.post(f"/api/events/{event_id}/join", headers=auth(register(client, "Third", "third@example.dk")))
+
+    assert patch_event(client, event_id, organizer, max_participants=2).status_code == 400
+
+def test_moving_to_an_unknown_place_drops_the_old_point(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    event_id = create_event(client, organizer)
+    assert find_document(client, "events", event_id)["geo"]["coordinates"] == [12.5683, 55.6761]
+
+    response = patch_event(client, event_id, organizer, location="Grenen", address="Skagen Strand")
+
+    assert response.status_code == 200
+    assert "geo" not in find_document(client, "events", event_id)
+
+def test_capacity_change_with_unknown_place_drops_the_old_point(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    event_id = create_event(client, organizer)
+
+    patch_event(client, event_id, organizer, address="Skagen Strand", location="Grenen", max_participants=6)
+
+    stored = find_document(client, "events", event_id)
+    assert "geo" not in stored and stored["max_participants"] == 6
+
+def test_moving_to_a_known_place_replaces_the_point(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    event_id = create_event(client, organizer)
+
+    patch_event(client, event_id, organizer, location="Ceres Park", address="Stadion Allé, Aarhus")
+
+    assert find_document(client, "events", event_id)["geo"]["coordinates"] == [10.2039, 56.1629]
+
+def test_cancel_notifies_participants_and_waitlist(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    player = register(client, "Player", "player@example.dk")
+    waiting = register(client, "Waiting", "waiting@example.dk")
+    event_id = create_event(client, organizer, max_participants=2)
+    client.post(f"/api/events/{event_id}/join", headers=auth(player))
+    client.post(f"/api/events/{event_id}/join", headers=auth(waiting))
+
+    assert client.post(f"/api/events/{event_id}/cancel", headers=auth(organizer)).status_code == 200
+
+    flush_notifications(client)
+    assert inbox_types(client, player)[0] == "event_cancelled"
+    assert inbox_types(client, waiting)[0] == "event_cancelled"
+    assert event_id not in [event["id"] for event in client.get("/api/events").json()]
+    assert patch_event(client, event_id, organizer, title="Back on").status_code == 400
@@ -0,0 +1,96 @@
+import asyncio
+
+import cache
+from cache import InMemoryCache, cache_lookup, cache_store, invalidate_namespace
+
+from .conftest import auth, create_event, register, user_id
+
+def listed(client, token, event_id, **params):
+    events = client.get("/api/events", params=params, headers=auth(token)).json()
+    return next(event for event in events if event["id"] == event_id)
+
+def test_join_and_leave_refresh_cached_listings(client):
+    organizer = register(client, "Organizer Test", "organizer@example.dk")
+    player = register(client, "Player Test", "player@example.dk")
+    event_id = create_event(client, organizer, max_participants=5)
+
+    # Warm both cached views
+    assert listed(client, player, event_id)["current_participants"] == 1
+    assert listed(client, player, event_id, view="summary")["current_participants"] == 1
+
+    client.post(f"/api/events/{event_id}/join", headers=auth(player))
+    assert listed(client, player, event_id)["participants"] == [user_id(client, organizer), user_id(client, player)]
+    assert listed(client, player, event_id, view="summary")["current_participants"] == 2
+
+    client.post(f"/api/events/{event_id}/leave", headers=auth(player))
+    assert listed(client, player, event_id)["participants"] == [user_id(client, organizer)]
+    assert listed(client, player, event_id, view="summary")["current_participants"] == 1
+
+def test_promotion_from_waitlist_refreshes_cached_listing(client):
+    organizer, a, b = (register(client, f"Player {i} Test", f"player{i}@example.dk") for i in range(3))
+    event_id = create_event(client, organizer, max_participants=2)
+    client.post(f"/api/events/{event_id}/join", headers=auth(a))
+    client.post(f"/api/events/{event_id}/join", headers=auth(b))
+    assert user_id(client, b) not in listed(client, b, event_id)["participants"]
+
+    client.post(f"/api/events/{event_id}/leave", headers=auth(a))
+
+    assert listed(client, b, event_id)["participants"] == [user_id(client, organizer), user_id(client, b)]
+
+def test_edit_refreshes_cached_listing(client):
+    organizer = register(client, "Organizer Test", "organizer@example.dk")
+    event_id = create_event(client, organizer, max_participants=5)
+    listed(client, organizer, event_id)
+
+    client.patch(f"/api/events/{event_id}", json={"title": "Evening football"}, headers=auth(organizer))
+
+    assert listed(client, organizer, event_id)["title"] == "Evening football"
+
+def test_listing_hides_test_data(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    create_event(client, organizer, title="TEMP game")
+    create_event(client, organizer, title_da="Testkamp")
+    kept = create_event(client, organizer)
+
+    assert [event["id"] for event in client.get("/api/events").json()] == [kept]
+
+def test_generation_bump_hides_every_entry_in_the_namespace(monkeypatch):
+    monkeypatch.setattr(cache, "cache_backend", InMemoryCache())
+
+    async def scenario():
+        key, value = await cache_lookup("events", ("football", None))
+        assert value is None
+        await cache_store(key, [{"id": "1"}], 30)
+        assert (await cache_lookup("events", ("football", None)))[1] == [{"id": "1"}]
+        await invalidate_namespace("events")
+        return await cache_lookup("events", ("football", None))
+
+    key, value = asyncio.run(scenario())
+    assert value is None and key is not None
+
+def test_entries_expire_and_least_recently_used_are_evicted(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    backend = InMemoryCache(max_entries=2)
+
+    async def scenario():
+        await backend.set("a", 1, ttl=10)
+        await backend.set("b", 2, ttl=60)
+        await backend.get("a")
+        await backend.set("c", 3, ttl=60)
+        evicted = await backend.get("b")
+        now[0] += 30
+        return evicted, await backend.get("a"), await backend.get("c")
+
+    assert asyncio.run(scenario()) == (None, None, 3)
+
+def test_unavailable_cache_fails_open(monkeypatch):
+    class BrokenCache(InMemoryCache):
+        async def get_counter(self, key):
+            raise ConnectionError("down")
+
+    monkeypatch.setattr(cache, "cache_backend", BrokenCache())
+
+    assert asyncio.run(cache_lookup("events", ())) == (None, None)
+    # Storing under the missing key is a no-op
+    asyncio.run(cache_store(None, [], 30))
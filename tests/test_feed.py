@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import feed
+from feed import FeedIndex, FeedState
+from geo import geocode
+
+from .conftest import auth, create_event, register, user_id
+
+def upcoming(event_id: str, days: float = 1, **fields) -> dict:
+    event = {
+        "id": event_id, "title": event_id, "sport": "tennis", "skill_level": "all", "status": "active",
+        "current_participants": 1, "max_participants": 4, "participants": ["organizer"],
+        "starts_at": datetime.utcnow() + timedelta(days=days),
+    }
+    event.update(fields)
+    return event
+
+def cached_index(pool_size: int = 10, **user) -> FeedIndex:
+    index = FeedIndex(pool_size=pool_size)
+    state = FeedState({"id": "me", "sports": ["football"], "skill_level": "beginner", **user}, {"friend"})
+    index.put(state)
+    return index
+
+def test_new_events_join_only_matching_pools():
+    index = cached_index(geo=geocode("Copenhagen"))
+
+    index.on_event_created("sport", upcoming("sport", sport="football"))
+    index.on_event_created("friend", upcoming("friend", participants=["friend"]))
+    index.on_event_created("nearby", upcoming("nearby", geo=geocode("Frederiksberg")))
+    index.on_event_created("far", upcoming("far", geo=geocode("Aalborg")))
+    index.on_event_created("elsewhere", upcoming("elsewhere"))
+    index.on_event_created("past", upcoming("past", days=-1, sport="football"))
+
+    assert set(index.get("me").candidates) == {"sport", "friend", "nearby"}
+
+def test_user_without_preferences_sees_every_new_event():
+    index = FeedIndex()
+    index.put(FeedState({"id": "new"}, set()))
+
+    index.on_event_created("any", upcoming("any"))
+
+    assert set(index.get("new").candidates) == {"any"}
+
+def test_pool_keeps_the_soonest_events_up_to_its_size():
+    index = cached_index(pool_size=3)
+
+    for days in (5, 1, 4, 2, 3):
+        index.on_event_created(f"in {days}", upcoming(f"in {days}", days=days, sport="football"))
+    index.on_participation_changed(upcoming("friend", days=0.5, participants=["friend"]), "friend", True)
+
+    assert set(index.get("me").candidates) == {"friend", "in 1", "in 2"}
+
+def test_ranking_prefers_sport_friends_and_proximity():
+    state = FeedState({"id": "me", "sports": ["football"], "skill_level": "beginner", "geo": geocode("Copenhagen")}, {"friend"})
+    for event in (
+        upcoming("plain"),
+        upcoming("sport", sport="football"),
+        upcoming("sport and friends", sport="football", participants=["friend"]),
+        upcoming("nearby", geo=geocode("Copenhagen")),
+        upcoming("full", sport="football", current_participants=4),
+        upcoming("joined", sport="football", participants=["me"]),
+    ):
+        state.add_candidate(event)
+
+    now = datetime.utcnow()
+    rows = sorted(filter(None, (state.score(candidate, now) for candidate in state.candidates.values())),
+                  key=lambda row: row["score"], reverse=True)
+
+    assert [row["id"] for row in rows] == ["sport and friends", "sport", "nearby", "plain"]
+    assert rows[2]["distance_km"] == 0
+
+def test_feed_endpoint_ranks_and_follows_writes(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    # No geocodable location, mongomock can't run the $geoWithin branch
+    reader = register(client, "Reader", "reader@example.dk", location="Skagen", sports=["football"])
+    football = create_event(client, organizer)
+    create_event(client, organizer, sport="tennis")
+
+    rows = client.get("/api/events/feed", headers=auth(reader)).json()
+    assert [row["id"] for row in rows] == [football]
+
+    # Served from the cached pool, kept current by writes
+    later = create_event(client, organizer, date=(datetime.utcnow() + timedelta(days=3)).strftime("%Y-%m-%d"))
+    client.post(f"/api/events/{football}/join", headers=auth(reader))
+    assert [row["id"] for row in client.get("/api/events/feed", headers=auth(reader)).json()] == [later]
+    assert user_id(client, reader) in feed.feed_index.states
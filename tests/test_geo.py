@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from geo import backfill_geo, distance_km, geocode, geocode_event, make_point, near_query, parse_near
+
+from .conftest import auth, create_event, find_document, register, user_id
+
+def test_geocode_transliterates_and_resolves_aliases():
+    assert geocode("Nørrebro, København") == make_point(12.5494, 55.6945)
+    assert geocode("Elsinore") == geocode("Helsingør")
+    assert geocode("Skagen") is None
+    assert geocode(None) is None
+
+def test_event_address_wins_over_venue():
+    assert geocode_event("Aarhus Stadion", "Fælledparken, Copenhagen") == geocode("Copenhagen")
+    assert geocode_event("Odense Arena", "Unknown road 1") == geocode("Odense")
+
+def test_parse_near_accepts_coordinates_or_places():
+    assert parse_near("55.6761, 12.5683") == make_point(12.5683, 55.6761)
+    assert parse_near("91,0") is None
+    assert parse_near("Aarhus") == geocode("Aarhus")
+    assert near_query(make_point(1, 2), 5)["$nearSphere"]["$maxDistance"] == 5000
+
+def test_distance_km():
+    assert distance_km(geocode("Copenhagen"), geocode("Aarhus")) == pytest.approx(157, abs=2)
+
+def test_backfill_geo_fills_only_resolvable_documents(mock_db):
+    asyncio.run(mock_db.events.insert_many([
+        {"location": "Odense", "address": ""},
+        {"location": "Skagen", "address": ""},
+    ]))
+    asyncio.run(mock_db.users.insert_one({"location": "Aarhus"}))
+
+    assert asyncio.run(backfill_geo()) == {"events": 1, "users": 1}
+    assert asyncio.run(mock_db.events.count_documents({"geo": {"$exists": True}})) == 1
+
+def test_profile_location_change_moves_or_drops_the_point(client):
+    token = register(client, "Mover", "mover@example.dk")
+    me = user_id(client, token)
+    assert find_document(client, "users", me)["geo"] == geocode("Copenhagen")
+
+    client.put("/api/users/profile", json={"location": "Aarhus"}, headers=auth(token))
+    assert find_document(client, "users", me)["geo"] == geocode("Aarhus")
+
+    response = client.put("/api/users/profile", json={"location": "Skagen"}, headers=auth(token))
+    assert response.status_code == 200
+    assert "geo" not in find_document(client, "users", me)
+
+def test_unknown_near_location_is_rejected(client):
+    response = client.get("/api/events", params={"near": "Atlantis"})
+    assert response.status_code == 400
+
+def test_event_creation_stores_the_point(client):
+    token = register(client, "Organizer", "organizer@example.dk")
+    event_id = create_event(client, token, address="Banegårdspladsen, Odense")
+
+    assert find_document(client, "events", event_id)["geo"] == geocode("Odense")
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import OperationFailure
+
+import database
+from database import INDEX_MANIFEST, INDEX_VERSION, MIGRATIONS_COLLECTION, create_indexes, get_index_version
+
+def index_names(mock_db, collection: str) -> set:
+    return set(asyncio.run(mock_db[collection].index_information()))
+
+def test_build_runs_once_per_manifest_version(mock_db):
+    assert asyncio.run(create_indexes()) is True
+    assert asyncio.run(get_index_version()) == INDEX_VERSION
+    assert asyncio.run(create_indexes()) is False
+    assert asyncio.run(create_indexes(force=True)) is True
+
+def test_every_manifest_index_is_built(mock_db):
+    asyncio.run(create_indexes())
+
+    for collection, indexes in INDEX_MANIFEST.items():
+        expected = {index.document["name"] for index in indexes}
+        assert expected <= index_names(mock_db, collection), collection
+
+def retire_indexes(mock_db):
+    """Indexes an older manifest version built"""
+    asyncio.run(mock_db.events.create_index([("status", 1), ("starts_at", 1)]))
+    asyncio.run(mock_db.events.create_index("date"))
+    asyncio.run(mock_db.events.create_index([("date", 1), ("time", 1)]))
+    asyncio.run(mock_db[MIGRATIONS_COLLECTION].insert_one({"_id": "indexes", "version": INDEX_VERSION - 1}))
+
+def test_version_bump_drops_retired_indexes(mock_db):
+    retire_indexes(mock_db)
+
+    assert asyncio.run(create_indexes()) is True
+
+    assert not index_names(mock_db, "events") & {"status_1_starts_at_1", "date_1", "date_1_time_1"}
+    assert asyncio.run(get_index_version()) == INDEX_VERSION
+
+def test_index_dropped_by_another_worker_is_ignored(mock_db, monkeypatch):
+    retire_indexes(mock_db)
+
+    async def dropped_elsewhere(self, index_name, **kwargs):
+        raise OperationFailure("index not found with name [date_1]", code=27)
+
+    monkeypatch.setattr(type(mock_db.events), "drop_index", dropped_elsewhere)
+
+    assert asyncio.run(create_indexes()) is True
+    assert asyncio.run(get_index_version()) == INDEX_VERSION
+
+def test_other_drop_failures_abort_the_build(mock_db, monkeypatch):
+    retire_indexes(mock_db)
+
+    async def unauthorized(self, index_name, **kwargs):
+        raise OperationFailure("not authorized", code=13)
+
+    monkeypatch.setattr(type(mock_db.events), "drop_index", unauthorized)
+
+    with pytest.raises(OperationFailure):
+        asyncio.run(create_indexes())
+    assert asyncio.run(get_index_version()) == INDEX_VERSION - 1
+
+def test_startup_skips_the_build_when_asked(monkeypatch):
+    built = []
+
+    async def record_build():
+        built.append(True)
+
+    monkeypatch.setattr(database, "AsyncIOMotorClient", AsyncMongoMockClient)
+    monkeypatch.setattr(database, "create_indexes", record_build)
+    # Restored on teardown
+    monkeypatch.setattr(database.db_instance, "client", None)
+    monkeypatch.setattr(database.db_instance, "database", None)
+    monkeypatch.setenv("SKIP_INDEX_BUILD", "true")
+    asyncio.run(database.connect_to_mongo())
+    monkeypatch.setenv("SKIP_INDEX_BUILD", "")
+    asyncio.run(database.connect_to_mongo())
+
+    assert built == [True]
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+
+from leaderboards import (
+    bucket_keys, claim_nightly_run, get_leaderboard, rebuild_pipeline, record_activity, seconds_until, week_key
+)
+
+from .conftest import auth, create_event, register, user_id
+
+EVENT = {"sport": "football", "starts_at": datetime(2026, 10, 1, 18, 0)}
+
+def test_week_key_uses_iso_years():
+    assert week_key(datetime(2026, 10, 1)) == "2026-W40"
+    # 1 January 2027 still belongs to the last ISO week of 2026
+    assert week_key(datetime(2027, 1, 1)) == "2026-W53"
+
+def test_bucket_keys_skip_what_the_event_or_user_lacks():
+    assert bucket_keys(EVENT, "Copenhagen") == [("sport", "football"), ("location", "Copenhagen"), ("week", "2026-W40")]
+    assert bucket_keys({"sport": "padel"}, None) == [("sport", "padel")]
+
+def test_scores_accumulate_and_rank(mock_db):
+    user_oid = ObjectId()
+    asyncio.run(mock_db.users.insert_one({"_id": user_oid, "name": "Looked Up", "location": "Aarhus"}))
+
+    async def scenario():
+        await record_activity(EVENT, "a", 1, "Anna", "Copenhagen")
+        await record_activity(EVENT, "a", 1, "Anna", "Copenhagen")
+        await record_activity(EVENT, "b", 1, "Bo", "Copenhagen")
+        await record_activity(EVENT, "b", -1, "Bo", "Copenhagen")
+        # Name and location come from the users collection when not given
+        await record_activity(EVENT, str(user_oid))
+        return (
+            await get_leaderboard("sport", "football"),
+            await get_leaderboard("location", "Aarhus"),
+            await get_leaderboard("sport", "football", limit=1),
+        )
+
+    sport, location, top = asyncio.run(scenario())
+    # Buckets that fell back to zero are not listed
+    assert [(row["user_id"], row["score"]) for row in sport] == [("a", 2), (str(user_oid), 1)]
+    assert location == [{"user_id": str(user_oid), "user_name": "Looked Up", "score": 1}]
+    assert [row["user_id"] for row in top] == ["a"]
+
+def test_one_worker_claims_each_nightly_run(mock_db):
+    async def scenario():
+        return [await claim_nightly_run("2026-10-19"), await claim_nightly_run("2026-10-19"),
+                await claim_nightly_run("2026-10-20")]
+
+    assert asyncio.run(scenario()) == [True, False, True]
+
+def test_seconds_until_the_next_rebuild_hour():
+    assert seconds_until(3, datetime(2026, 10, 19, 1, 30)) == 90 * 60
+    assert seconds_until(3, datetime(2026, 10, 19, 3, 0)) == 24 * 3600
+
+def test_rebuild_skips_participants_that_are_not_object_ids():
+    for board in ("sport", "location", "week"):
+        pipeline = rebuild_pipeline(board, datetime(2026, 10, 19, 3))
+        stages = [next(iter(stage)) for stage in pipeline]
+        convert = pipeline[stages.index("$set")]["$set"]["user_oid"]["$convert"]
+
+        assert convert["to"] == "objectId" and convert["onError"] is None and convert["onNull"] is None
+        assert pipeline[stages.index("$set") + 1] == {"$match": {"user_oid": {"$ne": None}}}
+        assert stages.index("$set") < stages.index("$lookup")
+        assert "$toObjectId" not in repr(pipeline)
+        assert stages[-1] == "$merge"
+
+def test_leaderboard_endpoint_follows_joins_and_leaves(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    player = register(client, "Player", "player@example.dk", location="Aarhus")
+    event_id = create_event(client, organizer, max_participants=5)
+    client.post(f"/api/events/{event_id}/join", headers=auth(player))
+
+    board = client.get("/api/leaderboards/sport", params={"key": "football"}, headers=auth(player)).json()
+    assert [entry["rank"] for entry in board["entries"]] == [1, 2]
+    assert {entry["user_id"] for entry in board["entries"]} == {user_id(client, organizer), user_id(client, player)}
+    # Location defaults to the caller's own
+    location = client.get("/api/leaderboards/location", headers=auth(player)).json()
+    assert location["key"] == "Aarhus"
+    assert [entry["user_id"] for entry in location["entries"]] == [user_id(client, player)]
+
+    client.post(f"/api/events/{event_id}/leave", headers=auth(player))
+    board = client.get("/api/leaderboards/sport", params={"key": "football"}, headers=auth(player)).json()
+    assert [entry["user_id"] for entry in board["entries"]] == [user_id(client, organizer)]
+
+    assert client.get("/api/leaderboards/sport", headers=auth(player)).status_code == 400
@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import cache
+import lifecycle
+from lifecycle import complete_past_events
+from models import EventStatus
+
+@pytest.fixture
+def events(mock_db, monkeypatch):
+    monkeypatch.setattr(cache, "cache_backend", cache.InMemoryCache())
+    now = datetime.utcnow()
+
+    def insert(title, hours_ago, status=EventStatus.ACTIVE.value):
+        asyncio.run(mock_db.events.insert_one({
+            "title": title, "sport": "football", "status": status, "starts_at": now - timedelta(hours=hours_ago)
+        }))
+
+    return insert
+
+def statuses(mock_db) -> dict:
+    return {doc["title"]: doc["status"] for doc in asyncio.run(mock_db.events.find().to_list(length=None))}
+
+def test_finished_events_are_completed_after_the_grace_period(mock_db, events):
+    events("yesterday", 24)
+    events("just finished", lifecycle.EVENT_COMPLETION_GRACE_HOURS + 0.5)
+    events("still playing", 1)
+    events("next week", -24 * 7)
+    events("called off", 24, EventStatus.CANCELLED.value)
+
+    assert asyncio.run(complete_past_events()) == 2
+    assert statuses(mock_db) == {
+        "yesterday": "completed",
+        "just finished": "completed",
+        "still playing": "active",
+        "next week": "active",
+        "called off": "cancelled",
+    }
+
+def test_completion_walks_every_batch_and_bumps_the_listing_cache(mock_db, events):
+    for day in range(5):
+        events(f"day {day}", 24 * (day + 1))
+
+    assert asyncio.run(complete_past_events(batch_size=2)) == 5
+    assert set(statuses(mock_db).values()) == {"completed"}
+    assert asyncio.run(cache.cache_backend.get_counter("cache:events:generation")) == 1
+    assert asyncio.run(complete_past_events(batch_size=2)) == 0
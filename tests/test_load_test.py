@@ -0,0 +1,32 @@
+import random
+
+from benchmarks.load_test import WORKLOAD, Results, VirtualUser, build_request, percentile, report
+
+def test_percentiles_use_nearest_rank():
+    values = [float(n) for n in range(1, 101)]
+
+    assert [percentile(values, pct) for pct in (50, 95, 99)] == [50.0, 95.0, 99.0]
+    assert percentile([7.0], 99) == 7.0
+
+def test_every_workload_operation_builds_a_request():
+    random.seed(1)
+    member = VirtualUser("u1", "token", ["e1"])
+
+    for name in WORKLOAD:
+        method, path, params, body = build_request(name, member, ["e2"], ["football"])
+        assert method in ("GET", "POST") and path.startswith("/api/")
+    # Chat operations need an event the user takes part in
+    assert build_request("messages.send", VirtualUser("u2", "token", []), ["e2"], ["football"]) is None
+
+def test_report_separates_client_and_server_errors(capsys):
+    results = Results()
+    for seconds, status_code in ((0.010, 200), (0.020, 404), (0.030, 500)):
+        results.record("events.detail", seconds, status_code)
+
+    summary = report(results, elapsed=2)
+
+    assert summary == {"events.detail": {
+        "requests": 3, "throughput": 1.5, "p50_ms": 20.0, "p95_ms": 30.0, "p99_ms": 30.0,
+        "client_errors": 1, "server_errors": 1,
+    }}
+    assert "events.detail" in capsys.readouterr().out
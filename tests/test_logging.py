@@ -0,0 +1,96 @@
+import json
+import logging
+
+import pytest
+
+import log_config
+from log_config import (
+    UVICORN_LOGGERS, JSONFormatter, RequestContextFilter, StructuredQueueHandler, TextFormatter,
+    configure_logging, stop_logging,
+)
+
+@pytest.fixture
+def fresh_logging(monkeypatch):
+    """Start from unconfigured logging writing to the captured stdout, restore the previous setup afterwards"""
+    root = logging.getLogger()
+    saved_root = (list(root.handlers), root.level)
+    saved_uvicorn = {name: (list(logging.getLogger(name).handlers), logging.getLogger(name).propagate) for name in UVICORN_LOGGERS}
+    stop_logging()
+    yield
+    stop_logging()
+    root.handlers, level = saved_root
+    root.setLevel(level)
+    for name, (handlers, propagate) in saved_uvicorn.items():
+        logging.getLogger(name).handlers = handlers
+        logging.getLogger(name).propagate = propagate
+
+def prepared(record_logger: logging.Logger, emit) -> logging.LogRecord:
+    """Capture the record a logging call produces as the listener thread would see it"""
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    record_logger.addHandler(handler)
+    try:
+        emit()
+    finally:
+        record_logger.removeHandler(handler)
+    return StructuredQueueHandler(None).prepare(records[0])
+
+def test_json_lines_carry_extra_fields_and_traceback():
+    test_logger = logging.getLogger("tests.json")
+
+    def fail():
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            test_logger.exception("Event update error", extra={"event_id": "e1"})
+
+    entry = json.loads(JSONFormatter().format(prepared(test_logger, fail)))
+
+    assert entry["message"] == "Event update error"
+    assert entry["level"] == "ERROR"
+    assert entry["event_id"] == "e1"
+    assert "ValueError: boom" in entry["exception"]
+
+def test_text_lines_append_extra_fields():
+    test_logger = logging.getLogger("tests.text")
+    record = prepared(test_logger, lambda: test_logger.warning("Slow %s", "query", extra={"ms": 120}))
+
+    line = TextFormatter().format(record)
+
+    assert line.endswith("tests.text - WARNING - Slow query ms=120")
+
+def test_sampling_never_drops_warnings():
+    sampler = RequestContextFilter(sample_rate=0)
+    info = logging.LogRecord("x", logging.INFO, "", 0, "info", (), None)
+    warning = logging.LogRecord("x", logging.WARNING, "", 0, "warning", (), None)
+
+    assert sampler.filter(info) is False
+    assert sampler.filter(warning) is True
+    assert warning.request_id == "-"
+
+def test_uvicorn_loggers_go_through_the_queue(fresh_logging, capsys):
+    access = logging.getLogger("uvicorn.access")
+    access.handlers = [logging.StreamHandler()]
+    access.propagate = False
+
+    configure_logging()
+    access.info('%s - "%s %s HTTP/%s" %d', "127.0.0.1:5000", "GET", "/api/events", "1.1", 200)
+    stop_logging()
+
+    assert access.handlers == [] and access.propagate
+    assert '"GET /api/events HTTP/1.1" 200' in capsys.readouterr().out
+
+def test_records_after_stop_are_written_directly(fresh_logging, capsys):
+    configure_logging()
+    stop_logging()
+
+    logging.getLogger("tests.shutdown").warning("After shutdown")
+
+    assert log_config._listener is None
+    assert "After shutdown" in capsys.readouterr().out
+
+def test_request_id_is_echoed(client):
+    response = client.get("/api/sports", headers={"X-Request-ID": "abc123"})
+    assert response.headers["x-request-id"] == "abc123"
+    assert len(client.get("/api/sports").headers["x-request-id"]) == 32
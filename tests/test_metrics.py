@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import metrics
+import server
+from metrics import Counter, Histogram, MetricsMiddleware, MongoCommandListener, RequestDBStats, current_db_stats
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, '/a"b')
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a\\"b",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a\\"b",le="1.0"} 2',
+        'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a\\"b"} 5.55',
+        'latency_seconds_count{route="/a\\"b"} 3',
+    ]
+
+def test_counter_renders_per_label_set():
+    counter = Counter("failures_total", "Failures", ("command",))
+    counter.inc("find")
+    counter.inc("find", amount=2)
+
+    assert counter.render()[-1] == 'failures_total{command="find"} 3'
+
+def command_event(name: str, command: dict, request_id: int = 1, duration_micros: int = 2000):
+    return SimpleNamespace(command_name=name, command=command, request_id=request_id, operation_id=request_id,
+                           duration_micros=duration_micros)
+
+@pytest.fixture
+def command_metrics(monkeypatch):
+    duration = Histogram("duration", "", ("command", "collection"), (1.0,))
+    failures = Counter("failures", "", ("command", "collection"))
+    monkeypatch.setattr(metrics, "MONGO_COMMAND_DURATION", duration)
+    monkeypatch.setattr(metrics, "MONGO_COMMAND_FAILURES", failures)
+    return duration, failures
+
+def test_listener_charges_commands_to_the_current_request(command_metrics):
+    duration, failures = command_metrics
+    listener = MongoCommandListener()
+    stats = RequestDBStats()
+    token = current_db_stats.set(stats)
+    try:
+        listener.started(command_event("find", {"find": "events"}))
+        listener.succeeded(command_event("find", {}))
+        listener.started(command_event("getMore", {"getMore": 123, "collection": "events"}, request_id=2))
+        listener.failed(command_event("getMore", {}, request_id=2))
+        # Handshakes are not counted
+        listener.started(command_event("hello", {"hello": 1}, request_id=3))
+        listener.succeeded(command_event("hello", {}, request_id=3))
+    finally:
+        current_db_stats.reset(token)
+
+    assert (stats.operations, stats.seconds) == (2, 0.004)
+    assert set(duration._series) == {("find", "events"), ("getMore", "events")}
+    assert failures._values == {("getMore", "events"): 1}
+
+def test_middleware_labels_requests_by_route_template(monkeypatch):
+    duration = Histogram("duration", "", ("method", "route", "status"), (1.0,))
+    size = Histogram("size", "", ("method", "route"), (1024,))
+    monkeypatch.setattr(metrics, "HTTP_REQUEST_DURATION", duration)
+    monkeypatch.setattr(metrics, "HTTP_RESPONSE_SIZE", size)
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        current_db_stats.get().add(0.001)
+        return {"id": item_id}
+
+    @app.get("/metrics")
+    async def scrape():
+        return {}
+
+    app.add_middleware(MetricsMiddleware)
+    with TestClient(app) as client:
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+        client.get("/metrics")
+
+    assert set(duration._series) == {("GET", "/items/{item_id}", "200"), ("GET", "unmatched", "404")}
+    assert duration._series[("GET", "/items/{item_id}", "200")][2] == 2
+    assert size._series[("GET", "/items/{item_id}")][1] == 2 * len(b'{"id":"1"}')
+
+def test_metrics_endpoint_is_hidden_when_disabled(client):
+    assert client.get("/metrics").status_code == 404
+
+def test_metrics_endpoint_serves_the_registry(client, monkeypatch):
+    monkeypatch.setattr(server, "METRICS_ENABLED", True)
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import get_collection
+from notifications import NotificationQueue, NotificationType, backfill_updated_at
+
+from .conftest import auth, register, user_id
+
+@pytest.fixture
+def local_timezone():
+    """Run with a UTC offset so naive UTC timestamps read as local time would be off by hours"""
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "Europe/Copenhagen"
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+def seed_inbox(client, recipient: str, count: int):
+    """Insert notifications a minute apart, the two oldest share a timestamp"""
+    now = datetime.utcnow().replace(microsecond=0)
+    rows = [
+        {
+            "user_id": recipient,
+            "type": NotificationType.FRIEND_ADDED,
+            "data": {"n": n},
+            "read": n % 2 == 0,
+            "count": 1,
+            "created_at": now - timedelta(minutes=min(n, count - 2)),
+        }
+        for n in range(count)
+    ]
+    for row in rows:
+        row["updated_at"] = row["created_at"]
+
+    async def insert():
+        collection = await get_collection("notifications")
+        await collection.insert_many(rows)
+
+    client.portal.call(insert)
+
+def test_inbox_pages_walk_every_notification_once(client, local_timezone):
+    token = register(client, "Inbox Owner", "inbox@example.dk")
+    seed_inbox(client, user_id(client, token), 7)
+
+    seen, cursor = [], None
+    for _ in range(4):
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/notifications", params=params, headers=auth(token)).json()
+        assert page["unread_count"] == 3
+        seen += [row["data"]["n"] for row in page["notifications"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == list(range(7))
+    assert seen[:5] == [0, 1, 2, 3, 4]
+    assert cursor is None
+
+def test_unread_only_pages(client):
+    token = register(client, "Inbox Owner", "inbox@example.dk")
+    seed_inbox(client, user_id(client, token), 7)
+
+    first = client.get("/api/notifications", params={"limit": 2, "unread_only": True}, headers=auth(token)).json()
+    second = client.get("/api/notifications", params={"limit": 2, "unread_only": True, "cursor": first["next_cursor"]},
+                        headers=auth(token)).json()
+
+    assert [row["data"]["n"] for row in first["notifications"] + second["notifications"]] == [1, 3, 5]
+    assert second["next_cursor"] is None
+
+def test_invalid_cursor_is_rejected(client):
+    token = register(client, "Inbox Owner", "inbox@example.dk")
+    response = client.get("/api/notifications", params={"cursor": "not-a-cursor"}, headers=auth(token))
+    assert response.status_code == 400
+
+def test_stop_writes_the_in_flight_batch(client):
+    async def run_and_stop():
+        # A long flush interval keeps the first batch in flight when stop() is called
+        queue = NotificationQueue(batch_size=100, flush_interval=60)
+        worker = asyncio.create_task(queue.run())
+        queue.enqueue(["a", "b"], NotificationType.EVENT_UPDATED, {})
+        await asyncio.sleep(0.01)
+        queue.enqueue(["c"], NotificationType.EVENT_UPDATED, {})
+        await asyncio.wait_for(queue.stop(worker), 5)
+        collection = await get_collection("notifications")
+        return sorted(await collection.distinct("user_id"))
+
+    assert client.portal.call(run_and_stop) == ["a", "b", "c"]
+
+def test_grouped_notifications_collapse_until_read(client):
+    async def write_grouped():
+        queue = NotificationQueue()
+        queue.enqueue(["a"], NotificationType.EVENT_MESSAGE, {"text": "hi"}, group="chat:1")
+        queue.enqueue(["a"], NotificationType.EVENT_MESSAGE, {"text": "again"}, group="chat:1")
+        await queue.drain()
+        collection = await get_collection("notifications")
+        return await collection.find({"user_id": "a"}, {"_id": 0, "count": 1, "data": 1}).to_list(length=None)
+
+    assert client.portal.call(write_grouped) == [{"data": {"text": "again"}, "count": 2}]
+
+def test_grouped_update_keeps_created_at_and_moves_to_the_top(client):
+    token = register(client, "Inbox Owner", "inbox@example.dk")
+    recipient = user_id(client, token)
+    seed_inbox(client, recipient, 3)
+
+    async def message(text: str):
+        queue = NotificationQueue()
+        queue.enqueue([recipient], NotificationType.EVENT_MESSAGE, {"text": text}, group="chat:1")
+        await queue.drain()
+
+    client.portal.call(message, "hi")
+    first = client.get("/api/notifications", headers=auth(token)).json()["notifications"][0]
+    client.portal.call(asyncio.sleep, 0.01)
+    client.portal.call(message, "again")
+
+    inbox = client.get("/api/notifications", headers=auth(token)).json()["notifications"]
+    assert [row["data"].get("text") for row in inbox] == ["again", None, None, None]
+    assert inbox[0]["created_at"] == first["created_at"]
+    assert inbox[0]["updated_at"] > first["updated_at"]
+
+    # Paging follows updated_at, so the grouped entry is not repeated or skipped
+    page = client.get("/api/notifications", params={"limit": 1}, headers=auth(token)).json()
+    rest = client.get("/api/notifications", params={"cursor": page["next_cursor"]}, headers=auth(token)).json()
+    assert [row["id"] for row in page["notifications"] + rest["notifications"]] == [row["id"] for row in inbox]
+
+def test_backfill_copies_created_at(client):
+    created_at = datetime(2026, 10, 1, 12, 0)
+
+    async def backfill():
+        collection = await get_collection("notifications")
+        await collection.insert_one({"user_id": "a", "read": False, "created_at": created_at})
+        counts = await backfill_updated_at()
+        return counts, await collection.find_one({"user_id": "a"})
+
+    counts, row = client.portal.call(backfill)
+    assert counts == {"notifications": 1}
+    assert row["updated_at"] == created_at
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+import presence
+from presence import InMemoryPresence, OFFLINE, ONLINE, get_statuses, mark_connected, mark_disconnected, mark_online
+
+from .conftest import auth, register, user_id
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(presence.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(presence, "presence_backend", InMemoryPresence())
+    return now
+
+def statuses(*user_ids):
+    return asyncio.run(get_statuses(user_ids))
+
+def test_heartbeats_expire_after_the_ttl(clock):
+    asyncio.run(mark_online("a", ttl=60))
+
+    assert statuses("a", "b") == {"a": ONLINE, "b": OFFLINE}
+    clock[0] += 61
+    assert statuses("a") == {"a": OFFLINE}
+
+def test_user_stays_online_until_the_last_socket_closes(clock):
+    async def two_tabs():
+        await mark_connected("a")
+        await mark_connected("a")
+        await mark_disconnected("a")
+
+    asyncio.run(two_tabs())
+    clock[0] += 3600
+    assert statuses("a") == {"a": ONLINE}
+
+    asyncio.run(mark_disconnected("a"))
+    assert statuses("a") == {"a": OFFLINE}
+    # An extra disconnect does not leave a negative count behind
+    asyncio.run(mark_disconnected("a"))
+    asyncio.run(mark_connected("a"))
+    assert statuses("a") == {"a": ONLINE}
+
+def test_unavailable_backend_reports_offline(monkeypatch):
+    class BrokenPresence(InMemoryPresence):
+        async def online(self, user_ids):
+            raise ConnectionError("down")
+
+    monkeypatch.setattr(presence, "presence_backend", BrokenPresence())
+
+    assert statuses("a") == {"a": OFFLINE}
+    assert statuses() == {}
+
+def test_heartbeat_and_socket_endpoints(client):
+    token = register(client, "Online User", "online@example.dk")
+    me = user_id(client, token)
+
+    response = client.post("/api/presence/heartbeat", headers=auth(token))
+    assert response.json() == {"status": "online", "expires_in": presence.PRESENCE_TTL}
+    assert client.portal.call(get_statuses, [me]) == {me: ONLINE}
+
+    with client.websocket_connect(f"/api/presence/ws?token={token}") as socket:
+        socket.send_text("ping")
+    # The socket's disconnect released only its own count, the heartbeat is still live
+    assert client.portal.call(get_statuses, [me]) == {me: ONLINE}
+
+def test_socket_rejects_invalid_tokens(client):
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/api/presence/ws?token=invalid") as socket:
+            socket.receive_text()
+    assert closed.value.code == 1008
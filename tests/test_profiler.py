@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import pytest
+
+from profiler import PROFILE_COLLECTION, QueryProfiler, query_shape, summarize_explain
+
+from .conftest import FailingDatabase
+
+def test_queries_differing_only_in_values_share_a_shape():
+    first = query_shape({"sport": "football", "participants": {"$in": ["a", "b"]}}, sort=[("starts_at", 1)])
+    second = query_shape({"sport": "padel", "participants": {"$in": ["c"]}}, sort=[("starts_at", 1)])
+
+    assert first == second
+    assert first != query_shape({"sport": 3})
+    assert query_shape({"$or": [{"sport": "x"}, {"location": "y"}]}) == query_shape({"$or": [{"sport": "z"}, {"location": "w"}]})
+
+def test_explain_summary_follows_the_winning_plan():
+    explain = {
+        "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "sport_1"}}},
+        "executionStats": {"nReturned": 3, "totalKeysExamined": 3, "totalDocsExamined": 3, "executionTimeMillis": 1},
+    }
+
+    assert summarize_explain(explain) == {
+        "plan": "FETCH > IXSCAN(sport_1)", "nReturned": 3, "totalKeysExamined": 3,
+        "totalDocsExamined": 3, "executionTimeMillis": 1,
+    }
+
+def record_finds(profiler, collection, *sports):
+    for sport in sports:
+        profiler.record("find", collection, time.perf_counter(), 2, query={"sport": sport})
+
+def test_flush_accumulates_totals_per_shape(mock_db):
+    profiler = QueryProfiler(enabled=True, slow_ms=10_000, explain_rate=0)
+    record_finds(profiler, mock_db.events, "football", "padel")
+    asyncio.run(profiler.flush(mock_db))
+    record_finds(profiler, mock_db.events, "tennis")
+    asyncio.run(profiler.flush(mock_db))
+
+    rows = asyncio.run(mock_db[PROFILE_COLLECTION].find().to_list(None))
+    assert len(rows) == 1
+    assert (rows[0]["count"], rows[0]["documents"], rows[0]["collection"]) == (3, 6, "events")
+
+def test_disabled_profiler_records_nothing(mock_db):
+    profiler = QueryProfiler(enabled=False)
+    record_finds(profiler, mock_db.events, "football")
+
+    assert profiler.pending == {}
+
+def test_failed_flush_keeps_totals_for_the_next_one(mock_db):
+    profiler = QueryProfiler(enabled=True, slow_ms=10_000, explain_rate=0)
+    record_finds(profiler, mock_db.events, "football", "padel")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(profiler.flush(FailingDatabase(ConnectionError("down"))))
+
+    record_finds(profiler, mock_db.events, "tennis")
+    asyncio.run(profiler.flush(mock_db))
+
+    row = asyncio.run(mock_db[PROFILE_COLLECTION].find_one())
+    assert (row["count"], row["documents"]) == (3, 6)
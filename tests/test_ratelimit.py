@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+import ratelimit
+from ratelimit import ConcurrencyLimiter, InMemoryRateLimitStore, RatePolicy, client_ip
+
+from .conftest import auth, register
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", fake)
+    return fake
+
+def test_bucket_allows_burst_then_refills(clock):
+    store = InMemoryRateLimitStore()
+
+    async def take():
+        return await store.take("login:ip:1.2.3.4", rate=0.5, burst=3)
+
+    assert [asyncio.run(take()) for _ in range(3)] == [0, 0, 0]
+    assert asyncio.run(take()) == pytest.approx(2.0)
+
+    # Half a token after one second, a whole one after two
+    clock.now += 1
+    assert asyncio.run(take()) == pytest.approx(1.0)
+    clock.now += 2
+    assert asyncio.run(take()) == 0
+
+def test_bucket_refill_is_capped_at_burst(clock):
+    store = InMemoryRateLimitStore()
+
+    async def drain(count):
+        return [await store.take("key", rate=1, burst=2) for _ in range(count)]
+
+    asyncio.run(drain(2))
+    clock.now += 3600
+    assert asyncio.run(drain(3)) == [0, 0, pytest.approx(1.0)]
+
+def test_least_recently_used_buckets_are_evicted(clock):
+    store = InMemoryRateLimitStore(max_keys=2)
+
+    async def take(key):
+        return await store.take(key, rate=1, burst=1)
+
+    asyncio.run(take("a"))
+    asyncio.run(take("b"))
+    asyncio.run(take("c"))
+    assert list(store._buckets) == ["b", "c"]
+    # "a" starts over with a full bucket
+    assert asyncio.run(take("a")) == 0
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    # Behind one proxy, as deployed
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_PROXY_HOPS", 1)
+    monkeypatch.setitem(
+        ratelimit.ROUTE_POLICIES, ("POST", "/api/auth/login"),
+        RatePolicy("login", rate=1 / 60, burst=2, key="ip", route_class="auth")
+    )
+
+def test_exhausted_policy_returns_429_with_retry_after(client, limited):
+    credentials = {"email": "nobody@example.dk", "password": "wrong-password"}
+
+    assert [client.post("/api/auth/login", json=credentials).status_code for _ in range(2)] == [401, 401]
+    response = client.post("/api/auth/login", json=credentials)
+
+    assert response.status_code == 429
+    assert 0 < int(response.headers["Retry-After"]) <= 60
+    # Another client address has its own bucket
+    other = client.post("/api/auth/login", json=credentials, headers={"X-Forwarded-For": "203.0.113.7"})
+    assert other.status_code == 401
+
+def test_forged_forwarded_header_is_ignored_without_proxies(client, limited, monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_PROXY_HOPS", 0)
+    credentials = {"email": "nobody@example.dk", "password": "wrong-password"}
+
+    statuses = [
+        client.post("/api/auth/login", json=credentials, headers={"X-Forwarded-For": f"203.0.113.{n}"}).status_code
+        for n in range(3)
+    ]
+
+    assert statuses == [401, 401, 429]
+
+def test_open_websocket_does_not_hold_a_concurrency_slot(client, limited, monkeypatch):
+    monkeypatch.setattr(ratelimit, "concurrency_limiter", ConcurrencyLimiter({"default": 1}, wait=0.05))
+    token = register(client, "Socket User", "socket@example.dk")
+
+    with client.websocket_connect(f"/api/presence/ws?token={token}"):
+        # The only default slot is free for plain requests
+        assert client.get("/api/auth/me", headers=auth(token)).status_code == 200
+
+def connection(peer: str, forwarded: str = "") -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+def test_client_ip_trusts_only_the_configured_proxy_hops():
+    spoofed = connection("10.0.0.1", "6.6.6.6, 198.51.100.2")
+
+    assert client_ip(spoofed, proxy_hops=0) == "10.0.0.1"
+    assert client_ip(spoofed, proxy_hops=1) == "198.51.100.2"
+    assert client_ip(spoofed, proxy_hops=2) == "6.6.6.6"
+    # Fewer entries than trusted hops means the request skipped a proxy
+    assert client_ip(spoofed, proxy_hops=3) == "10.0.0.1"
+    assert client_ip(connection("10.0.0.1"), proxy_hops=1) == "10.0.0.1"
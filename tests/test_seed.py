@@ -0,0 +1,51 @@
+import random
+from collections import Counter
+
+from seed import SEED_PASSWORD, generate_events, generate_friendships, generate_users, seed_database
+
+from .conftest import auth
+
+def test_generated_events_are_consistent():
+    random.seed(3)
+    users = generate_users(30, ["football", "padel"], "hash")
+    events = generate_events(100, users)
+    user_ids = {str(user["_id"]) for user in users}
+
+    for event in events:
+        assert event["participants"][0] == event["organizer_id"]
+        assert len(set(event["participants"])) == event["current_participants"] <= event["max_participants"]
+        assert set(event["participants"]) <= user_ids
+        assert event["starts_at"] is not None
+    assert len({user["email"] for user in users}) == 30
+
+def test_friendships_are_unique_pairs():
+    random.seed(3)
+    users = generate_users(20, ["football"], "hash")
+    pairs = [(f["user_id"], f["friend_id"]) for f in generate_friendships(users, per_user=5)]
+
+    assert all(user_id < friend_id for user_id, friend_id in pairs)
+    assert len(pairs) == len(set(pairs))
+
+def test_seeded_database_is_usable(client):
+    random.seed(3)
+    counts = client.portal.call(lambda: seed_database(users=20, events=40, messages=200))
+    assert (counts["users"], counts["events"], counts["messages"]) == (20, 40, 200)
+
+    async def load():
+        from database import get_collection
+        users = await (await get_collection("users")).find().to_list(None)
+        events = await (await get_collection("events")).find().to_list(None)
+        boards = await (await get_collection("leaderboards")).find({"board": "sport"}).to_list(None)
+        return users, events, boards
+
+    users, events, boards = client.portal.call(load)
+    # Counters match the generated data
+    created = Counter(event["organizer_id"] for event in events)
+    assert {str(user["_id"]): user["events_created"] for user in users} == {str(user["_id"]): created[str(user["_id"])] for user in users}
+    assert sum(user["messages_sent"] for user in users) == 200
+    assert sum(bucket["score"] for bucket in boards) == sum(len(event["participants"]) for event in events)
+
+    # Every seeded user can log in
+    response = client.post("/api/auth/login", json={"email": users[0]["email"], "password": SEED_PASSWORD})
+    assert response.status_code == 200, response.text
+    assert client.get("/api/auth/me", headers=auth(response.json()["access_token"])).status_code == 200
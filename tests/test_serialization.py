@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import List
+
+import orjson
+from pydantic import BaseModel
+
+from models import Event
+from serialization import fast_json_response, project_rows
+
+from .conftest import create_event, register
+
+class Row(BaseModel):
+    id: str
+    tags: List[str] = []
+    count: int = 1
+
+def test_rows_are_shaped_to_the_model_fields():
+    rows = project_rows(Row, [{"id": "a", "count": 3, "secret": "x"}, {"id": "b"}])
+
+    assert rows == [{"id": "a", "tags": [], "count": 3}, {"id": "b", "tags": [], "count": 1}]
+    # Mutable defaults are not shared between rows
+    rows[0]["tags"].append("changed")
+    assert rows[1]["tags"] == []
+
+def test_fast_json_response_serializes_datetimes():
+    response = fast_json_response({"at": datetime(2026, 10, 19, 12, 0)}, status_code=201)
+
+    assert response.status_code == 201
+    assert orjson.loads(response.body) == {"at": "2026-10-19T12:00:00"}
+
+def test_listing_rows_carry_exactly_the_event_fields(client):
+    token = register(client, "Organizer", "organizer@example.dk")
+    event_id = create_event(client, token)
+
+    rows = client.get("/api/events").json()
+    assert [row["id"] for row in rows] == [event_id]
+    # Stored-only fields such as _id and geo are dropped
+    assert set(rows[0]) == set(Event.model_fields)
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+import sports_data
+from sports_data import SPORTS_DATA, get_catalog, get_sport_by_id, reload_sports_catalog
+
+@pytest.fixture
+def catalog_restored(monkeypatch):
+    monkeypatch.setattr(sports_data, "_catalog", get_catalog())
+
+def test_snapshot_is_read_only():
+    football = get_sport_by_id("football")
+
+    assert football["name_da"]
+    with pytest.raises(TypeError):
+        football["name"] = "Soccer"
+    with pytest.raises(TypeError):
+        get_catalog().by_id["new"] = {}
+    assert get_sport_by_id("quidditch") is None
+
+def test_reload_merges_the_sports_collection(mock_db, catalog_restored):
+    before = get_catalog()
+    asyncio.run(mock_db.sports.insert_many([
+        {"sport_id": "padel", "name": "Padel", "name_da": "Padel", "icon": "🎾", "color": "#10B981"},
+        {"sport_id": "skate", "enabled": False},
+        {"sport_id": "curling", "name": "Curling"},
+    ]))
+
+    catalog = asyncio.run(reload_sports_catalog())
+
+    ids = [sport["id"] for sport in catalog.sports]
+    assert "padel" in ids and "skate" not in ids and "curling" not in ids
+    assert len(ids) == len(SPORTS_DATA)
+    assert catalog.etag != before.etag
+    assert get_sport_by_id("padel")["name"] == "Padel"
+
+def test_unchanged_reload_keeps_the_etag(mock_db, catalog_restored):
+    assert asyncio.run(reload_sports_catalog()).etag == get_catalog().etag == sports_data.SportsCatalog(SPORTS_DATA).etag
+
+def test_endpoint_serves_the_pre_serialized_body(client):
+    response = client.get("/api/sports")
+
+    assert response.content == get_catalog().body
+    assert response.headers["ETag"] == get_catalog().etag
+    assert [sport["id"] for sport in response.json()] == [sport["id"] for sport in SPORTS_DATA]
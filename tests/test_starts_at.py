@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from migrate import backfill_starts_at
+from utils import EVENT_TIMEZONE, format_datetime_for_db, local_day_start
+
+from .conftest import create_event, register
+
+def test_local_date_and_time_become_utc():
+    # Copenhagen is UTC+2 in summer and UTC+1 in winter
+    assert format_datetime_for_db("2026-07-01", "18:00") == datetime(2026, 7, 1, 16, 0, tzinfo=timezone.utc)
+    assert format_datetime_for_db("2026-12-01", "18:00") == datetime(2026, 12, 1, 17, 0, tzinfo=timezone.utc)
+
+def test_local_day_start_is_local_midnight():
+    start = local_day_start(1)
+    local = start.astimezone(EVENT_TIMEZONE)
+
+    assert (local.hour, local.minute) == (0, 0)
+    assert local.date() == datetime.now(EVENT_TIMEZONE).date() + timedelta(days=1)
+
+def local_date(days_from_today: int) -> str:
+    return (datetime.now(EVENT_TIMEZONE).date() + timedelta(days=days_from_today)).strftime("%Y-%m-%d")
+
+def test_date_filters_select_local_calendar_days(client):
+    token = register(client, "Organizer", "organizer@example.dk")
+    # Just after local midnight, which is still the previous day in UTC
+    tomorrow = create_event(client, token, date=local_date(1), time="00:30")
+    next_week = create_event(client, token, date=local_date(5), time="12:00")
+    later = create_event(client, token, date=local_date(10), time="12:00")
+
+    def listed(date_filter):
+        return [event["id"] for event in client.get("/api/events", params={"date_filter": date_filter}).json()]
+
+    assert listed("tomorrow") == [tomorrow]
+    assert listed("thisWeek") == [tomorrow, next_week]
+    assert listed("today") == []
+    assert listed(None) == [tomorrow, next_week, later]
+
+def test_backfill_derives_starts_at(mock_db):
+    asyncio.run(mock_db.events.insert_many([
+        {"date": "2026-07-01", "time": "18:00"},
+        {"date": "not a date", "time": "18:00"},
+        {"date": "2026-07-02", "time": "09:00", "starts_at": datetime(2026, 7, 2, 7, 0)},
+    ]))
+
+    assert asyncio.run(backfill_starts_at()) == {"events": 1, "skipped": 1}
+    event = asyncio.run(mock_db.events.find_one({"date": "2026-07-01"}))
+    assert event["starts_at"] == datetime(2026, 7, 1, 16, 0)
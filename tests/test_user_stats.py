@@ -0,0 +1,67 @@
+import asyncio
+
+from bson import ObjectId
+
+from user_stats import backfill_user_stats, increment_user_counters
+
+from .conftest import auth, create_event, register, user_id
+
+def stats(client, token):
+    return client.get("/api/users/stats", headers=auth(token)).json()
+
+def test_counters_follow_participation_messages_and_friends(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    player = register(client, "Player", "player@example.dk", sports=["football", "tennis"])
+    event_id = create_event(client, organizer, max_participants=5)
+
+    client.post(f"/api/events/{event_id}/join", headers=auth(player))
+    message = {"event_id": event_id, "message": "See you", "message_da": "Vi ses"}
+    client.post(f"/api/events/{event_id}/messages", json=message, headers=auth(player))
+    client.post(f"/api/friends/{user_id(client, organizer)}", headers=auth(player))
+
+    assert stats(client, player) == {
+        "events_participated": 1, "events_created": 0, "badges_count": 1,
+        "friends_count": 1, "sports_count": 2, "messages_sent": 1,
+    }
+    assert stats(client, organizer)["events_created"] == 1
+    assert stats(client, organizer)["friends_count"] == 1
+
+    client.post(f"/api/events/{event_id}/leave", headers=auth(player))
+    client.delete(f"/api/friends/{user_id(client, organizer)}", headers=auth(player))
+    assert stats(client, player)["events_participated"] == 0
+    assert stats(client, organizer)["friends_count"] == 0
+
+def test_stats_revalidate_until_a_counter_changes(client):
+    organizer = register(client, "Organizer", "organizer@example.dk")
+    etag = client.get("/api/users/stats", headers=auth(organizer)).headers["ETag"]
+
+    assert client.get("/api/users/stats", headers={**auth(organizer), "If-None-Match": etag}).status_code == 304
+    create_event(client, organizer)
+    assert client.get("/api/users/stats", headers={**auth(organizer), "If-None-Match": etag}).status_code == 200
+
+def test_badges_follow_thresholds(mock_db):
+    user = asyncio.run(mock_db.users.insert_one({"events_participated": 4, "events_created": 0, "badges": ["First Timer"]}))
+
+    updated = asyncio.run(increment_user_counters(str(user.inserted_id), events_participated=1, events_created=1))
+
+    assert updated["badges"] == ["First Timer", "Active Player", "Event Organizer"]
+    assert asyncio.run(mock_db.users.find_one())["badges"] == updated["badges"]
+
+def test_backfill_recounts_from_source_collections(mock_db):
+    alice, bob = ObjectId(), ObjectId()
+    asyncio.run(mock_db.users.insert_many([{"_id": alice, "friends_count": 9}, {"_id": bob}]))
+    asyncio.run(mock_db.events.insert_many([
+        {"organizer_id": str(alice), "participants": [str(alice), str(bob)]},
+        {"organizer_id": str(alice), "participants": [str(alice)]},
+    ]))
+    # Friendships are paired with an array literal of field paths, which mongomock doesn't evaluate
+    asyncio.run(mock_db.friendships.insert_one({"user_id": str(alice), "friend_id": str(bob), "status": "pending"}))
+    asyncio.run(mock_db.messages.insert_one({"user_id": str(bob)}))
+
+    assert asyncio.run(backfill_user_stats()) == {"users": 2}
+
+    users = {doc["_id"]: doc for doc in asyncio.run(mock_db.users.find().to_list(length=None))}
+    assert users[alice]["events_created"] == 2 and users[alice]["events_participated"] == 0
+    assert users[alice]["friends_count"] == 0
+    assert users[bob]["events_participated"] == 1 and users[bob]["messages_sent"] == 1
+    assert users[bob]["badges"] == ["First Timer"]
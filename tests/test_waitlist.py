@@ -0,0 +1,83 @@
+from .conftest import auth, create_event, register, user_id
+
+def join(client, event_id, token):
+    return client.post(f"/api/events/{event_id}/join", headers=auth(token)).json()
+
+def leave(client, event_id, token):
+    return client.post(f"/api/events/{event_id}/leave", headers=auth(token))
+
+def get_event(client, event_id, token):
+    return client.get(f"/api/events/{event_id}", headers=auth(token)).json()
+
+def participated(client, token):
+    return client.get("/api/users/stats", headers=auth(token)).json()["events_participated"]
+
+def register_users(client, count):
+    return [register(client, f"Player {i} Test", f"player{i}@example.dk") for i in range(count)]
+
+def test_full_event_queues_joiners_in_order(client):
+    organizer, a, b, c = register_users(client, 4)
+    event_id = create_event(client, organizer, max_participants=2)
+
+    assert join(client, event_id, a)["waitlisted"] is False
+    assert join(client, event_id, b) == {"message": "Event is full, added to waitlist", "waitlisted": True, "waitlist_position": 1}
+    assert join(client, event_id, c)["waitlist_position"] == 2
+    assert join(client, event_id, b) == {"message": "Already on the waitlist", "waitlisted": True, "waitlist_position": 1}
+
+    event = get_event(client, event_id, organizer)
+    assert event["current_participants"] == 2
+    assert user_id(client, b) not in event["participants"]
+
+def test_leave_promotes_head_of_waitlist(client):
+    organizer, a, b, c = register_users(client, 4)
+    event_id = create_event(client, organizer, max_participants=2)
+    for token in (a, b, c):
+        join(client, event_id, token)
+
+    assert leave(client, event_id, a).status_code == 200
+
+    event = get_event(client, event_id, organizer)
+    assert event["participants"] == [user_id(client, organizer), user_id(client, b)]
+    waitlist = client.get(f"/api/events/{event_id}/waitlist", headers=auth(c)).json()
+    assert waitlist["position"] == 1 and waitlist["length"] == 1
+    assert [participated(client, token) for token in (a, b, c)] == [0, 1, 0]
+
+def test_open_seat_goes_to_waitlist_before_new_joiners(client):
+    organizer, a, b, c = register_users(client, 4)
+    event_id = create_event(client, organizer, max_participants=2)
+    join(client, event_id, a)
+    join(client, event_id, b)
+
+    response = client.patch(f"/api/events/{event_id}", json={"max_participants": 3}, headers=auth(organizer))
+    assert response.status_code == 200
+    assert user_id(client, b) in response.json()["participants"]
+
+    # The raised capacity went to the queue, a newcomer waits
+    assert join(client, event_id, c)["waitlisted"] is True
+    assert participated(client, b) == 1
+
+def test_raising_capacity_promotes_only_the_added_seats(client):
+    organizer, a, b, c, d = register_users(client, 5)
+    event_id = create_event(client, organizer, max_participants=2)
+    for token in (a, b, c, d):
+        join(client, event_id, token)
+
+    response = client.patch(f"/api/events/{event_id}", json={"max_participants": 4}, headers=auth(organizer))
+
+    body = response.json()
+    assert body["participants"][-2:] == [user_id(client, b), user_id(client, c)]
+    assert body["current_participants"] == 4
+    assert client.get(f"/api/events/{event_id}/waitlist", headers=auth(d)).json()["position"] == 1
+
+def test_cancelled_event_rejects_joins_and_leaves(client):
+    organizer, a, b, c = register_users(client, 4)
+    event_id = create_event(client, organizer, max_participants=2)
+    join(client, event_id, a)
+    join(client, event_id, b)
+    assert client.post(f"/api/events/{event_id}/cancel", headers=auth(organizer)).status_code == 200
+
+    response = client.post(f"/api/events/{event_id}/join", headers=auth(c))
+    assert response.status_code == 400
+    assert leave(client, event_id, a).status_code == 400
+    # Nobody was promoted into the cancelled event
+    assert participated(client, b) == 0